@@ -0,0 +1,153 @@
+"""
+Load test sesi bersamaan, headless (streamlit.testing AppTest, tanpa browser/jaringan).
+
+    python -m bench.load                          # N = 1,2,4,8 sesi, 3 putaran
+    python -m bench.load --sessions 1,4,16 --rounds 5 --out load.json
+
+Tiap sesi = satu AppTest (session_state sendiri) yang berjalan di thread
+sendiri, klik tombol navigasi Home -> Peta -> Epi -> Model seperti user
+(lewat go() / st.session_state.page). Cache st.cache_data dibagi antar sesi
+karena satu proses, sama seperti server Streamlit sungguhan.
+"""
+import argparse
+import json
+import resource
+import sys
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from bench.run import _meta  # noqa: E402
+from tbc import perf  # noqa: E402
+
+APP = ROOT / "dashboarduas.py"
+ROUTE = [("Peta Sebaran", "Peta"), ("Ukuran Epidemiologi", "Epi"), ("Modeling", "Model"), ("Home", "Home")]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024     # Linux: KiB
+
+
+class RssSampler(threading.Thread):
+    """Sampel RSS tiap interval; puncak per level N (ru_maxrss hanya naik sepanjang proses)."""
+
+    def __init__(self, interval=0.05):
+        super().__init__(daemon=True)
+        self.interval, self.peak, self._halt = interval, 0.0, threading.Event()
+
+    def run(self):
+        while not self._halt.is_set():
+            self.peak = max(self.peak, rss_mb())
+            self._halt.wait(self.interval)
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+        return max(self.peak, rss_mb())
+
+
+def session(rounds: int, timeout: float) -> list:
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APP), default_timeout=timeout)
+    lat = []
+
+    t0 = time.perf_counter()
+    at.run()
+    lat.append(("Home", (time.perf_counter() - t0) * 1000, len(at.exception)))
+
+    for _ in range(rounds):
+        for label, page in ROUTE:
+            btn = next(b for b in at.button if b.label == label)
+            t0 = time.perf_counter()
+            btn.click().run()
+            lat.append((page, (time.perf_counter() - t0) * 1000, len(at.exception)))
+            if at.session_state["page"] != page:
+                raise RuntimeError(f"navigasi gagal: {label} -> {at.session_state['page']}")
+    return lat
+
+
+def run_level(n: int, rounds: int, timeout: float) -> dict:
+    perf.reset()
+    sampler = RssSampler()
+    sampler.start()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n) as ex:
+        results = list(ex.map(lambda _: session(rounds, timeout), range(n)))
+    wall = time.perf_counter() - t0
+    peak = sampler.stop()
+
+    rows = [r for res in results for r in res]
+    ms = np.array([r[1] for r in rows])
+    per_page = {}
+    for page in ["Home", "Peta", "Epi", "Model"]:
+        x = np.array([r[1] for r in rows if r[0] == page])
+        if x.size:
+            per_page[page] = {k: round(float(v), 2) for k, v in zip(("p50_ms", "p95_ms", "p99_ms"), np.percentile(x, [50, 95, 99]))}
+
+    caches = perf.cache_table()
+    hit = sum(c["hit"] for c in caches)
+    miss = sum(c["miss"] for c in caches)
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "sessions": n,
+        "reruns": int(ms.size),
+        "exceptions": int(sum(r[2] for r in rows)),
+        "wall_s": round(wall, 3),
+        "reruns_per_s": round(ms.size / wall, 2),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "peak_rss_mb": round(peak, 1),
+        "cache_hit_rate": round(hit / max(hit + miss, 1), 4),
+        "per_page": per_page,
+        "caches": caches,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sessions", default="1,2,4,8", help="daftar N sesi bersamaan")
+    ap.add_argument("--rounds", type=int, default=3, help="putaran Home->Peta->Epi->Model per sesi")
+    ap.add_argument("--timeout", type=float, default=120.0, help="batas waktu satu rerun (detik)")
+    ap.add_argument("--out", default="load_results.json")
+    args = ap.parse_args(argv)
+    warnings.filterwarnings("ignore")
+
+    # warm-up: isi cache dulu supaya level N=1 tidak menanggung cold start sendirian
+    session(1, args.timeout)
+
+    levels = []
+    for n in [int(x) for x in args.sessions.split(",") if x]:
+        lv = run_level(n, args.rounds, args.timeout)
+        levels.append(lv)
+        print(
+            f"N={n:<3} reruns={lv['reruns']:<4} p50 {lv['p50_ms']:>8.1f} ms  p95 {lv['p95_ms']:>8.1f}  "
+            f"p99 {lv['p99_ms']:>8.1f}  {lv['reruns_per_s']:>6.2f} rerun/s  RSS puncak {lv['peak_rss_mb']:.0f} MB  "
+            f"cache hit {lv['cache_hit_rate']:.1%}  exc {lv['exceptions']}",
+            flush=True,
+        )
+
+    out = {"meta": dict(_meta(), rounds=args.rounds, peak_rss_process_mb=round(peak_rss_mb(), 1)), "levels": levels}
+    Path(args.out).write_text(json.dumps(out, indent=2))
+    print(f"\nhasil -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+"""
+Suite benchmark dashboard TBC.
+
+    python -m bench.run                      # skala 38 / 514 / 5000 + line-list 1 juta
+    python -m bench.run --linelist 1e6,1e7   # sampai 10 juta baris
+    python -m bench.run --only model_fit,choropleth
+    python -m bench.run --out hasil.json --compare bench_results.json
+
+Hasil ditulis ke JSON (satu entri per benchmark × skala) supaya bisa
+dibandingkan antar commit; --compare mencetak rasio terhadap file lama.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from bench.synth import JK, SCALES, UMUR, epi2_frame, model_frame, synth_geojson, synth_linelist, synth_units  # noqa: E402
+from tbc.bym import BYM, connect_graph, polygon_adjacency  # noqa: E402
+from tbc.classify import classify  # noqa: E402
+from tbc.collinear import collinearity  # noqa: E402
+from tbc.compare import compare_counts  # noqa: E402
+from tbc.cube import build_cube  # noqa: E402
+from tbc.cv import NBCrossValidator  # noqa: E402
+from tbc.design import build_design  # noqa: E402
+from tbc.geo import feature_centroids, load_geo_prepared  # noqa: E402
+from tbc.gwr import GWNB  # noqa: E402
+from tbc.hierarchy import RESOLUTIONS, build_levels, load_kab_geo, simplify_geo  # noqa: E402
+from tbc.influence import nb_influence  # noqa: E402
+from tbc.mh import mantel_haenszel  # noqa: E402
+from tbc.predict import NBPredictor  # noqa: E402
+from tbc.resample import bootstrap_overdispersion, permutation_pvalues  # noqa: E402
+from tbc.schema import normalize  # noqa: E402
+
+BENCHES = {}
+
+
+def bench(name: str, scales=tuple(SCALES)):
+    """Daftarkan benchmark. fn(scale, n, tmp) -> callable yang diukur."""
+    def deco(fn):
+        BENCHES[name] = (fn, scales)
+        return fn
+    return deco
+
+
+def measure(fn, repeat: int):
+    """Return (waktu ms per ulangan, nilai balik terakhir). Satu panggilan warm-up dulu."""
+    ret = fn()
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        ret = fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out, ret
+
+
+# =========================
+# LOADER (pd.read_excel + normalisasi skema, sama dengan load_data / load_epi1_model)
+# =========================
+@bench("parse_epi2")
+def _parse_epi2(scale, n, tmp):
+    path = tmp / f"epi2_{n}.xlsx"
+    epi2_frame(synth_units(n)).to_excel(path, index=False)
+
+    def run():
+        df, _ = normalize(pd.read_excel(path), "epi2")
+        df["non_tbc"] = df["populasi"] - df["jumlah_tbc"]
+    return run
+
+
+@bench("parse_model")
+def _parse_model(scale, n, tmp):
+    path = tmp / f"model_{n}.xlsx"
+    model_frame(synth_units(n)).to_excel(path, index=False)
+    return lambda: normalize(pd.read_excel(path), "model")
+
+
+# =========================
+# GEOJSON
+# =========================
+@bench("geojson_load")
+def _geojson_load(scale, n, tmp):
+    if scale == "provinsi":
+        return lambda: load_geo_prepared(ROOT / "indonesia.geojson")
+    path = tmp / f"geo_{n}.geojson"
+    path.write_text(json.dumps(synth_geojson(synth_units(n))))
+    return lambda: load_kab_geo(path)
+
+
+@bench("geojson_simplify")
+def _geojson_simplify(scale, n, tmp):
+    geo = load_geo_prepared(ROOT / "indonesia.geojson") if scale == "provinsi" else synth_geojson(synth_units(n))
+    return lambda: simplify_geo(geo, RESOLUTIONS["Sedang"])
+
+
+# =========================
+# CHOROPLETH (bangun folium + render HTML, yang dikirim st_folium ke browser)
+# =========================
+@bench("choropleth")
+def _choropleth(scale, n, tmp):
+    import folium
+
+    units = synth_units(n)
+    units["rate_100k"] = units["jumlah_tbc"] / units["populasi"] * 100000
+    if scale == "provinsi":
+        geo = load_geo_prepared(ROOT / "indonesia.geojson")
+        key_on = "feature.properties.prov_clean"
+        units["key"] = [ft["properties"]["prov_clean"] for ft in geo["features"]] + [""] * (len(units) - len(geo["features"]))
+    else:
+        geo = synth_geojson(units)
+        key_on = "feature.properties.KODE_KAB"
+        units["key"] = units["kode"]
+
+    def run():
+        m = folium.Map(location=[-2.5, 118.0], zoom_start=5, tiles="cartodbpositron")
+        folium.Choropleth(
+            geo_data=geo, data=units, columns=["key", "rate_100k"], key_on=key_on,
+            fill_color="YlOrRd", fill_opacity=0.85, line_opacity=0.35, highlight=True,
+        ).add_to(m)
+        return len(m.get_root().render())
+    return run
+
+
+@bench("classify_jenks")
+def _classify_jenks(scale, n, tmp):
+    units = synth_units(n)
+    rate = (units["jumlah_tbc"] / units["populasi"] * 100000).to_numpy()
+    return lambda: classify(rate, "Jenks (natural breaks)")
+
+
+# =========================
+# EPI: kubus + 2x2 PR/POR (median split kepadatan)
+# =========================
+def _two_by_two(cube):
+    kep = cube.attrs["kepadatan"].to_numpy(dtype="float64") if "kepadatan" in cube.attrs else None
+    if kep is None:
+        kep = np.arange(len(cube.provinces), dtype="float64")
+    med = np.median(kep)
+    hi, lo = kep >= med, kep < med
+    a = cube.query("jumlah_tbc", provinsi=hi)
+    b = cube.query("populasi", provinsi=hi) - a
+    c = cube.query("jumlah_tbc", provinsi=lo)
+    d = cube.query("populasi", provinsi=lo) - c
+    pr = (a / (a + b)) / (c / (c + d))
+    por = (a * d) / (b * c)
+    return pr, por
+
+
+@bench("epi_2x2")
+def _epi_2x2(scale, n, tmp):
+    units = synth_units(n).rename(columns={"unit": "provinsi", "provinsi": "induk"})
+    return lambda: _two_by_two(build_cube(units))
+
+
+@bench("epi_2x2_linelist", scales=())
+def _epi_2x2_linelist(scale, n, tmp):
+    ll = synth_linelist(n)
+    return lambda: _two_by_two(build_cube(ll, attr_cols=()))
+
+
+@bench("epi_mh_strata")
+def _epi_mh_strata(scale, n, tmp):
+    # n unit × umur × jk strata (kecamatan -> 170 ribu tabel 2x2)
+    rng = np.random.default_rng(0)
+    K = n * len(UMUR) * len(JK)
+    n1 = rng.integers(1_000, 100_000, K).astype("float64")
+    n0 = rng.integers(1_000, 100_000, K).astype("float64")
+    a = rng.binomial(n1.astype("int64"), 3e-3).astype("float64")
+    c = rng.binomial(n0.astype("int64"), 2e-3).astype("float64")
+    return lambda: mantel_haenszel(a, n1 - a, c, n0 - c)
+
+
+@bench("cube_query", scales=())
+def _cube_query(scale, n, tmp):
+    cube = build_cube(synth_linelist(n), attr_cols=())
+    year = cube.latest()
+
+    def run():
+        for _ in range(100):
+            cube.rate_100k(by=("provinsi",), tahun=year)
+    return run
+
+
+@bench("hierarchy_rollup", scales=("kabkota", "kecamatan"))
+def _hierarchy_rollup(scale, n, tmp):
+    units = synth_units(n).rename(columns={"unit": "kab_kota"})
+    units["kode_kab"] = units["kode"] // (1 if n <= 1000 else 100)
+    return lambda: build_levels(units)
+
+
+# =========================
+# MODEL: Poisson GLM + NB MLE + NB GLM (sama dengan halaman Model)
+# =========================
+@bench("model_design")
+def _model_design(scale, n, tmp):
+    df, _ = normalize(model_frame(synth_units(n)), "model")
+    return lambda: build_design(df, "y ~ x1 + x2 + x3 + x4 + x5").standardized()
+
+
+@bench("model_fit")
+def _model_fit(scale, n, tmp):
+    import statsmodels.api as sm
+
+    df, _ = normalize(model_frame(synth_units(n)), "model")
+    formula = "y ~ x1 + x2 + x3 + x4 + x5"
+
+    def run():
+        y, X = build_design(df, formula).frames()          # satu design untuk ketiga fit
+        sm.GLM(y, X, family=sm.families.Poisson()).fit()
+        nb_mle = sm.NegativeBinomial(y, X).fit(disp=False)
+        alpha_hat = float(nb_mle.params["alpha"])
+        sm.GLM(y, X, family=sm.families.NegativeBinomial(alpha=alpha_hat)).fit()
+    return run
+
+
+def _cv_setup(n):
+    import statsmodels.api as sm
+
+    df, _ = normalize(model_frame(synth_units(n)), "model")
+    d = build_design(df, "y ~ x1 + x2 + x3 + x4 + x5")
+    y, X = d.frames()
+    alpha_hat = float(sm.NegativeBinomial(y, X).fit(disp=False).params["alpha"])
+    beta = sm.GLM(y, X, family=sm.families.NegativeBinomial(alpha=alpha_hat)).fit().params.to_numpy()
+    return NBCrossValidator(d.y, d.X, alpha_hat, beta)
+
+
+@bench("cv_loo_onestep")
+def _cv_loo_onestep(scale, n, tmp):
+    cv = _cv_setup(n)
+    return lambda: cv.run(None, "onestep")
+
+
+@bench("cv_loo_exact", scales=("provinsi", "kabkota"))
+def _cv_loo_exact(scale, n, tmp):
+    cv = _cv_setup(n)
+    return lambda: cv.run(None, "exact")
+
+
+@bench("nb_influence")
+def _nb_influence(scale, n, tmp):
+    cv = _cv_setup(n)
+    return lambda: nb_influence(cv.y, cv.X, cv.mu, cv.alpha)
+
+
+@bench("whatif_predict")
+def _whatif_predict(scale, n, tmp):
+    import statsmodels.api as sm
+
+    df, _ = normalize(model_frame(synth_units(n)), "model")
+    y, X = build_design(df, "y ~ x1 + x2 + x3 + x4 + x5").frames()
+    alpha_hat = float(sm.NegativeBinomial(y, X).fit(disp=False).params["alpha"])
+    nb = sm.GLM(y, X, family=sm.families.NegativeBinomial(alpha=alpha_hat)).fit()
+    pred = NBPredictor(nb.params.to_numpy(), nb.cov_params().to_numpy(), alpha_hat, len(y))
+    X_new = X.to_numpy() + np.r_[0.0, 1.0, 0.0, 0.0, 0.0, 0.0]
+
+    # satu geser slider: μ + CI delta, draw prediktif, PI per unit & total
+    def run():
+        pred.mean(X_new)
+        d = pred.draws(X_new)
+        pred.interval(d)
+        pred.interval(d.sum(axis=0))
+    return run
+
+
+@bench("count_compare", scales=("provinsi", "kabkota"))
+def _count_compare(scale, n, tmp):
+    import statsmodels.api as sm
+
+    df, _ = normalize(model_frame(synth_units(n)), "model")
+    d = build_design(df, "y ~ x1 + x2 + x3 + x4 + x5")
+    y, X = d.frames()
+    pois = sm.GLM(y, X, family=sm.families.Poisson()).fit()
+    std = d.standardized()
+    return lambda: compare_counts(d.y, std["X"], pois.params.to_numpy(), pois.fittedvalues.to_numpy(), T=std["T"])
+
+
+@bench("bootstrap_overdisp", scales=("provinsi", "kabkota"))
+def _bootstrap_overdisp(scale, n, tmp):
+    cv = _cv_setup(n)
+    mu = np.exp(cv.X @ cv.beta)
+    return lambda: bootstrap_overdispersion(cv.y, cv.X, mu, cv.beta, B=1999)
+
+
+@bench("permutation_coef", scales=("provinsi", "kabkota"))
+def _permutation_coef(scale, n, tmp):
+    cv = _cv_setup(n)
+    return lambda: permutation_pvalues(cv.y, cv.X, cv.alpha, cv.beta, B=999)
+
+
+@bench("collinearity")
+def _collinearity(scale, n, tmp):
+    # 60 kandidat kovariat (5 asli + kombinasi acak) supaya skala "puluhan kovariat" ikut terukur
+    units = synth_units(n)
+    X = units[["x1", "x2", "x3", "x4", "x5"]].to_numpy(dtype="float64")
+    X = np.column_stack([X, X @ np.random.default_rng(0).normal(size=(5, 55)) + np.random.default_rng(1).normal(size=(n, 55))])
+    return lambda: collinearity(X)
+
+
+@bench("gwnb_fit", scales=("provinsi", "kabkota"))
+def _gwnb_fit(scale, n, tmp):
+    import statsmodels.api as sm
+
+    units = synth_units(n)
+    coords = feature_centroids(synth_geojson(units))
+    X = units[["x1", "x2", "x3", "x4", "x5"]]
+    nb_mle = sm.NegativeBinomial(units["jumlah_tbc"], sm.add_constant(X)).fit(disp=False, maxiter=200)
+    alpha_hat = float(nb_mle.params["alpha"])
+    beta0 = nb_mle.params.to_numpy()[:-1]
+    # pencarian bandwidth AICc + fit akhir, warm start dari NB global
+    return lambda: GWNB(units["jumlah_tbc"], X, coords, alpha_hat, beta0=beta0).fit()
+
+
+@bench("bym_fit", scales=("provinsi", "kabkota"))
+def _bym_fit(scale, n, tmp):
+    units = synth_units(n)
+    geo = synth_geojson(units)
+    W = connect_graph(polygon_adjacency(geo), feature_centroids(geo))
+    y = units["jumlah_tbc"].to_numpy()
+    E = units["populasi"].to_numpy() * y.sum() / units["populasi"].sum()
+    # optimasi τ (Laplace) + posterior η, pola sparse dianalisis sekali per model
+    return lambda: BYM(y, E, W, units[["x1", "x2", "x3", "x4", "x5"]]).fit()
+
+
+# =========================
+# RUNNER
+# =========================
+def _meta() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor() or None,
+    }
+
+
+def run_suite(only=None, linelist=(1_000_000,), repeat: int = 5) -> dict:
+    results = []
+    with tempfile.TemporaryDirectory() as d:
+        tmp = Path(d)
+        for name, (fn, scales) in BENCHES.items():
+            if only and name not in only:
+                continue
+            plan = [(s, SCALES[s]) for s in scales]
+            if name in ("epi_2x2_linelist", "cube_query"):
+                plan = [("linelist", int(n)) for n in linelist]
+            for scale, n in plan:
+                target = fn(scale, n, tmp)
+                rep = repeat if n < 1_000_000 else max(1, repeat // 2)
+                t, ret = measure(target, rep)
+                row = {
+                    "name": name, "scale": scale, "n": n, "repeat": rep,
+                    "min_ms": round(min(t), 3), "median_ms": round(float(np.median(t)), 3),
+                    "mean_ms": round(float(np.mean(t)), 3),
+                }
+                if isinstance(ret, int):
+                    row["payload_bytes"] = ret     # ukuran HTML peta (choropleth)
+                results.append(row)
+                print(f"{name:<20} {scale:<10} n={n:<10,} median {row['median_ms']:>10.2f} ms  (min {row['min_ms']:.2f})", flush=True)
+    return {"meta": _meta(), "results": results}
+
+
+def compare(new: dict, old: dict, threshold: float) -> bool:
+    base = {(r["name"], r["scale"], r["n"]): r for r in old["results"]}
+    worse = False
+    print(f"\nvs {old['meta'].get('commit')} (ambang x{threshold}):")
+    for r in new["results"]:
+        o = base.get((r["name"], r["scale"], r["n"]))
+        if o is None:
+            continue
+        ratio = r["median_ms"] / o["median_ms"] if o["median_ms"] > 0 else np.inf
+        flag = "  <-- REGRESI" if ratio > threshold else ""
+        worse |= ratio > threshold
+        print(f"{r['name']:<20} {r['scale']:<10} {o['median_ms']:>10.2f} -> {r['median_ms']:>10.2f} ms  x{ratio:.2f}{flag}")
+    return worse
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--only", default="", help="daftar benchmark dipisah koma")
+    ap.add_argument("--linelist", default="1e6", help="ukuran line-list, mis. 1e6,1e7")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--out", default="bench_results.json")
+    ap.add_argument("--compare", default=None, help="file JSON hasil lama")
+    ap.add_argument("--threshold", type=float, default=1.25, help="rasio median yang dianggap regresi")
+    args = ap.parse_args(argv)
+    warnings.filterwarnings("ignore")      # konvergensi statsmodels / deprecation folium
+
+    only = {s for s in args.only.split(",") if s}
+    linelist = [int(float(x)) for x in args.linelist.split(",") if x]
+    res = run_suite(only, linelist, args.repeat)
+
+    Path(args.out).write_text(json.dumps(res, indent=2))
+    print(f"\nhasil -> {args.out}")
+
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text())
+        if compare(res, old, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Generator data sintetis berbentuk "Indonesia" untuk benchmark.
+
+Skala unit: 38 (provinsi), 514 (kab/kota), 5.000+ (kecamatan-ish).
+Populasi per provinsi mengikuti proporsi epi2_ukuran.xlsx kalau ada,
+lalu dipecah ke unit di bawahnya pakai Dirichlet; rate TBC ~ gamma
+(median ~300 per 100.000, ekor kanan panjang seperti data asli).
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tbc.hierarchy import PROV_CODE
+
+ROOT = Path(__file__).resolve().parents[1]
+
+SCALES = {"provinsi": 38, "kabkota": 514, "kecamatan": 5000}
+UMUR = [f"{a}-{a + 4}" for a in range(0, 80, 5)] + ["80+"]
+JK = ["L", "P"]
+BBOX = (95.0, 141.0, -11.0, 6.0)      # lon_min, lon_max, lat_min, lat_max
+INDONESIA_POP = 281_600_000
+
+
+def _prov_shares() -> pd.Series:
+    names = list(PROV_CODE)
+    shares = pd.Series(1.0 / len(names), index=names)
+    path = ROOT / "epi2_ukuran.xlsx"
+    if path.exists():
+        from tbc.geo import clean_prov
+        from tbc.schema import normalize
+
+        df, _ = normalize(pd.read_excel(path), "epi2")
+        pop = df.assign(p=df["provinsi"].map(clean_prov)).groupby("p")["populasi"].sum()
+        # provinsi pemekaran Papua (tidak ada di file 34 prov): pakai populasi terkecil
+        shares = pop.reindex(names).fillna(pop.min()).astype("float64")
+    return shares / shares.sum()
+
+
+def synth_units(n: int, seed: int = 0) -> pd.DataFrame:
+    """Tabel unit (provinsi/kab/kec) dengan populasi, kasus, kepadatan, dan X1..X5."""
+    rng = np.random.default_rng(seed)
+    shares = _prov_shares()
+    names = shares.index.to_numpy()
+
+    if n <= len(names):
+        prov = names[:n]
+        pop = INDONESIA_POP * shares.to_numpy()[:n]
+        unit = prov
+    else:
+        # tiap provinsi minimal 1 unit, sisanya proporsional populasi
+        k = 1 + rng.multinomial(n - len(names), shares.to_numpy())
+        prov = np.repeat(names, k)
+        pop = np.concatenate([
+            INDONESIA_POP * s * rng.dirichlet(np.full(c, 2.0)) for s, c in zip(shares.to_numpy(), k)
+        ])
+        unit = np.array([f"{p} #{i}" for p, c in zip(names, k) for i in range(1, c + 1)])
+
+    pop = np.maximum(np.round(pop), 1000)
+    rate = rng.gamma(shape=2.5, scale=130.0, size=len(pop))                 # per 100k
+    cases = rng.poisson(pop * rate / 100000).astype("float64")
+    kepadatan = np.round(rng.lognormal(mean=5.0, sigma=1.4, size=len(pop)).clip(1, 20000))   # ekor seperti DKI (~16 rb)
+
+    code = np.array([PROV_CODE[p] for p in prov], dtype="int32")
+    seq = pd.Series(code).groupby(code).cumcount().to_numpy() + 1
+
+    # kab/kota: PPKK, kecamatan ke atas: PPKKKK (supaya kode tetap unik)
+    mult = 1 if n <= len(names) else (100 if seq.max() < 100 else 10000)
+    return pd.DataFrame({
+        "kode": code * mult + (seq if mult > 1 else 0),
+        "provinsi": prov,
+        "unit": unit,
+        "populasi": pop,
+        "jumlah_tbc": cases,
+        "kepadatan": kepadatan,
+        "x1": np.round(rng.normal(15, 3, len(pop)).clip(3, 35), 2),
+        "x2": np.round(rng.gamma(3.0, 3.5, len(pop)).clip(1, 45), 2),
+        "x3": np.round(rng.normal(80, 8, len(pop)).clip(30, 100), 2),
+        "x4": kepadatan,
+        "x5": np.round(rng.normal(88, 5, len(pop)).clip(50, 100), 2),
+    })
+
+
+def epi2_frame(units: pd.DataFrame) -> pd.DataFrame:
+    """Bentuk kolom seperti epi2_ukuran.xlsx (header "kotor" sengaja dipertahankan)."""
+    return pd.DataFrame({
+        "Provinsii ": units["unit"],
+        "populasi": units["populasi"],
+        "jumlah_TBC": units["jumlah_tbc"],
+        "kepadatan": units["kepadatan"],
+        "kelompok_kep": np.where(units["kepadatan"] >= units["kepadatan"].median(), "High", "Low"),
+    })
+
+
+def model_frame(units: pd.DataFrame) -> pd.DataFrame:
+    """Bentuk kolom seperti epi1_modeling.xlsx."""
+    return pd.DataFrame({
+        "Provinsi": units["unit"],
+        "Y": units["jumlah_tbc"],
+        **{f"X{i}": units[f"x{i}"] for i in range(1, 6)},
+    })
+
+
+def synth_geojson(units: pd.DataFrame, n_vertex: int = 48, seed: int = 0) -> dict:
+    """Poligon sintetis (lingkaran bergerigi) di grid bbox Indonesia, satu per unit."""
+    rng = np.random.default_rng(seed)
+    n = len(units)
+    cols = int(np.ceil(np.sqrt(n * 2.7)))
+    rows = int(np.ceil(n / cols))
+    lon0, lon1, lat0, lat1 = BBOX
+    dx, dy = (lon1 - lon0) / cols, (lat1 - lat0) / rows
+    r = 0.45 * min(dx, dy)
+    t = np.linspace(0, 2 * np.pi, n_vertex, endpoint=False)
+
+    feats = []
+    for i, (kode, nama) in enumerate(zip(units["kode"], units["unit"])):
+        cx = lon0 + (i % cols + 0.5) * dx
+        cy = lat0 + (i // cols + 0.5) * dy
+        rr = r * (1 + 0.15 * rng.standard_normal(n_vertex))
+        ring = np.column_stack([cx + rr * np.cos(t), cy + rr * np.sin(t)])
+        ring = np.vstack([ring, ring[:1]]).round(6).tolist()
+        feats.append({
+            "type": "Feature",
+            "properties": {"KODE_KAB": int(kode), "state": str(nama)},
+            "geometry": {"type": "Polygon", "coordinates": [ring]},
+        })
+    return {"type": "FeatureCollection", "features": feats}
+
+
+def synth_linelist(n: int, years=range(2015, 2025), seed: int = 0) -> pd.DataFrame:
+    """
+    Line-list kasus (1 baris = 1 notifikasi) + tabel penyebut populasi,
+    siap digabung ke build_cube. Dtype kecil supaya 10 juta baris muat di RAM.
+    """
+    rng = np.random.default_rng(seed)
+    shares = _prov_shares()
+    years = np.asarray(list(years), dtype="int16")
+
+    cases = pd.DataFrame({
+        "provinsi": pd.Categorical.from_codes(rng.choice(len(shares), n, p=shares.to_numpy()), shares.index),
+        "tahun": rng.choice(years, n),
+        "umur": pd.Categorical.from_codes(rng.integers(0, len(UMUR), n, dtype="int8"), UMUR),
+        "jk": pd.Categorical.from_codes(rng.integers(0, 2, n, dtype="int8"), JK),
+        "populasi": np.zeros(n, dtype="float32"),
+        "jumlah_tbc": np.ones(n, dtype="float32"),
+    })
+
+    grid = pd.MultiIndex.from_product([shares.index, years, UMUR, JK], names=["provinsi", "tahun", "umur", "jk"])
+    denom = grid.to_frame(index=False)
+    for c in ["provinsi", "umur", "jk"]:
+        denom[c] = pd.Categorical(denom[c], categories=cases[c].cat.categories)
+    # populasi provinsi dibagi rata ke sel umur × jk (tiap tahun penuh)
+    denom["populasi"] = np.repeat(INDONESIA_POP * shares.to_numpy() / (len(UMUR) * len(JK)), len(years) * len(UMUR) * len(JK)).astype("float32")
+    denom["jumlah_tbc"] = np.float32(0)
+    return pd.concat([cases, denom], ignore_index=True)
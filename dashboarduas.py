@@ -2,61 +2,49 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from pathlib import Path
-import json
+import os
+import warnings
 from pathlib import Path
 
+from tbc.classify import classify, class_labels, METHODS
+from tbc.geo import (
+    load_geo_prepared, build_frames, feature_keys, key_positions, selection_mask,
+    palette_for, color_index, svg_geometry, centroid_lookup, clean_prov, NODATA_COLOR,
+    step_legend, FrameAnimator, small_multiples_html,
+)
+from tbc import perf
+from tbc.bym import BYM, connect_graph, polygon_adjacency
+from tbc.gwr import GWNB, global_aicc
+from tbc.fmt import fmt_int, fmt_float, fmt_p, fmt_int_col, fmt_float_col, fmt_p_col
+from tbc.collinear import collinearity
+from tbc.compare import compare_counts, start_values
+from tbc.cube import build_cube
+from tbc.cv import NBCrossValidator
+from tbc.design import build_design
+from tbc.influence import nb_influence
+from tbc.hierarchy import build_levels, load_kab_geo, simplify_geo, feature_prov
+from tbc.mh import cube_strata, mantel_haenszel, strata_dims
+from tbc.predict import NBPredictor
+from tbc.resample import bootstrap_overdispersion, permutation_pvalues
+from tbc.schema import SCHEMAS, normalize, fingerprint
+from tbc.table import RankIndex, n_pages
+from tbc.tiles import start_server
+from tbc.validation import validate_cached
+
 
 BASE_DIR = Path(__file__).resolve().parent
 PATH_EPI2 = BASE_DIR / "epi2_ukuran.xlsx"
 
 
+def read_excel(path):
+    with perf.span("pd.read_excel"):
+        return pd.read_excel(path)
 
-@st.cache_data(show_spinner=False)
-def load_data(path):
-    df = pd.read_excel(path)
-
-    # ==== BERSIHKAN NAMA KOLOM ====
-    df.columns = (
-        df.columns
-        .astype(str)
-        .str.strip()
-        .str.lower()
-    )
-
-    # ==== RENAME KE NAMA STANDAR ====
-    rename_map = {
-        "provinsii": "provinsi",
-        "provinsi": "provinsi",
-
-        "jumlah_tbc": "jumlah_tbc",
-        "jumlah tbc": "jumlah_tbc",
-        "jumlah_kasus_tbc": "jumlah_tbc",
-
-        "kepadatan": "kepadatan",
-        "kepadatan penduduk": "kepadatan",
-
-        "kelompok_kep": "kelompok_kep",
-        "kelompok kep": "kelompok_kep",
-        "kelompok_kepadatan": "kelompok_kep",
-    }
-    df = df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns})
-
-    # ==== VALIDASI KOLOM WAJIB ====
-    required_cols = ["provinsi", "populasi", "jumlah_tbc"]
-    missing = [c for c in required_cols if c not in df.columns]
-    if missing:
-        raise ValueError(
-            f"Kolom wajib tidak ditemukan: {missing}. "
-            f"Kolom terbaca: {list(df.columns)}"
-        )
-
-    # ==== KONVERSI NUMERIK ====
-    for c in ["populasi", "jumlah_tbc", "kepadatan"]:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
 
-    # ==== BERSIHKAN NAMA PROVINSI ====
-    df["provinsi"] = df["provinsi"].astype(str).str.strip()
+@perf.cached(st.cache_data(show_spinner=False))
+def load_data(path):
+    # ==== NAMA KOLOM, TIPE, RENTANG: lihat SCHEMAS["epi2"] di tbc/schema.py ====
+    df, _ = normalize(read_excel(path), "epi2")
 
     # ==== NON-TBC (UNTUK PR / POR) ====
     df["non_tbc"] = df["populasi"] - df["jumlah_tbc"]
@@ -72,48 +60,334 @@ epi2 = load_data(PATH_EPI2)
 
 BASE_DIR = Path(__file__).resolve().parent
 PATH_EPI1 = BASE_DIR / "epi1_modeling.xlsx"   # pastikan file ada di repo
-@st.cache_data(show_spinner=False)
+@perf.cached(st.cache_data(show_spinner=False))
 def load_epi1_model(path):
-    df = pd.read_excel(path)
-
-    # bersihin nama kolom
-    df.columns = df.columns.astype(str).str.strip()
-
-    # rename ke standar (tahan variasi)
-    rename_map = {
-        "Provinsi": "provinsi",
-        "provinsii": "provinsi",
-        "Provinsii": "provinsi",
-        "provinsi": "provinsi",
-
-        "Y": "y", "y": "y",
-        "X1": "x1", "x1": "x1",
-        "X2": "x2", "x2": "x2",
-        "X3": "x3", "x3": "x3",
-        "X4": "x4", "x4": "x4",
-        "X5": "x5", "x5": "x5",
-    }
-    df = df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns})
+    # rename + numeric + drop NA sekaligus (SCHEMAS["model"])
+    df, _ = normalize(read_excel(path), "model")
+    return df
+
 
-    # validasi kolom wajib
-    required = ["provinsi", "y", "x1", "x2", "x3", "x4", "x5"]
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        raise ValueError(f"Kolom wajib tidak ditemukan: {missing}. Kolom terbaca: {list(df.columns)}")
+@perf.cached(st.cache_data(show_spinner=False))
+def model_join(model_path, epi2_path):
+    # model (y, X1–X5) + populasi epi2 (tahun terakhir) lewat key provinsi ternormalisasi, sekali per file
+    mdf = load_epi1_model(model_path).copy()
+    pop = load_data(epi2_path)
+    if "tahun" in pop.columns and pop["tahun"].nunique() > 1:
+        pop = pop[pop["tahun"] == pop["tahun"].max()]
+    pop = pop.groupby(pop["provinsi"].map(clean_prov))["populasi"].sum()
+    mdf["prov_clean"] = mdf["provinsi"].map(clean_prov)
+    mdf["populasi"] = mdf["prov_clean"].map(pop)
+    mdf["log_pop"] = np.log(mdf["populasi"])
+    return mdf
 
-    # numeric
-    for c in ["y", "x1", "x2", "x3", "x4", "x5"]:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
 
-    # bersihin provinsi
-    df["provinsi"] = df["provinsi"].astype(str).str.strip()
+MODEL_FORMULA = "y ~ x1 + x2 + x3 + x4 + x5"
 
-    # drop NA
-    df = df.dropna(subset=["y", "x1", "x2", "x3", "x4", "x5"]).copy()
 
+@perf.cached(st.cache_resource(show_spinner=False))
+def model_design(fp, formula, _df):
+    # formula dikompilasi sekali per isi data -> array float64 + nama kolom (varian standar/center ikut di-cache)
+    with perf.span("build_design"):
+        return build_design(_df, formula)
+
+
+@perf.cached(st.cache_resource(show_spinner=False))
+def count_models(fp, formula, offset_col, _df):
+    # satu design matrix per (data, formula) dipakai Poisson, NB-MLE, dan NB-GLM; fit sekali per (formula, offset)
+    import statsmodels.api as sm
+
+    design = model_design(fp, formula, _df)
+    y, X = design.frames()
+    off = None if offset_col is None else design.column(_df, offset_col)
+
+    with perf.span("sm.GLM:poisson"):
+        pois = sm.GLM(y, X, family=sm.families.Poisson(), offset=off).fit()
+    # NB-MLE di design terstandar (seperti tbc.compare): di skala asli kolom beda skala jauh dan
+    # optimizer berhenti di titik palsu (α terlalu besar) tanpa konvergen. Mulai dari β Poisson + α momen.
+    std = design.standardized()
+    Xs = pd.DataFrame(std["X"], index=design.rows, columns=design.names, copy=False)
+    start = start_values(design.y, pois.fittedvalues.to_numpy(), np.linalg.solve(std["T"], pois.params.to_numpy()))["nb2"]
+    with perf.span("sm.NegativeBinomial.fit"):
+        nb_mle = None
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            for method in ("newton", "bfgs", "nm"):
+                try:
+                    res = sm.NegativeBinomial(y, Xs, offset=off).fit(start_params=start, method=method, maxiter=5000, disp=False)
+                except Exception:
+                    continue
+                if np.isfinite(res.llf) and (nb_mle is None or res.llf > nb_mle.llf + 1e-8):
+                    nb_mle = res
+                if nb_mle is not None and nb_mle.mle_retvals.get("converged", False):
+                    break
+    if nb_mle is None:
+        raise RuntimeError("NB-MLE gagal di semua optimizer")
+    converged = bool(nb_mle.mle_retvals.get("converged", False))
+    if not converged:
+        warnings.warn(f"NB-MLE tidak konvergen (llf {nb_mle.llf:.2f}); α dan β bisa belum optimum", RuntimeWarning)
+    alpha_hat = float(nb_mle.params["alpha"])
+    beta_hat = std["T"] @ nb_mle.params.to_numpy()[:-1]           # β_asli = T β_std
+    with perf.span("sm.GLM:nb"):
+        nb_glm = sm.GLM(y, X, family=sm.families.NegativeBinomial(alpha=alpha_hat), offset=off).fit(start_params=beta_hat)
+    # diagnostik pengaruh semua provinsi dari satu QR design berbobot (ikut cache fit)
+    with perf.span("nb_influence"):
+        infl = nb_influence(design.y, design.X, nb_glm.fittedvalues.to_numpy(), alpha_hat, design.names)
+    return {"pois": pois, "nb_mle": nb_mle, "alpha": alpha_hat, "converged": converged,
+            "nb_glm": nb_glm, "design": design, "influence": infl}
+
+
+PATH_GEO = BASE_DIR / "indonesia.geojson"
+
+# opsional: data & peta tingkat kab/kota (kalau file ada, Peta bisa pindah level)
+PATH_KAB = BASE_DIR / "epi2_kabkota.xlsx"
+PATH_GEO_KAB = BASE_DIR / "indonesia_kabkota.geojson"
+
+# opsional: basemap offline (python -m tbc.tiles build --out indonesia.tiles)
+PATH_TILES = BASE_DIR / "indonesia.tiles"
+TILE_PORT = int(os.environ.get("TBC_TILE_PORT", "8765"))
+# default loopback; set TBC_TILE_HOST=0.0.0.0 kalau browser mengakses app dari mesin lain
+TILE_HOST = os.environ.get("TBC_TILE_HOST", "127.0.0.1")
+
+@perf.cached(st.cache_data(show_spinner=False))
+def load_geo(path, tol=0.0):
+    return simplify_geo(load_geo_prepared(path), tol)
+
+
+@perf.cached(st.cache_data(show_spinner=False))
+def load_geo_kab(path, tol=0.0):
+    return simplify_geo(load_kab_geo(path), tol)
+
+
+@perf.cached(st.cache_data(show_spinner=False))
+def load_kab(path):
+    df, _ = normalize(read_excel(path), "kabkota")
     return df
 
 
+@perf.cached(st.cache_data(show_spinner=False))
+def kab_levels(path):
+    # hierarki kab/kota -> provinsi -> nasional, rollup sekali per file
+    return build_levels(load_kab(path))
+
+
+def file_sig(path):
+    # (mtime, size): file berubah -> cache diagnostik ikut invalid
+    stat = Path(path).stat()
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+@perf.cached(st.cache_data(show_spinner=False))
+def data_quality(path, kind, sig):
+    df, schema_rep = normalize(read_excel(path), kind, drop_missing=False)
+    geo_keys = feature_keys(load_geo(PATH_GEO)) if kind != "kabkota" else None
+    return schema_rep, validate_cached(df, kind, geo_keys)
+
+
+@perf.cached(st.cache_resource(show_spinner=False))
+def get_cube(path):
+    # satu kubus per file, dibagi semua sesi (read-only, tidak di-copy tiap rerun)
+    return build_cube(load_data(path))
+
+
+@perf.cached(st.cache_resource(show_spinner=False))
+def prov_positions(fp, _names):
+    # key provinsi -> posisi baris; filter klik peta = indexing, bukan copy + groupby
+    return key_positions(_names)
+
+
+@perf.cached(st.cache_resource(show_spinner=False))
+def rank_index(fp, _tbl, text_col="provinsi"):
+    # argsort per kolom sekali per isi tabel (fp = fingerprint data), dibagi semua sesi
+    return RankIndex(_tbl, text_col)
+
+
+@perf.cached(st.cache_resource(show_spinner=False))
+def tile_archive(path):
+    # satu server tile per proses; None -> arsip belum ada / port terpakai, pakai CDN
+    if not Path(path).exists():
+        return None
+    try:
+        _, archive = start_server(path, host=TILE_HOST, port=TILE_PORT)
+    except OSError:
+        return None
+    return archive
+
+
+def tile_url():
+    # browser harus bisa menjangkau server tile: host yang sama dengan app, kecuali di-override (proxy/https)
+    if os.environ.get("TBC_TILE_URL"):
+        return os.environ["TBC_TILE_URL"]
+    host = (st.context.headers.get("Host") or "localhost").split(":")[0]
+    return f"http://{host}:{TILE_PORT}/tiles/{{z}}/{{x}}/{{y}}.png"
+
+
+def base_map():
+    import folium
+
+    archive = tile_archive(PATH_TILES)
+    if archive is None:
+        return folium.Map(location=[-2.5, 118.0], zoom_start=5, tiles="cartodbpositron")
+
+    m = folium.Map(location=[-2.5, 118.0], zoom_start=5, tiles=None, min_zoom=archive.meta["minzoom"])
+    folium.TileLayer(
+        tiles=tile_url(),
+        attr=archive.meta["attribution"],
+        name="Basemap (lokal)",
+        min_native_zoom=archive.meta["minzoom"],
+        max_native_zoom=archive.meta["maxzoom"],   # zoom lebih dalam: tile z9 diperbesar
+        max_zoom=18,
+    ).add_to(m)
+    return m
+
+
+@perf.cached(st.cache_data(show_spinner=False))
+def class_breaks(metric, fp, method, _values):
+    # batas kelas sekali per (metrik, isi data, metode); warna, legenda & tooltip pakai array yang sama
+    return classify(_values, method)
+
+
+@perf.cached(st.cache_data(show_spinner=False))
+def frame_colors(df, keys, value_col, bins):
+    # warna per tahun dihitung sekali per (data, metrik, kelas), bukan per rerun
+    return build_frames(df, list(keys), value_col, bins=bins, palette=palette_for(len(bins) - 1))
+
+
+SM_VARS = ("rate_100k", "x1", "x2", "x3", "x4", "x5")
+SM_TITLES = {"rate_100k": "Rate TBC per 100.000", **{c: SCHEMAS["model"][c].label for c in SM_VARS[1:]}}
+
+
+@perf.cached(st.cache_data(show_spinner=False))
+def svg_shape(path, tol=0.0):
+    # geometri small multiples diproyeksikan ke path SVG sekali per (file, resolusi)
+    geo = load_geo(path, tol)
+    return svg_geometry(geo, name_prop=geo["name_key"])
+
+
+@perf.cached(st.cache_data(show_spinner=False))
+def sm_panel(var, fp, method, _values, title=None, d=1):
+    # satu panel = warna + teks nilai per feature; geometri tidak ikut
+    bins = class_breaks(f"sm:{var}", fp, method, _values)
+    palette = palette_for(len(bins) - 1)
+    pal = np.array(palette + [NODATA_COLOR])
+    return {
+        "title": title or SM_TITLES[var],
+        "colors": pal[color_index(_values, bins)].tolist(),
+        "values": fmt_float_col(_values, d).tolist(),
+        "bins_txt": class_labels(bins, d),
+        "palette": palette,
+    }
+
+
+@perf.cached(st.cache_data(show_spinner="Fit BYM (aproksimasi Laplace)..."))
+def bym_model(fp, _df, geo_path, covariates=()):
+    # graf ketetanggaan dari geometri asli (tanpa simplifikasi), pulau disambung ke tetangga terdekat
+    import scipy.sparse as sparse
+
+    geo = load_geo(geo_path)
+    pos = {k: i for i, k in enumerate(feature_keys(geo))}
+    keys = _df["prov_clean"].to_numpy()
+    idx = np.array([pos.get(k, -1) for k in keys])
+    has = np.flatnonzero(idx >= 0)
+    P = sparse.csr_matrix((np.ones(len(has)), (has, idx[has])), shape=(len(keys), len(pos)))
+    W_poly = P @ polygon_adjacency(geo) @ P.T
+    lookup = centroid_lookup(geo)
+    W = connect_graph(W_poly, np.array([lookup.get(k, (np.nan, np.nan)) for k in keys]))
+
+    y = _df["jumlah_tbc"].to_numpy(dtype="float64")
+    pop = _df["populasi"].to_numpy(dtype="float64")
+    E = pop * y.sum() / pop.sum()                                  # kasus harapan (standarisasi internal)
+    X = _df[list(covariates)].to_numpy(dtype="float64") if covariates else None
+    return {
+        "res": BYM(y, E, W, X, names=list(covariates)).fit(),
+        "prov_clean": keys,
+        "n_edges": int(W.nnz // 2),
+        "n_linked": int((W.nnz - W_poly.nnz) // 2),
+    }
+
+
+@perf.cached(st.cache_data(show_spinner="Validasi silang NB..."))
+def nb_cv(fp, offset_col, k, mode, _df):
+    # CV dari design & β/α cache count_models; mode onestep = tanpa refit (milidetik)
+    fits = count_models(fp, MODEL_FORMULA, offset_col, _df)
+    design = fits["design"]
+    cv = NBCrossValidator(
+        design.y, design.X, fits["alpha"], fits["nb_glm"].params.to_numpy(),
+        offset=None if offset_col is None else design.column(_df, offset_col),
+    )
+    with perf.span(f"cv:{mode}"):
+        return cv.run(k, mode)
+
+
+@perf.cached(st.cache_data(show_spinner="Membandingkan model cacah..."))
+def count_comparison(fp, offset_col, _df):
+    # Poisson/NB1/NB2/GP (+ ZI/hurdle kalau ada Y = 0); nilai awal dari fit Poisson cache count_models
+    fits = count_models(fp, MODEL_FORMULA, offset_col, _df)
+    design, pois = fits["design"], fits["pois"]
+    std = design.standardized()
+    with perf.span("compare_counts"):
+        return compare_counts(
+            design.y, std["X"], pois.params.to_numpy(), pois.fittedvalues.to_numpy(),
+            offset=None if offset_col is None else design.column(_df, offset_col), T=std["T"],
+        )
+
+
+@perf.cached(st.cache_data(show_spinner="Bootstrap & permutasi (IRLS batch)..."))
+def resampling_tests(fp, offset_col, B, seed, _df):
+    # bootstrap parametrik overdispersi (H0 Poisson) + p permutasi Freedman-Lane koefisien NB2 (α tetap), seed reproducible
+    fits = count_models(fp, MODEL_FORMULA, offset_col, _df)
+    design, pois, nb = fits["design"], fits["pois"], fits["nb_glm"]
+    off = None if offset_col is None else design.column(_df, offset_col)
+    with perf.span("bootstrap_overdispersion"):
+        boot = bootstrap_overdispersion(design.y, design.X, pois.fittedvalues.to_numpy(), pois.params.to_numpy(),
+                                        offset=off, B=B, seed=seed)
+    with perf.span("permutation_pvalues"):
+        perm = permutation_pvalues(design.y, design.X, fits["alpha"], nb.params.to_numpy(), design.names,
+                                   offset=off, B=B, seed=seed)
+    return {"boot": boot, "perm": perm}
+
+
+@perf.cached(st.cache_data(show_spinner=False))
+def collinearity_panel(fp, cols, _df):
+    # VIF (diag R⁻¹), indeks kondisi & proporsi varians dari satu SVD; cache per isi data + set kovariat
+    with perf.span("collinearity"):
+        return collinearity(_df[list(cols)].to_numpy(dtype="float64"), list(cols))
+
+
+@perf.cached(st.cache_resource(show_spinner=False))
+def nb_predictor(fp, offset_col, _df):
+    # draw β ~ N(β̂, V) & Gamma NB dibuat sekali per fit; slider what-if hanya matmul + Poisson batch
+    fits = count_models(fp, MODEL_FORMULA, offset_col, _df)
+    nb = fits["nb_glm"]
+    return NBPredictor(nb.params.to_numpy(), nb.cov_params().to_numpy(), fits["alpha"], fits["design"].n)
+
+
+@perf.cached(st.cache_data(show_spinner="Fit GWR-NB (pencarian bandwidth AICc)..."))
+def gwnb_model(fp, _df, geo_path, offset_col=None):
+    # GWR-NB sekali per isi data model; dipakai Model (tabel) & Peta (peta IRR lokal)
+    fits = count_models(fp, MODEL_FORMULA, offset_col, _df)       # α, warm start & design dari NB global yang sama
+    alpha, glob, design = fits["alpha"], fits["nb_glm"], fits["design"]
+    off = None if offset_col is None else design.column(_df, offset_col)
+    sub = _df.loc[design.rows]
+
+    keys = sub["provinsi"].map(clean_prov)
+    lookup = centroid_lookup(load_geo(geo_path))
+    coords = np.array([lookup.get(k, (np.nan, np.nan)) for k in keys])
+    ok = np.isfinite(coords).all(axis=1)
+
+    res = GWNB(
+        design.y[ok], design.covariates[ok], coords[ok], alpha,
+        names=design.names[1:], beta0=glob.params.to_numpy(),     # warm start dari NB global
+        offset=None if off is None else off[ok],
+    ).fit()
+    return {
+        "res": res,
+        "provinsi": sub["provinsi"].to_numpy()[ok],
+        "prov_clean": keys.to_numpy()[ok],
+        "aicc_global": global_aicc(design.y, glob.fittedvalues.to_numpy(), alpha, design.X.shape[1]),
+        "n_drop": int((~ok).sum()),
+    }
+
+
 
 # =========================
 # CONFIG (WAJIB PALING ATAS)
@@ -124,15 +398,36 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+cube = get_cube(PATH_EPI2)
+# kalau data multi-tahun, Home & Epi pakai tahun terakhir
+cube_where = {} if cube.latest() is None else {"tahun": cube.latest()}
+cube_pos = prov_positions(fingerprint(pd.DataFrame({"provinsi": cube.provinces})), cube.provinces)
+
 # =========================
 # STATE
 # =========================
 if "page" not in st.session_state:
-    st.session_state.page = "Home"
+    # halaman tersembunyi: buka dengan ?page=diagnostik
+    st.session_state.page = "Diagnostik" if st.query_params.get("page") == "diagnostik" else "Home"
+
+if "sel_prov" not in st.session_state:
+    # seleksi provinsi dari klik peta (key clean_prov), dipakai semua halaman
+    st.session_state.sel_prov = []
 
 def go(page_name: str):
     st.session_state.page = page_name
 
+def clear_sel():
+    st.session_state.sel_prov = []
+
+def on_map_click():
+    # callback st_folium (jalan sebelum rerun): klik provinsi -> toggle di seleksi
+    feat = (st.session_state.get("peta_map") or {}).get("last_active_drawing")
+    key = feature_prov(feat.get("properties", {})) if feat else None
+    if key:
+        sel = st.session_state.sel_prov
+        st.session_state.sel_prov = [p for p in sel if p != key] if key in sel else sel + [key]
+
 # =========================
 # CLEAN UI CSS (LIGHT GRAY BG + BLACK TEXT + FIX LAYOUT)
 # =========================
@@ -281,6 +576,21 @@ with c5:
 
 st.write("")
 
+# =========================
+# FILTER DARI PETA (klik provinsi -> semua halaman)
+# =========================
+sel_prov = st.session_state.sel_prov
+sel_mask = selection_mask(cube_pos, len(cube.provinces), sel_prov)
+if sel_mask is not None and not sel_mask.any():
+    sel_mask = None     # provinsi terpilih tidak ada di data epi2 (mis. pemekaran Papua) -> tampilkan semua
+if sel_prov:
+    f1, f2 = st.columns([5, 1], gap="small")
+    with f1:
+        note = "" if sel_mask is not None else " — tidak ada di data provinsi, menampilkan semua"
+        st.caption(f"Filter peta aktif ({len(sel_prov)} provinsi): {', '.join(p.title() for p in sel_prov)}{note}")
+    with f2:
+        st.button("Hapus filter", on_click=clear_sel, use_container_width=True)
+
 
 
 
@@ -288,19 +598,31 @@ st.write("")
 # PAGES (UI ONLY / PLACEHOLDER)
 # =========================
 page = st.session_state.page
+page_span = perf.start(f"page:{page}")
+
+
+def stop_page():
+    # st.stop() melempar StopException -> span halaman ditutup dulu supaya tetap tercatat
+    perf.stop(page_span)
+    st.stop()
+
 
 if page == "Home":
 
-    df = epi2.dropna(subset=["provinsi", "populasi", "jumlah_tbc"]).copy()
+    # ringkasan dari kubus (query terindeks, bukan groupby ulang tiap rerun)
+    kasus_prov = cube.query("jumlah_tbc", by=("provinsi",), **cube_where)
+    home_prov = cube.provinces
+    if sel_mask is not None:
+        kasus_prov, home_prov = kasus_prov[sel_mask], home_prov[sel_mask]
+    scope = "" if sel_mask is None else f" — {len(home_prov)} provinsi terpilih"
 
-    total_kasus = int(df["jumlah_tbc"].sum())
-    rata_kasus  = int(df["jumlah_tbc"].mean())
-    median_kasus = int(df["jumlah_tbc"].median())
+    total_kasus = int(kasus_prov.sum())
+    rata_kasus  = int(kasus_prov.mean())
+    median_kasus = int(np.median(kasus_prov))
 
-    min_kasus = int(df["jumlah_tbc"].min())
-    max_kasus = int(df["jumlah_tbc"].max())
+    min_kasus = int(kasus_prov.min())
+    max_kasus = int(kasus_prov.max())
 
-    fmt = lambda x: f"{x:,}".replace(",", ".")
 
     left, right = st.columns([1.4, 1], gap="large")
 
@@ -327,9 +649,9 @@ if page == "Home":
         st.markdown(
             f"""
             <div class="card">
-              <div class="muted">Total Kasus TBC (2024)</div>
+              <div class="muted">Total Kasus TBC (2024){scope}</div>
               <div style="font-size:42px;font-weight:800;line-height:1.1;">
-                {fmt(total_kasus)}
+                {fmt_int(total_kasus)}
               </div>
             </div>
             """,
@@ -346,7 +668,7 @@ if page == "Home":
                 <div class="card">
                   <div class="muted">Rata-rata Kasus per Provinsi</div>
                   <div style="font-size:32px;font-weight:700;">
-                    {fmt(rata_kasus)}
+                    {fmt_int(rata_kasus)}
                   </div>
                 </div>
                 """,
@@ -359,7 +681,7 @@ if page == "Home":
                 <div class="card">
                   <div class="muted">Median Kasus</div>
                   <div style="font-size:32px;font-weight:700;">
-                    {fmt(median_kasus)}
+                    {fmt_int(median_kasus)}
                   </div>
                 </div>
                 """,
@@ -372,7 +694,7 @@ if page == "Home":
                 <div class="card">
                   <div class="muted">Rentang Kasus</div>
                   <div style="font-size:26px;font-weight:700;">
-                    {fmt(min_kasus)} – {fmt(max_kasus)}
+                    {fmt_int(min_kasus)} – {fmt_int(max_kasus)}
                   </div>
                 </div>
                 """,
@@ -382,11 +704,8 @@ if page == "Home":
         st.write("")
 
         # ---- Top 10 chart (lebih elegan)
-        top10 = (
-            df.sort_values("jumlah_tbc", ascending=False)
-              .head(10)
-              .sort_values("jumlah_tbc")
-        )
+        order = np.argsort(-kasus_prov, kind="stable")[:10][::-1]
+        top10 = pd.Series(kasus_prov[order], index=pd.Index(home_prov[order], name="provinsi"), name="jumlah_tbc")
 
         st.markdown(
             """
@@ -400,7 +719,7 @@ if page == "Home":
         )
 
         st.bar_chart(
-            top10.set_index("provinsi")["jumlah_tbc"],
+            top10,
             height=360
         )
 
@@ -434,153 +753,352 @@ if page == "Home":
 
     pass
 
-elif page == "Peta Sebaran":
-    import json
-    import numpy as np
-    import pandas as pd
+elif page == "Peta":
     import folium
     from streamlit_folium import st_folium
+    from tbc.hierarchy import RESOLUTIONS
+
+    mode = st.radio("Tampilan", ["Peta interaktif", "Small multiples (Rate & X1–X5)"], horizontal=True)
+
+    if mode.startswith("Small multiples"):
+        # =========================
+        # SMALL MULTIPLES: geometri SVG sekali, tiap panel hanya array warna (dari cache)
+        # =========================
+        s1, s2, s3 = st.columns([2, 1, 1], gap="small")
+        with s1:
+            source = st.radio("Panel", ["Data (Rate & X1–X5)", "IRR lokal GWR-NB (X1–X5)"], horizontal=True)
+        with s2:
+            res = st.selectbox("Detail geometri", list(RESOLUTIONS), index=2)
+        with s3:
+            method = st.selectbox("Klasifikasi", list(METHODS), index=0)
+
+        try:
+            shape = svg_shape(PATH_GEO, RESOLUTIONS[res])
+            mdf = model_join(PATH_EPI1, PATH_EPI2)
+        except Exception as e:
+            st.error(f"Gagal load data/peta: {e}")
+            stop_page()
+
+        if source.startswith("IRR"):
+            # koefisien lokal dari cache yang sama dengan halaman Model
+            gw = gwnb_model(fingerprint(mdf), mdf, PATH_GEO)
+            irr = pd.DataFrame(np.exp(gw["res"].params[:, 1:]), columns=list(SM_VARS[1:]), index=gw["prov_clean"])
+            wide = irr.groupby(level=0).mean().reindex(shape["keys"])
+            panels = [
+                sm_panel(f"gwnb:{v}", fingerprint(wide[[v]].reset_index()), method, wide[v].to_numpy(dtype="float64"),
+                         title=f"IRR lokal {SM_TITLES[v]}", d=4)
+                for v in SM_VARS[1:]
+            ]
+        else:
+            rate = epi2.dropna(subset=["provinsi", "populasi", "jumlah_tbc"])
+            if "tahun" in rate.columns and rate["tahun"].nunique() > 1:
+                rate = rate[rate["tahun"] == rate["tahun"].max()]
+            # kasus & populasi dijumlah dulu per provinsi (data bisa bertingkat umur × jk), baru dibagi
+            rate = rate.groupby(rate["provinsi"].map(clean_prov))[["jumlah_tbc", "populasi"]].sum()
+            rate = rate["jumlah_tbc"] / rate["populasi"] * 100000
+            wide = mdf.assign(prov_clean=mdf["provinsi"].map(clean_prov)).groupby("prov_clean")[list(SM_VARS[1:])].mean()
+            wide.insert(0, "rate_100k", rate)
+            wide = wide.reindex(shape["keys"])
+
+            panels = [
+                sm_panel(v, fingerprint(wide[[v]].reset_index()), method, wide[v].to_numpy(dtype="float64"))
+                for v in SM_VARS
+            ]
+        st.caption(
+            f"{len(shape['keys'])} provinsi • geometri {len(shape['paths'])} path dikirim sekali, "
+            f"{len(panels)} panel hanya beda warna • arahkan kursor ke provinsi untuk nilai"
+        )
+        st.iframe(small_multiples_html(shape, panels, cols=3), height=int(2 * (shape["height"] * 1.6 + 120)))
 
-    # =========================
-    # 0) LOAD DATA EPI2 (pakai epi2 yang sudah kamu load di atas sebenarnya boleh)
-    # =========================
-    df = epi2.copy()
-
-    # pastikan kolom standar
-    df.columns = df.columns.astype(str).str.strip().str.lower()
-    df = df.rename(columns={"provinsii": "provinsi"})
-    for c in ["populasi", "jumlah_tbc", "kepadatan"]:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
-    df["provinsi"] = df["provinsi"].astype(str).str.strip()
-    df = df.dropna(subset=["provinsi", "populasi", "jumlah_tbc"]).copy()
-
-    df["rate_100k"] = (df["jumlah_tbc"] / df["populasi"]) * 100000
-
-    # =========================
-    # 1) CLEAN NAMA PROVINSI
-    # =========================
-    def clean_prov(s: str) -> str:
-        s = str(s).strip().upper()
-        s = s.replace(".", "").replace(",", "")
-        s = " ".join(s.split())
-        s = s.replace("DI YOGYAKARTA", "DAERAH ISTIMEWA YOGYAKARTA")
-        s = s.replace("KEP BANGKA BELITUNG", "KEPULAUAN BANGKA BELITUNG")
-        s = s.replace("BANGKA BELITUNG", "KEPULAUAN BANGKA BELITUNG")
-        s = s.replace("KEP RIAU", "KEPULAUAN RIAU")
-        return s
-
-    df["prov_clean"] = df["provinsi"].map(clean_prov)
-
-    # =========================
-    # 2) LOAD GEOJSON LOKAL
-    # =========================
-    from pathlib import Path
-
-    BASE_DIR = Path(__file__).resolve().parent
-    GEO_PATH = BASE_DIR / "indonesia.geojson"
-
-    @st.cache_data(show_spinner=False)
-    def load_geojson_local(path: str):
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-
-    geo = load_geojson_local(GEO_PATH)
-
-    # ===== Cari field nama provinsi yang benar (auto) =====
-    # Lihat key apa yang ada di properties feature pertama
-    props0 = geo["features"][0]["properties"]
-    candidate_keys = ["Propinsi", "propinsi", "Provinsi", "provinsi", "NAME_1", "name", "Name", "nama", "NAMA"]
-    name_key = next((k for k in candidate_keys if k in props0), None)
-
-    if name_key is None:
-        st.error(f"Gak nemu kolom nama provinsi di geojson. Keys contoh: {list(props0.keys())[:20]}")
-        st.stop()
-
-    # inject prov_clean ke setiap feature
-    for ft in geo["features"]:
-        raw_name = ft["properties"].get(name_key, "")
-        ft["properties"]["prov_clean"] = clean_prov(raw_name)
-
-    # =========================
-    # 3) DEBUG MATCH (biar tau kalau kosong kenapa)
-    # =========================
-    geo_names = {ft["properties"].get("prov_clean", "") for ft in geo["features"]}
-    df_names = set(df["prov_clean"])
-
-    match_n = len(df_names & geo_names)
-    st.caption(f"Match provinsi: {match_n}/{len(df_names)} (data) vs {len(geo_names)} (peta) | name_key geojson: {name_key}")
-
-    missing_in_geo = sorted(df_names - geo_names)
-    if missing_in_geo:
-        st.warning(f"Tidak ketemu di peta (cek ejaan/format): {missing_in_geo}")
-
-    # =========================
-    # 4) PILIH METRIK
-    # =========================
-    metric = st.selectbox(
-        "Tampilkan peta berdasarkan:",
-        ["Rate/Prevalensi per 100.000", "Jumlah TBC", "Populasi"],
-        index=0
-    )
-
-    if metric == "Rate/Prevalensi per 100.000":
-        value_col = "rate_100k"
-        legend = "TBC per 100.000 penduduk"
-    elif metric == "Jumlah TBC":
-        value_col = "jumlah_tbc"
-        legend = "Jumlah kasus TBC"
     else:
-        value_col = "populasi"
-        legend = "Populasi"
-
-    map_df = df[["prov_clean", "provinsi", "populasi", "jumlah_tbc", "rate_100k"]].copy()
-
-    # =========================
-    # 5) PETA FOLIUM
-    # =========================
-    m = folium.Map(location=[-2.5, 118.0], zoom_start=5, tiles="cartodbpositron")
-
-    folium.Choropleth(
-        geo_data=geo,
-        data=map_df,
-        columns=["prov_clean", value_col],
-        key_on="feature.properties.prov_clean",
-        fill_color="YlOrRd",
-        fill_opacity=0.85,
-        line_opacity=0.35,
-        legend_name=legend,
-        highlight=True
-    ).add_to(m)
+        # =========================
+        # 1) PILIH METRIK + LEVEL WILAYAH
+        # =========================
+        metric = st.selectbox(
+            "Tampilkan peta berdasarkan:",
+            ["Rate/Prevalensi per 100.000", "Jumlah TBC", "Populasi",
+             "Risiko relatif BYM (posterior)", "P(RR > ambang) BYM"],
+            index=0
+        )
 
-    # Tooltip (simple + aman)
-    lookup = map_df.set_index("prov_clean").to_dict(orient="index")
+        if metric == "Rate/Prevalensi per 100.000":
+            value_col = "rate_100k"
+            legend = "TBC per 100.000 penduduk"
+        elif metric == "Jumlah TBC":
+            value_col = "jumlah_tbc"
+            legend = "Jumlah kasus TBC"
+        elif metric == "Populasi":
+            value_col = "populasi"
+            legend = "Populasi"
+        elif metric.startswith("Risiko relatif"):
+            value_col = "rr_bym"
+            legend = "Risiko relatif posterior (BYM)"
+        else:
+            value_col = "p_exceed"
+            legend = "P(RR > ambang) posterior (BYM)"
+        bym_metric = value_col in ("rr_bym", "p_exceed")
+
+        if bym_metric:
+            b1, b2 = st.columns([2, 1], gap="small")
+            with b1:
+                bym_cov = st.checkbox("Kovariat X1–X5 sebagai efek tetap", value=False)
+            with b2:
+                rr_cut = st.select_slider("Ambang RR", [1.0, 1.1, 1.2, 1.5, 2.0], value=1.0)
+
+        has_kab = PATH_KAB.exists() and PATH_GEO_KAB.exists()
+        l1, l2, l3 = st.columns([2, 1, 1], gap="small")
+        with l1:
+            level = st.radio(
+                "Level wilayah",
+                ["Provinsi", "Kabupaten/Kota"] if has_kab and not bym_metric else ["Provinsi"],
+                horizontal=True
+            )
+        with l2:
+            res = st.selectbox("Detail geometri", list(RESOLUTIONS), index=1)
+        with l3:
+            method = st.selectbox(
+                "Klasifikasi", list(METHODS), index=0,
+                help="Jenks/kuantil/head-tail menjaga beberapa wilayah ekstrem tidak membuat sisanya satu warna."
+            )
 
-    for ft in geo["features"]:
-        p = ft["properties"].get("prov_clean", "")
-        row = lookup.get(p)
+        show_infl = level == "Provinsi" and st.checkbox(
+            "Sorot provinsi berpengaruh (Cook's D model NB > 4/n)", value=False,
+            help="Diagnostik dari halaman Model (fit NegBin tanpa offset, cache yang sama)."
+        )
+        if show_infl:
+            mdf = model_join(PATH_EPI1, PATH_EPI2)
+            infl = count_models(fingerprint(mdf), MODEL_FORMULA, None, mdf)["influence"]
+            cooks_by_prov = dict(zip(mdf["prov_clean"], infl.cooks))
+            infl_prov = set(mdf["prov_clean"].to_numpy()[infl.influential()])
+
+        m = base_map()
+
+        if level == "Kabupaten/Kota":
+            # =========================
+            # 2) KAB/KOTA: rollup provinsi & nasional sudah dihitung sekali di cache
+            # =========================
+            try:
+                levels = kab_levels(PATH_KAB)
+                geo_kab = load_geo_kab(PATH_GEO_KAB, RESOLUTIONS[res])
+            except Exception as e:
+                st.error(f"Gagal load data/peta kab/kota: {e}")
+                stop_page()
+
+            kab = levels["kabkota"]
+            nas = levels["nasional"].iloc[0]
+            st.caption(
+                f"{len(kab)} kab/kota • {len(levels['provinsi'])} provinsi • "
+                f"nasional: {fmt_int(nas['jumlah_tbc'])} kasus ({fmt_float(nas['rate_100k'], 1)} per 100.000)"
+            )
 
-        if row:
-            pop_txt = f"{int(row['populasi']):,}".replace(",", ".")
-            tbc_txt = f"{int(row['jumlah_tbc']):,}".replace(",", ".")
-            rate_txt = f"{row['rate_100k']:,.1f}".replace(",", "X").replace(".", ",").replace("X", ".")
+            # warna per kab/kota: satu array, satu layer GeoJson (bukan 1 layer per feature)
+            vals = kab[value_col].to_numpy(dtype="float64")
+            bins = class_breaks(f"kab:{value_col}", fingerprint(kab[["kode", value_col]]), method, vals)
+            palette = palette_for(len(bins) - 1)
+            cls = color_index(vals, bins)
+            labels = np.array(class_labels(bins) + ["-"])
+            pal = np.array(palette + [NODATA_COLOR])
+            color_by_code = dict(zip(kab["kode"].tolist(), pal[cls].tolist()))
+            nama_by_code = dict(zip(kab["kode"].tolist(), kab["nama"].tolist()))
+            nilai_by_code = dict(zip(kab["kode"].tolist(), fmt_float_col(vals, 1).tolist()))
+            kelas_by_code = dict(zip(kab["kode"].tolist(), labels[cls].tolist()))
+
+            for ft in geo_kab["features"]:
+                kode = ft["properties"]["kode_kab"]
+                ft["properties"]["nama_tt"] = nama_by_code.get(kode, str(kode))
+                ft["properties"]["nilai_tt"] = nilai_by_code.get(kode, "-")
+                ft["properties"]["kelas_tt"] = kelas_by_code.get(kode, "-")
+
+            folium.GeoJson(
+                geo_kab,
+                style_function=lambda ft: {
+                    "fillColor": color_by_code.get(ft["properties"]["kode_kab"], NODATA_COLOR),
+                    "fillOpacity": 0.85, "color": "#000000", "weight": 0.5, "opacity": 0.35,
+                },
+                highlight_function=lambda ft: {"weight": 2, "fillOpacity": 1},
+                tooltip=folium.GeoJsonTooltip(fields=["nama_tt", "nilai_tt", "kelas_tt"], aliases=["", legend, "Kelas"], sticky=True),
+            ).add_to(m)
+            step_legend(bins, legend, palette).add_to(m)
+
+            with st.expander("Rollup per provinsi (dari kab/kota)"):
+                st.dataframe(levels["provinsi"], use_container_width=True, hide_index=True)
 
-            tooltip_html = (
-                f"<b>{row['provinsi']}</b><br/>"
-                f"Populasi: {pop_txt}<br/>"
-                f"Jumlah TBC: {tbc_txt}<br/>"
-                f"Rate/100k: {rate_txt}"
+        else:
+            # =========================
+            # 2) DATA EPI2 (sudah bersih dari load_data)
+            # =========================
+            # satu baris per provinsi (× tahun): baris bertingkat umur × jk dijumlah dulu, rate dihitung sesudahnya
+            df = epi2.dropna(subset=["provinsi", "populasi", "jumlah_tbc"])
+            keys = ["prov_clean"] + (["tahun"] if "tahun" in df.columns else [])
+            df = (
+                df.assign(prov_clean=df["provinsi"].map(clean_prov))
+                  .groupby(keys, as_index=False, sort=False)
+                  .agg(provinsi=("provinsi", "first"), populasi=("populasi", "sum"), jumlah_tbc=("jumlah_tbc", "sum"))
             )
+            df["rate_100k"] = (df["jumlah_tbc"] / df["populasi"]) * 100000
+
+            if bym_metric:
+                # =========================
+                # 2b) BYM: RR posterior + P(RR > ambang), satu tahun (terakhir)
+                # =========================
+                if "tahun" in df.columns and df["tahun"].nunique() > 1:
+                    df = df[df["tahun"] == df["tahun"].max()].copy()
+                fit_df = df[["prov_clean", "populasi", "jumlah_tbc"]].reset_index(drop=True)
+                covs = ()
+                if bym_cov:
+                    xs = load_epi1_model(PATH_EPI1).assign(prov_clean=lambda d: d["provinsi"].map(clean_prov))
+                    xs = xs.groupby("prov_clean")[["x1", "x2", "x3", "x4", "x5"]].mean()
+                    fit_df = fit_df.join(xs, on="prov_clean")
+                    if fit_df[xs.columns].isna().any().any():
+                        st.warning("Sebagian provinsi tidak punya X1–X5: BYM dijalankan tanpa kovariat.")
+                        fit_df = fit_df.drop(columns=xs.columns)
+                    else:
+                        covs = tuple(xs.columns)
+
+                bym = bym_model(fingerprint(fit_df), fit_df, PATH_GEO, covs)
+                bres = bym["res"]
+                lo, hi = bres.rr_interval()
+                df["rr_bym"] = bres.rr_mean
+                df["p_exceed"] = bres.exceedance(rr_cut)
+                df["bym_txt"] = [
+                    f"RR BYM: {r} (95% CrI {a}–{b})<br/>P(RR &gt; {fmt_float(rr_cut, 1)}): {p}"
+                    for r, a, b, p in zip(fmt_float_col(bres.rr_mean, 3), fmt_float_col(lo, 3),
+                                          fmt_float_col(hi, 3), fmt_float_col(df["p_exceed"], 3))
+                ]
+                st.caption(
+                    f"BYM {len(df)} provinsi • {bym['n_edges']} sisi ketetanggaan ({bym['n_linked']} sambungan pulau) • "
+                    f"τ_u {fmt_float(bres.tau_u, 1)} • τ_v {fmt_float(bres.tau_v, 1)} • porsi spasial {bres.frac_spatial:.0%} • "
+                    f"{bres.n_factor} faktorisasi sparse" + (" • kovariat X1–X5" if covs else "")
+                )
+
+            # =========================
+            # 3) GEOJSON (prov_clean di-inject sekali di cache)
+            # =========================
+            try:
+                geo = load_geo(PATH_GEO, RESOLUTIONS[res])
+            except Exception as e:
+                st.error(f"Gagal load indonesia.geojson: {e}")
+                stop_page()
+            name_key = geo["name_key"]
+
+            # =========================
+            # 4) DEBUG MATCH (biar tau kalau kosong kenapa)
+            # =========================
+            geo_names = set(feature_keys(geo))
+            df_names = set(df["prov_clean"])
+
+            match_n = len(df_names & geo_names)
+            st.caption(f"Match provinsi: {match_n}/{len(df_names)} (data) vs {len(geo_names)} (peta) | name_key geojson: {name_key}")
+
+            missing_in_geo = sorted(df_names - geo_names)
+            if missing_in_geo:
+                st.warning(f"Tidak ketemu di peta (cek ejaan/format): {missing_in_geo}")
+
+            multi_year = "tahun" in df.columns and df["tahun"].nunique() > 1
+
+            # kelas dari semua tahun sekaligus supaya warna antar frame sebanding
+            bins = class_breaks(f"prov:{value_col}", fingerprint(df[["prov_clean", value_col]]), method, df[value_col].to_numpy(dtype="float64"))
+            palette = palette_for(len(bins) - 1)
+
+            if multi_year:
+                # =========================
+                # 5a) ANIMASI ANTAR TAHUN: geometri sekali, warna per frame dari cache
+                # =========================
+                frames = frame_colors(df[["prov_clean", "tahun", value_col]], tuple(feature_keys(geo)), value_col, tuple(bins))
+                st.caption(f"Animasi {len(frames['years'])} tahun ({frames['years'][0]}–{frames['years'][-1]}) • tekan ▶ di pojok kiri bawah peta")
+
+                layer = folium.GeoJson(
+                    geo,
+                    style_function=lambda x: {"fillColor": "#d1d5db", "fillOpacity": 0.85, "color": "#000000", "weight": 1, "opacity": 0.35},
+                    highlight_function=lambda x: {"weight": 3, "fillOpacity": 1},
+                ).add_to(m)
+                FrameAnimator(layer, frames, label=legend, name_key=name_key).add_to(m)
+                step_legend(frames["bins"], legend, palette).add_to(m)
+
+            else:
+                # =========================
+                # 5b) PETA FOLIUM (SATU TAHUN)
+                # =========================
+                map_df = df[["prov_clean", "provinsi", "populasi", "jumlah_tbc", "rate_100k"]
+                            + (["rr_bym", "p_exceed", "bym_txt"] if bym_metric else [])].copy()
+                cls = color_index(map_df[value_col].to_numpy(dtype="float64"), bins)
+                pal = np.array(palette + [NODATA_COLOR])
+                color_by_prov = dict(zip(map_df["prov_clean"], pal[cls].tolist()))
+
+                # satu layer GeoJson dengan warna dari bins yang sama dengan legenda & tooltip
+                with perf.span("folium.GeoJson"):
+                    folium.GeoJson(
+                        geo,
+                        style_function=lambda ft: {
+                            "fillColor": color_by_prov.get(ft["properties"].get("prov_clean"), NODATA_COLOR),
+                            "fillOpacity": 0.85, "color": "#000000", "weight": 1, "opacity": 0.35,
+                        },
+                        highlight_function=lambda x: {"weight": 3, "fillOpacity": 1},
+                    ).add_to(m)
+                    step_legend(bins, legend, palette).add_to(m)
+
+                # Tooltip (simple + aman)
+                map_df["pop_txt"] = fmt_int_col(map_df["populasi"])
+                map_df["tbc_txt"] = fmt_int_col(map_df["jumlah_tbc"])
+                map_df["rate_txt"] = fmt_float_col(map_df["rate_100k"], 1)
+                map_df["kelas_txt"] = np.array(class_labels(bins) + ["-"])[cls]
+                lookup = map_df.set_index("prov_clean").to_dict(orient="index")
+
+                with perf.span("folium.tooltips"):
+                    for ft in geo["features"]:
+                        p = ft["properties"].get("prov_clean", "")
+                        row = lookup.get(p)
+
+                        if row:
+                            tooltip_html = (
+                                f"<b>{row['provinsi']}</b><br/>"
+                                f"Populasi: {row['pop_txt']}<br/>"
+                                f"Jumlah TBC: {row['tbc_txt']}<br/>"
+                                f"Rate/100k: {row['rate_txt']}<br/>"
+                                f"Kelas ({method}): {row['kelas_txt']}"
+                                + (f"<br/>{row['bym_txt']}" if bym_metric else "")
+                                + (f"<br/>Cook's D (NB): {fmt_float(cooks_by_prov[p], 3)}"
+                                   + (" ⚠" if p in infl_prov else "") if show_infl and p in cooks_by_prov else "")
+                            )
+                        else:
+                            tooltip_html = f"<b>{ft['properties'].get(name_key,'')}</b><br/>Data tidak tersedia"
+
+                        folium.GeoJson(
+                            ft,
+                            style_function=lambda x: {"fillOpacity": 0, "weight": 0},
+                            tooltip=folium.Tooltip(tooltip_html, sticky=True)
+                        ).add_to(m)
+
+        if show_infl:
+            # garis putus-putus merah untuk provinsi berpengaruh (non-interaktif, tooltip tetap dari layer bawah)
+            folium.GeoJson(
+                {"type": "FeatureCollection", "features": [ft for ft in geo["features"] if ft["properties"].get("prov_clean") in infl_prov]},
+                style_function=lambda x: {"fill": False, "color": "#dc2626", "weight": 3, "opacity": 0.95, "dashArray": "6 4"},
+                interactive=False,
+            ).add_to(m)
+            st.caption(f"Berpengaruh (Cook's D > {infl.cooks_cutoff:.3f}): "
+                       f"{', '.join(mdf['provinsi'].to_numpy()[infl.influential()]) or '-'}")
+
+        if sel_prov:
+            # garis tebal untuk provinsi terpilih (non-interaktif: klik tetap ke layer di bawah)
+            feats = (geo_kab if level == "Kabupaten/Kota" else geo)["features"]
+            folium.GeoJson(
+                {"type": "FeatureCollection", "features": [ft for ft in feats if feature_prov(ft["properties"]) in sel_prov]},
+                style_function=lambda x: {"fill": False, "color": "#111827", "weight": 3, "opacity": 0.9},
+                interactive=False,
+            ).add_to(m)
+            st.caption("Klik provinsi lagi untuk melepas dari filter.")
         else:
-            tooltip_html = f"<b>{ft['properties'].get(name_key,'')}</b><br/>Data tidak tersedia"
-
-        folium.GeoJson(
-            ft,
-            style_function=lambda x: {"fillOpacity": 0, "weight": 0},
-            tooltip=folium.Tooltip(tooltip_html, sticky=True)
-        ).add_to(m)
-
-    st_folium(m, use_container_width=True, height=560)
+            st.caption("Klik provinsi di peta untuk memfilter Home, Epi, dan residual Model.")
+
+        if st.session_state.get("measure_payload", False):
+            with perf.span("folium.render"):
+                perf.payload("peta_html", len(m.get_root().render().encode()))
+        with perf.span("st_folium"):
+            st_folium(
+                m, use_container_width=True, height=560, key="peta_map",
+                returned_objects=["last_object_clicked", "last_active_drawing"], on_change=on_map_click
+            )
 
 
     pass
@@ -591,29 +1109,12 @@ elif page == "Epi":
     import plotly.express as px
 
     # =========================
-    # 0) PREP DATA
+    # 0) PREP DATA (dari kubus: vektor per provinsi, sekali query)
     # =========================
-    df = epi2.copy()
-
-    rename_map = {
-        "Provinsii": "provinsi", "provinsii": "provinsi",
-        "Populasi": "populasi", "populasi": "populasi",
-        "jumlah_TBC": "jumlah_tbc", "jumlah_tbc": "jumlah_tbc",
-        "Kepadatan": "kepadatan", "kepadatan": "kepadatan"
-    }
-    df = df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns})
-
-    df = df.dropna(subset=["provinsi", "populasi", "jumlah_tbc", "kepadatan"]).copy()
-    df["populasi"] = pd.to_numeric(df["populasi"], errors="coerce")
-    df["jumlah_tbc"] = pd.to_numeric(df["jumlah_tbc"], errors="coerce")
-    df["kepadatan"] = pd.to_numeric(df["kepadatan"], errors="coerce")
-    df = df.dropna(subset=["populasi", "jumlah_tbc", "kepadatan"]).copy()
-
-    df["non_tbc"] = df["populasi"] - df["jumlah_tbc"]
-    df["rate_100k"] = (df["jumlah_tbc"] / df["populasi"]) * 100000
-
-    fmt_int = lambda x: f"{int(round(x)):,}".replace(",", ".")
-    fmt_float = lambda x, d=1: f"{x:,.{d}f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    prov_names = cube.provinces
+    pop_prov = cube.query("populasi", by=("provinsi",), **cube_where)
+    tbc_prov = cube.query("jumlah_tbc", by=("provinsi",), **cube_where)
+    rate_prov = cube.rate_100k(by=("provinsi",), **cube_where)
 
     # =========================
     # 1) HEADER (MINIM TEKS)
@@ -632,16 +1133,16 @@ elif page == "Epi":
     # =========================
     # 2) KPI UTAMA (INDO + MAX + MIN)
     # =========================
-    total_pop = float(df["populasi"].sum())
-    total_cases = float(df["jumlah_tbc"].sum())
+    total_pop = cube.query("populasi", **cube_where)
+    total_cases = cube.query("jumlah_tbc", **cube_where)
     rate_indo = (total_cases / total_pop) * 100000 if total_pop > 0 else np.nan
 
-    idx_max = df["rate_100k"].idxmax()
-    idx_min = df["rate_100k"].idxmin()
-    prov_max = df.loc[idx_max, "provinsi"]
-    prov_min = df.loc[idx_min, "provinsi"]
-    rate_max = float(df.loc[idx_max, "rate_100k"])
-    rate_min = float(df.loc[idx_min, "rate_100k"])
+    idx_max = int(np.nanargmax(rate_prov))
+    idx_min = int(np.nanargmin(rate_prov))
+    prov_max = prov_names[idx_max]
+    prov_min = prov_names[idx_min]
+    rate_max = float(rate_prov[idx_max])
+    rate_min = float(rate_prov[idx_min])
 
     a1, a2, a3 = st.columns(3, gap="small")
     with a1:
@@ -674,11 +1175,8 @@ elif page == "Epi":
     # =========================
     # 3) TABEL PREVALENSI PER PROVINSI (RAPI + FILTER)
     # =========================
-    freq_tbl = (
-        df[["provinsi", "populasi", "jumlah_tbc", "rate_100k"]]
-        .sort_values("rate_100k", ascending=False)
-        .copy()
-    )
+    freq_tbl = pd.DataFrame({"provinsi": prov_names, "populasi": pop_prov, "jumlah_tbc": tbc_prov, "rate_100k": rate_prov})
+    rank = rank_index(fingerprint(freq_tbl), freq_tbl)
 
     st.markdown(
         """
@@ -696,11 +1194,28 @@ elif page == "Epi":
     )
 
     if view_mode == "Top 10":
-        show_tbl = freq_tbl.head(10).copy()
+        show_tbl = rank.top("rate_100k", 10, desc=True, rows=sel_mask)
     elif view_mode == "Bottom 10":
-        show_tbl = freq_tbl.tail(10).sort_values("rate_100k", ascending=True).copy()
+        show_tbl = rank.top("rate_100k", 10, desc=False, rows=sel_mask)
     else:
-        show_tbl = freq_tbl.copy()
+        # "Semua": urut/cari/halaman dari index, hanya halaman yang tampil diformat & dikirim
+        sort_opts = {"Rate per 100.000": "rate_100k", "Jumlah TBC": "jumlah_tbc", "Populasi": "populasi"}
+        t1, t2, t3, t4 = st.columns([2, 1.3, 1, 1], gap="small")
+        with t1:
+            search = st.text_input("Cari provinsi", "", placeholder="mis. jawa")
+        with t2:
+            sort_by = st.selectbox("Urutkan", list(sort_opts))
+        with t3:
+            desc = st.selectbox("Arah", ["Tertinggi", "Terendah"]) == "Tertinggi"
+        with t4:
+            size = st.selectbox("Baris/halaman", [10, 25, 50, 100], index=1)
+
+        total = int(rank.mask(search, sel_mask).sum())
+        pages = n_pages(total, size)
+        page_no = st.number_input(f"Halaman (1–{pages})", min_value=1, max_value=pages, value=1, step=1) if pages > 1 else 1
+        show_tbl, total = rank.page(sort_opts[sort_by], desc=desc, page=page_no - 1, size=size, search=search, rows=sel_mask)
+        first = (page_no - 1) * size
+        st.caption(f"Baris {min(first + 1, total)}–{first + len(show_tbl)} dari {total}")
 
     show_tbl_disp = show_tbl.rename(columns={
         "provinsi": "Provinsi",
@@ -709,10 +1224,10 @@ elif page == "Epi":
         "rate_100k": "Rate per 100.000"
     })
 
-    # format kolom
-    show_tbl_disp["Populasi"] = show_tbl_disp["Populasi"].map(fmt_int)
-    show_tbl_disp["Jumlah TBC"] = show_tbl_disp["Jumlah TBC"].map(fmt_int)
-    show_tbl_disp["Rate per 100.000"] = show_tbl_disp["Rate per 100.000"].map(lambda x: fmt_float(float(x), 1))
+    # format kolom (satu operasi array per kolom, bukan per sel)
+    show_tbl_disp["Populasi"] = fmt_int_col(show_tbl_disp["Populasi"])
+    show_tbl_disp["Jumlah TBC"] = fmt_int_col(show_tbl_disp["Jumlah TBC"])
+    show_tbl_disp["Rate per 100.000"] = fmt_float_col(show_tbl_disp["Rate per 100.000"], 1)
 
     st.dataframe(
         show_tbl_disp,
@@ -726,15 +1241,16 @@ elif page == "Epi":
     # =========================
     # 4) CHART RINGKAS (TOP 10 AJA) - BIAR GA RAMAI
     # =========================
-    top10 = freq_tbl.head(10).sort_values("rate_100k", ascending=True)
-    fig = px.bar(
-        top10,
-        x="rate_100k",
-        y="provinsi",
-        orientation="h",
-        text=top10["rate_100k"].round(1),
-        labels={"rate_100k": "per 100.000", "provinsi": ""}
-    )
+    top10 = rank.top("rate_100k", 10, desc=True, rows=sel_mask).iloc[::-1]
+    with perf.span("px.bar"):
+        fig = px.bar(
+            top10,
+            x="rate_100k",
+            y="provinsi",
+            orientation="h",
+            text=top10["rate_100k"].round(1),
+            labels={"rate_100k": "per 100.000", "provinsi": ""}
+        )
     fig.update_traces(textposition="outside", cliponaxis=False)
     fig.update_layout(
         height=360,
@@ -742,6 +1258,8 @@ elif page == "Epi":
         plot_bgcolor="rgba(0,0,0,0)",
         paper_bgcolor="rgba(0,0,0,0)"
     )
+    if st.session_state.get("measure_payload", False):
+        perf.payload("epi_bar_json", len(fig.to_json().encode()))
     st.plotly_chart(fig, use_container_width=True)
 
     st.write("")
@@ -749,21 +1267,17 @@ elif page == "Epi":
     # =========================
     # 5) PR & POR (MEDIAN SPLIT)
     # =========================
-    med_kepadatan = float(df["kepadatan"].median())
-    df["kelompok_kepadatan"] = np.where(df["kepadatan"] >= med_kepadatan, "High (≥ median)", "Low (< median)")
-
-    agg = (
-        df.groupby("kelompok_kepadatan", as_index=False)
-          .agg(kasus=("jumlah_tbc", "sum"), non_kasus=("non_tbc", "sum"))
-          .set_index("kelompok_kepadatan")
-          .reindex(["High (≥ median)", "Low (< median)"])
-          .reset_index()
-    )
-
-    a = float(agg.loc[agg["kelompok_kepadatan"] == "High (≥ median)", "kasus"].iloc[0])
-    b = float(agg.loc[agg["kelompok_kepadatan"] == "High (≥ median)", "non_kasus"].iloc[0])
-    c = float(agg.loc[agg["kelompok_kepadatan"] == "Low (< median)", "kasus"].iloc[0])
-    d = float(agg.loc[agg["kelompok_kepadatan"] == "Low (< median)", "non_kasus"].iloc[0])
+    kep = cube.attrs["kepadatan"].to_numpy(dtype="float64")
+    has_kep = np.isfinite(kep)
+    med_kepadatan = float(np.median(kep[has_kep]))
+    high = has_kep & (kep >= med_kepadatan)
+    low = has_kep & (kep < med_kepadatan)
+
+    # 2x2: kasus & non-kasus per kelompok kepadatan (mask provinsi di kubus)
+    a = cube.query("jumlah_tbc", provinsi=high, **cube_where)
+    b = cube.query("populasi", provinsi=high, **cube_where) - a
+    c = cube.query("jumlah_tbc", provinsi=low, **cube_where)
+    d = cube.query("populasi", provinsi=low, **cube_where) - c
 
     PR = (a / (a + b)) / (c / (c + d))
     SE_logPR = np.sqrt((1/a) - (1/(a+b)) + (1/c) - (1/(c+d)))
@@ -810,7 +1324,83 @@ elif page == "Epi":
 
     st.write("")
 
-  
+    # =========================
+    # 6) PR & POR TERSTRATIFIKASI (MANTEL-HAENSZEL)
+    # =========================
+    st.markdown(
+        """
+        <div class="card">
+          <div style="font-size:16px;font-weight:700;">PR & POR Terstratifikasi (Mantel-Haenszel)</div>
+          <div class="muted">Kontrol perancu umur & jenis kelamin: satu tabel 2x2 per strata, digabung MH
+            (CI Greenland-Robins / Robins-Breslow-Greenland), homogenitas OR diuji Breslow-Day</div>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+    avail = strata_dims(cube)
+    if avail:
+        by_strata = st.multiselect("Stratifikasi menurut", avail, default=avail)
+    else:
+        by_strata = []
+        st.caption("Data Epi tidak punya kolom umur / jk, jadi hanya ada satu strata (MH = crude). "
+                   "Unggah data bertingkat umur × jenis kelamin (atau line-list) untuk analisis terstratifikasi.")
+    sa, sb, sc, sd, strata_lab = cube_strata(cube, high, low, by=by_strata, **cube_where)
+    mh = mantel_haenszel(sa, sb, sc, sd)
+
+    m1, m2, m3 = st.columns([1, 1, 1], gap="small")
+    with m1:
+        st.markdown(f"""
+        <div class="kpi">
+          <div class="label">PR<sub>MH</sub></div>
+          <div class="value">{fmt_float(mh.pr, 3)}</div>
+          <div class="muted">CI 95% {fmt_float(mh.pr_ci[0],3)}–{fmt_float(mh.pr_ci[1],3)} • crude {fmt_float(PR, 3)}</div>
+        </div>
+        """, unsafe_allow_html=True)
+    with m2:
+        st.markdown(f"""
+        <div class="kpi">
+          <div class="label">POR<sub>MH</sub></div>
+          <div class="value">{fmt_float(mh.or_, 3)}</div>
+          <div class="muted">CI 95% {fmt_float(mh.or_ci[0],3)}–{fmt_float(mh.or_ci[1],3)} • crude {fmt_float(POR, 3)}</div>
+        </div>
+        """, unsafe_allow_html=True)
+    with m3:
+        bd_txt = "—" if mh.bd_df == 0 else fmt_p(mh.bd_p)
+        st.markdown(f"""
+        <div class="kpi">
+          <div class="label">Breslow-Day (homogenitas OR)</div>
+          <div class="value">{bd_txt}</div>
+          <div class="muted">{fmt_int(mh.strata)} strata informatif • {"butuh ≥ 2 strata" if mh.bd_df == 0 else f"χ²={fmt_float(mh.bd_chi2, 2)}, df={mh.bd_df}"}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    if mh.strata > 1:
+        strata_tbl = strata_lab.assign(**{
+            "Kasus (padat)": sa,
+            "Populasi (padat)": sa + sb,
+            "Kasus (jarang)": sc,
+            "Populasi (jarang)": sc + sd,
+            "PR": mh.pr_i,
+            "POR": mh.or_i,
+        })
+        st.dataframe(
+            strata_tbl,
+            use_container_width=True,
+            hide_index=True,
+            height=min(360, 38 + 35 * len(strata_tbl)),
+            column_config={
+                **{c: st.column_config.NumberColumn(format="%d") for c in strata_tbl.columns if c.startswith(("Kasus", "Populasi"))},
+                "PR": st.column_config.NumberColumn(format="%.3f"),
+                "POR": st.column_config.NumberColumn(format="%.3f"),
+            }
+        )
+        st.caption(
+            f"Homogenitas PR (Q inverse-variance): χ²={fmt_float(mh.q_pr, 2)}, df={mh.q_df}, p={fmt_p(mh.q_p)} • "
+            f"CMH χ²={fmt_float(mh.cmh_chi2, 2)}, p={fmt_p(mh.cmh_p)}"
+            + ("" if mh.homogeneous else " • OR antar strata tidak homogen: laporkan per strata, bukan hanya MH")
+        )
+
+    st.write("")
 
     # =========================
     # 7) INTERPRETASI (1 CARD SAJA)
@@ -836,8 +1426,6 @@ elif page == "Epi":
 elif page == "Model":
     import numpy as np
     import pandas as pd
-    import statsmodels.api as sm
-    import statsmodels.formula.api as smf
     from scipy.stats import chi2
 
 
@@ -845,29 +1433,41 @@ elif page == "Model":
     # 0) LOAD DATA (MODEL)
     # =========================
     try:
-        df = load_epi1_model(PATH_EPI1).copy()
+        joined = model_join(PATH_EPI1, PATH_EPI2)
     except Exception as e:
         st.error(f"Gagal load epi1_modeling.xlsx: {e}")
-        st.stop()
+        stop_page()
 
     st.markdown('<div class="card"><div class="card-title">Data Modeling</div>'
                 '<div class="muted">Tabel 1 (38 prov): Y (kasus TBC) dan X1–X5</div></div>',
                 unsafe_allow_html=True)
     st.write("")
-    st.dataframe(df, use_container_width=True)
-
-    # (lanjut di bawah sini: fitting Negative Binomial, IRR, dsb)
 
+    model_mode = st.radio(
+        "Mode model",
+        ["Jumlah kasus (tanpa offset)", "Rate (offset log populasi)"],
+        horizontal=True,
+        help="Dengan offset log(populasi), koefisien menjadi IRR terhadap rate per penduduk, bukan terhadap jumlah kasus."
+    )
+    use_offset = model_mode.startswith("Rate")
+    if use_offset:
+        df = joined.dropna(subset=["log_pop"]).reset_index(drop=True)
+        n_drop = len(joined) - len(df)
+        if n_drop:
+            st.caption(f"{n_drop} provinsi tanpa populasi di epi2_ukuran.xlsx tidak ikut model rate: "
+                       f"{', '.join(joined.loc[joined['log_pop'].isna(), 'provinsi'])}")
+    else:
+        df = joined
+    st.dataframe(df.drop(columns=["prov_clean", "log_pop"] + ([] if use_offset else ["populasi"])),
+                 use_container_width=True)
 
+    fp_model = fingerprint(df)
+    fits = count_models(fp_model, MODEL_FORMULA, "log_pop" if use_offset else None, df)
 
     # =========================
     # 1) POISSON baseline + overdisp (Pearson)
     # =========================
-    pois = smf.glm(
-        "y ~ x1 + x2 + x3 + x4 + x5",
-        data=df,
-        family=sm.families.Poisson()
-    ).fit()
+    pois = fits["pois"]
 
     pearson_chi2 = float(np.sum(pois.resid_pearson**2))
     df_resid = float(pois.df_resid)
@@ -879,22 +1479,10 @@ elif page == "Model":
     # =========================
     # 2) NEG BIN: estimasi alpha via MLE, lalu fit NB-GLM pakai alpha tsb
     # =========================
-    X = sm.add_constant(df[["x1","x2","x3","x4","x5"]])
-
-    nb_mle = sm.NegativeBinomial(df["y"], X).fit(disp=False)
-
-    # ambil alpha dari params (ini yang valid di statsmodels)
-    if "alpha" in nb_mle.params.index:
-        alpha_hat = float(nb_mle.params["alpha"])
-    else:
-        # fallback aman (jarang kejadian)
-        alpha_hat = float(getattr(nb_mle, "scale", 1.0))
-
-    nb_glm = smf.glm(
-        "y ~ x1 + x2 + x3 + x4 + x5",
-        data=df,
-        family=sm.families.NegativeBinomial(alpha=alpha_hat)
-    ).fit()
+    alpha_hat = fits["alpha"]
+    nb_glm = fits["nb_glm"]
+    if not fits["converged"]:
+        st.warning(f"NB-MLE tidak konvergen (log-lik {float(fits['nb_mle'].llf):.2f}, α {alpha_hat:.3f}): estimasi bisa belum optimum.")
 
     aic_nb = float(nb_glm.aic)
 
@@ -921,13 +1509,8 @@ elif page == "Model":
         "x5": "X₅ Indeks kualitas udara"
     })
 
-    def fmt_p(x):
-        x = float(x)
-        return "< 0.001" if x < 0.001 else f"{x:.4f}"
-
-    out["β"] = out["β"].map(lambda x: f"{float(x):.6f}")
-    out["IRR"] = out["IRR"].map(lambda x: f"{float(x):.3f}")
-    out["p-value"] = out["p-value"].map(fmt_p)
+    # β & IRR tetap numerik (format di render lewat column_config), p-value jadi teks
+    out["p-value"] = fmt_p_col(out["p-value"])
 
     # =========================
     # 4) PERSAMAAN MODEL AKHIR
@@ -940,7 +1523,7 @@ elif page == "Model":
     b5 = float(nb_glm.params.get("x5", np.nan))
 
     eq = (
-        f"log(μᵢ) = {b0:.2f}"
+        f"log(μᵢ) = {'log(populasiᵢ) + ' if use_offset else ''}{b0:.2f}"
         f" + ({b1:.4f})X1ᵢ"
         f" + ({b2:.4f})X2ᵢ"
         f" + ({b3:.4f})X3ᵢ"
@@ -990,6 +1573,122 @@ elif page == "Model":
 
     st.write("")
 
+    # validasi silang NB (di samping AIC): deviance / MAE / cakupan out-of-fold
+    c1, c2 = st.columns([1, 2], gap="small")
+    with c1:
+        cv_scheme = st.selectbox("Validasi silang", ["Leave-one-out", "5-fold", "10-fold"])
+    with c2:
+        cv_mode = st.radio(
+            "Mode CV",
+            ["Cepat (one-step Newton)", "Exact (refit per fold)"],
+            horizontal=True,
+            help="Cepat: satu langkah Newton dari Hessian data penuh (tanpa refit). Exact: IRLS ulang tiap fold (process pool kalau data besar)."
+        )
+    cv_res = nb_cv(
+        fp_model, "log_pop" if use_offset else None,
+        None if cv_scheme == "Leave-one-out" else int(cv_scheme.split("-")[0]),
+        "onestep" if cv_mode.startswith("Cepat") else "exact",
+        df,
+    )
+    cv_err = np.abs(df["y"].to_numpy() - cv_res.mu)
+
+    v1, v2, v3, v4 = st.columns(4, gap="small")
+    for col, label, value in [
+        (v1, f"Deviance CV ({cv_res.scheme})", f"{cv_res.deviance:.2f}"),
+        (v2, "Deviance in-sample", f"{float(nb_glm.deviance):.2f}"),
+        (v3, "MAE CV (median)", f"{fmt_float(cv_res.mae, 0)} ({fmt_float(float(np.median(cv_err)), 0)})"),
+        (v4, "Cakupan PI 95%", f"{cv_res.coverage * 100:.1f}%"),
+    ]:
+        with col:
+            st.markdown(f"""
+            <div class="kpi">
+              <div class="label">{label}</div>
+              <div class="value">{value}</div>
+            </div>""", unsafe_allow_html=True)
+    worst = int(np.argmax(cv_err))
+    st.caption(
+        f"{cv_res.n_folds} fold • {cv_res.seconds * 1e3:.1f} ms • α tetap {alpha_hat:.3f} • "
+        f"prediksi terburuk: {df['provinsi'].iloc[worst]} (Y {fmt_int(df['y'].iloc[worst])}, "
+        f"μ̂ out-of-fold {fmt_float(float(cv_res.mu[worst]), 0)})"
+    )
+
+    st.write("")
+
+    # perbandingan model cacah (AIC/BIC/log-lik/dispersi + Vuong vs NB2), cache per isi data
+    cmp_tbl = count_comparison(fp_model, "log_pop" if use_offset else None, df)
+    st.markdown(
+        """
+        <div class="card">
+          <div style="font-size:16px;font-weight:700;">Perbandingan Model Cacah</div>
+          <div class="muted">Urut AIC • Vuong terhadap NB2 (z &gt; 0: model baris lebih baik; Poisson ⊂ NB2: uji LR batas ½χ²₁) •
+            ZIP/ZINB/hurdle hanya kalau ada Y = 0</div>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+    st.dataframe(
+        cmp_tbl.drop(columns=["key"]).assign(**{"p Vuong": fmt_p_col(cmp_tbl["p Vuong"]), "p LR": fmt_p_col(cmp_tbl["p LR"])}),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            **{c: st.column_config.NumberColumn(format="%.2f") for c in ["log-lik", "AIC", "BIC", "ΔAIC", "Vuong z", "Vuong z (BIC)", "LR (α = 0)"]},
+            "Dispersi": st.column_config.NumberColumn(format="%.4f"),
+        }
+    )
+
+    st.write("")
+
+    # uji resampling: p-value χ² Pearson & Wald asimtotik kurang bisa dipegang di n≈38
+    st.markdown(
+        """
+        <div class="card">
+          <div style="font-size:16px;font-weight:700;">Uji Resampling (n kecil)</div>
+          <div class="muted">Overdispersi: bootstrap parametrik Y* ~ Poisson(μ̂), refit Poisson • Koefisien: permutasi Freedman-Lane (residual model tanpa X_j diacak), refit NB2 (α tetap), statistik |z| •
+            semua refit IRLS batch</div>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+    r1, r2 = st.columns([1, 1], gap="small")
+    with r1:
+        n_boot = st.selectbox("Replikasi (B)", [999, 1999, 4999], index=1)
+    with r2:
+        boot_seed = int(st.number_input("Seed", min_value=0, value=0, step=1))
+    rs = resampling_tests(fp_model, "log_pop" if use_offset else None, n_boot, boot_seed, df)
+    boot = rs["boot"]
+
+    b1, b2, b3 = st.columns(3, gap="small")
+    for col, label, value in [
+        (b1, "Pearson/df (Poisson)", f"{boot['stat']:.3f}"),
+        (b2, "p asimtotik χ²", fmt_p(p_overdisp)),
+        (b3, f"p bootstrap (B={boot['B']})", fmt_p(boot["p"])),
+    ]:
+        with col:
+            st.markdown(f"""
+            <div class="kpi">
+              <div class="label">{label}</div>
+              <div class="value">{value}</div>
+            </div>""", unsafe_allow_html=True)
+    st.caption(
+        f"Sebaran bootstrap Pearson/df di bawah H0 Poisson: median {np.median(boot['boot']):.3f}, "
+        f"persentil 99% {np.percentile(boot['boot'], 99):.3f} • p Monte Carlo = (1 + #≥ teramati) / (B + 1)"
+    )
+
+    perm_tbl = pd.DataFrame({
+        "Variabel": [SCHEMAS["model"][v].label if v in SCHEMAS["model"] else v for v in rs["perm"]],
+        "z Wald": [z for z, _ in rs["perm"].values()],
+        "p Wald": fmt_p_col(pvals.reindex(list(rs["perm"])).to_numpy()),
+        "p permutasi": fmt_p_col([p for _, p in rs["perm"].values()]),
+    })
+    st.dataframe(
+        perm_tbl,
+        use_container_width=True,
+        hide_index=True,
+        column_config={"z Wald": st.column_config.NumberColumn(format="%.3f")},
+    )
+
+    st.write("")
+
     st.markdown(
         """
         <div class="card">
@@ -998,7 +1697,47 @@ elif page == "Model":
         """,
         unsafe_allow_html=True
     )
-    st.dataframe(out, use_container_width=True, hide_index=True)
+    st.dataframe(
+        out,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "β": st.column_config.NumberColumn(format="%.6f"),
+            "IRR": st.column_config.NumberColumn(format="%.3f"),
+        }
+    )
+
+    if use_offset:
+        # IRR rate (per penduduk) + CI 95%; pembanding: IRR model jumlah kasus di baris yang sama (cache sama)
+        ci = np.exp(nb_glm.conf_int())
+        nb_count = count_models(fp_model, MODEL_FORMULA, None, df)["nb_glm"]
+        irr_rate = pd.DataFrame({
+            "Variabel": out["Variabel"].to_numpy()[1:],
+            "IRR rate": irr.to_numpy()[1:],
+            "CI 95% bawah": ci.iloc[1:, 0].to_numpy(),
+            "CI 95% atas": ci.iloc[1:, 1].to_numpy(),
+            "p-value": out["p-value"].to_numpy()[1:],
+            "IRR jumlah kasus": np.exp(nb_count.params.reindex(params.index)).to_numpy()[1:],
+        })
+        st.markdown(
+            f"""
+            <div class="card">
+              <div style="font-size:16px;font-weight:700;">Incidence Rate Ratio (offset log populasi)</div>
+              <div class="muted">Rate dasar (semua X = 0): {fmt_float(np.exp(b0) * 1e5, 2)} per 100.000 penduduk •
+                IRR = perubahan rate per kenaikan 1 satuan X</div>
+            </div>
+            """,
+            unsafe_allow_html=True
+        )
+        st.dataframe(
+            irr_rate,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                c: st.column_config.NumberColumn(format="%.4f")
+                for c in ["IRR rate", "CI 95% bawah", "CI 95% atas", "IRR jumlah kasus"]
+            }
+        )
 
     st.write("")
 
@@ -1014,6 +1753,330 @@ elif page == "Model":
         unsafe_allow_html=True
     )
 
+    st.write("")
+
+    # =========================
+    # 5) RESIDUAL PER PROVINSI (ikut filter klik peta)
+    # =========================
+    resid = pd.DataFrame({
+        "Provinsi": df["provinsi"].to_numpy(),
+        "Y": df["y"].to_numpy(),
+        "μ̂ (NegBin)": np.asarray(nb_glm.fittedvalues),
+        "Residual Pearson": np.asarray(nb_glm.resid_pearson),
+        "Residual deviance": np.asarray(nb_glm.resid_deviance),
+    })
+    model_mask = selection_mask(prov_positions(fingerprint(df[["provinsi"]]), df["provinsi"]), len(df), sel_prov)
+    if model_mask is None:
+        resid = resid.iloc[np.argsort(-np.abs(resid["Residual Pearson"].to_numpy()), kind="stable")]
+        judul_resid = "Residual per Provinsi (urut |Pearson| terbesar)"
+    else:
+        resid = resid[model_mask]
+        judul_resid = f"Residual per Provinsi — {len(resid)} provinsi terpilih di peta"
+
+    st.markdown(
+        f"""
+        <div class="card">
+          <div style="font-size:16px;font-weight:700;">{judul_resid}</div>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+    st.dataframe(
+        resid,
+        use_container_width=True,
+        hide_index=True,
+        height=280,
+        column_config={
+            "Y": st.column_config.NumberColumn(format="%d"),
+            "μ̂ (NegBin)": st.column_config.NumberColumn(format="%.1f"),
+            "Residual Pearson": st.column_config.NumberColumn(format="%.3f"),
+            "Residual deviance": st.column_config.NumberColumn(format="%.3f"),
+        }
+    )
+
+    st.write("")
+
+    # =========================
+    # 5b) DIAGNOSTIK PENGARUH (leverage, Cook's D, DFBETAS; sama dengan sorotan di Peta)
+    # =========================
+    infl = fits["influence"]
+    flag = infl.influential()
+    diag = pd.DataFrame({
+        "Provinsi": df["provinsi"].to_numpy(),
+        "Leverage h": infl.hat,
+        "Resid. Pearson std": infl.resid_pearson,
+        "Resid. deviance std": infl.resid_deviance,
+        "Cook's D": infl.cooks,
+        **{f"DFBETAS {v.upper()}": infl.dfbetas[:, j] for j, v in enumerate(infl.names) if v != "Intercept"},
+        "Berpengaruh": np.where(flag, "⚠ ya", ""),
+    })
+    if model_mask is None:
+        diag = diag.iloc[np.argsort(-infl.cooks, kind="stable")]
+    else:
+        diag = diag[model_mask]
+
+    st.markdown(
+        f"""
+        <div class="card">
+          <div style="font-size:16px;font-weight:700;">Diagnostik Pengaruh (NegBin)</div>
+          <div class="muted">{int(flag.sum())} provinsi dengan Cook's D &gt; 4/n = {infl.cooks_cutoff:.3f}:
+            {", ".join(df["provinsi"].to_numpy()[flag]) or "-"} • leverage rata-rata p/n = {infl.hat.mean():.3f} •
+            |DFBETAS| &gt; 2/√n = {2 / np.sqrt(len(df)):.3f} patut dicek</div>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+    st.dataframe(
+        diag,
+        use_container_width=True,
+        hide_index=True,
+        height=280,
+        column_config={c: st.column_config.NumberColumn(format="%.3f") for c in diag.columns[1:-1]},
+    )
+    st.caption("Provinsi berpengaruh bisa disorot di halaman Peta (opsi 'Sorot provinsi berpengaruh').")
+
+    st.write("")
+
+    # =========================
+    # 5c) MULTIKOLINEARITAS (VIF sekaligus dari R⁻¹, indeks kondisi Belsley, heatmap korelasi)
+    # =========================
+    import plotly.express as px
+
+    model_covs = [v for v in fits["design"].names if v != "Intercept"]
+    cand = [c for c in df.select_dtypes("number").columns if c not in ("y", "log_pop")]
+    st.markdown(
+        """
+        <div class="card">
+          <div style="font-size:16px;font-weight:700;">Multikolinearitas Kovariat</div>
+          <div class="muted">VIF = diag(R⁻¹) tanpa regresi bantu • indeks kondisi dari SVD X berskala (termasuk intersep) •
+            VIF &gt; 5–10 atau indeks kondisi &gt; 30 dengan ≥ 2 proporsi varians &gt; 0,5 patut dicek</div>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+    coll_cols = st.multiselect("Kovariat kandidat", cand, default=model_covs)
+    if len(coll_cols) < 2:
+        st.info("Pilih minimal 2 kovariat.")
+    else:
+        coll = collinearity_panel(fingerprint(df[coll_cols]), tuple(coll_cols), df)
+        label = {c: SCHEMAS["model"][c].label if c in SCHEMAS["model"] else c for c in coll.names}
+
+        k1, k2 = st.columns([1, 1], gap="small")
+        with k1:
+            vif_tbl = pd.DataFrame({
+                "Variabel": [label[c] for c in coll.names],
+                "VIF": coll.vif,
+                "R² terhadap kovariat lain": 1 - 1 / coll.vif,
+            }).sort_values("VIF", ascending=False, kind="stable")
+            st.dataframe(
+                vif_tbl,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "VIF": st.column_config.NumberColumn(format="%.2f"),
+                    "R² terhadap kovariat lain": st.column_config.NumberColumn(format="%.3f"),
+                }
+            )
+            ci_tbl = pd.DataFrame(coll.var_prop, columns=["Intercept"] + coll.names)
+            ci_tbl.insert(0, "Indeks kondisi", coll.cond_index)
+            st.dataframe(
+                ci_tbl.iloc[::-1],
+                use_container_width=True,
+                hide_index=True,
+                column_config={c: st.column_config.NumberColumn(format="%.2f") for c in ci_tbl.columns},
+            )
+        with k2:
+            fig = px.imshow(
+                pd.DataFrame(coll.corr, index=coll.names, columns=coll.names),
+                text_auto=".2f", zmin=-1, zmax=1, color_continuous_scale="RdBu_r", aspect="auto",
+            )
+            fig.update_layout(height=360, margin=dict(l=10, r=10, t=10, b=10),
+                              plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)")
+            st.plotly_chart(fig, use_container_width=True)
+        st.caption(
+            f"Bilangan kondisi {coll.condition_number:.1f} • VIF maks {np.nanmax(coll.vif):.2f} "
+            f"({label[coll.names[int(np.nanargmax(coll.vif))]]})"
+        )
+
+    st.write("")
+
+    # =========================
+    # 6) GWR-NB: IRR LOKAL PER PROVINSI (bandwidth adaptif, dipilih AICc)
+    # =========================
+    gw = gwnb_model(fp_model, df, PATH_GEO, "log_pop" if use_offset else None)
+    gres = gw["res"]
+
+    st.markdown(
+        """
+        <div class="card">
+          <div style="font-size:16px;font-weight:700;">GWR-NB — Koefisien Lokal</div>
+          <div class="muted">Bobot bisquare adaptif dari centroid provinsi • α global • warm start dari NB global</div>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+    st.write("")
+
+    g1, g2, g3, g4 = st.columns(4, gap="small")
+    for col, label, value in [
+        (g1, "Bandwidth (tetangga)", f"{gres.bandwidth} / {len(gres.mu)}"),
+        (g2, "AICc GWR-NB", f"{gres.aicc:.2f}"),
+        (g3, "AICc NB global", f"{gw['aicc_global']:.2f}"),
+        (g4, "tr(S) efektif", f"{gres.tr_s:.2f}"),
+    ]:
+        with col:
+            st.markdown(f"""
+            <div class="kpi">
+              <div class="label">{label}</div>
+              <div class="value">{value}</div>
+            </div>""", unsafe_allow_html=True)
+
+    if gres.aicc < gw["aicc_global"] - 2:
+        st.caption("AICc GWR-NB lebih kecil > 2 poin: ada indikasi efek kovariat bervariasi antar wilayah.")
+    else:
+        st.caption("AICc GWR-NB tidak lebih baik dari NB global: IRR nasional masih memadai untuk data ini.")
+    if gw["n_drop"]:
+        st.caption(f"{gw['n_drop']} provinsi tanpa centroid tidak ikut GWR-NB.")
+
+    irr_loc = np.exp(gres.params[:, 1:])
+    sig = np.abs(gres.tvalues[:, 1:]) > 1.96
+    q = np.percentile(irr_loc, [0, 25, 50, 75, 100], axis=0)
+    lokal = pd.DataFrame({
+        "Variabel": [SM_TITLES[c] for c in gres.names[1:]],
+        "IRR global": np.exp(params.reindex(gres.names[1:]).to_numpy()),
+        "Min": q[0], "Q1": q[1], "Median": q[2], "Q3": q[3], "Maks": q[4],
+        "% lokasi signifikan": sig.mean(axis=0) * 100,
+    })
+    irr_fmt = st.column_config.NumberColumn(format="%.4f")
+    st.dataframe(
+        lokal,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            **{c: irr_fmt for c in ["IRR global", "Min", "Q1", "Median", "Q3", "Maks"]},
+            "% lokasi signifikan": st.column_config.NumberColumn(format="%.0f%%"),
+        }
+    )
+
+    c1, c2 = st.columns([1, 2], gap="small")
+    with c1:
+        search = pd.DataFrame(gres.search, columns=["bandwidth", "AICc"])
+        fig = px.line(search, x="bandwidth", y="AICc", markers=True, labels={"bandwidth": "tetangga terdekat"})
+        fig.update_layout(height=300, margin=dict(l=10, r=10, t=10, b=10),
+                          plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)")
+        st.plotly_chart(fig, use_container_width=True)
+    with c2:
+        per_prov = pd.DataFrame(irr_loc, columns=[f"IRR {c.upper()}" for c in gres.names[1:]])
+        per_prov.insert(0, "Provinsi", gw["provinsi"])
+        gw_mask = selection_mask(prov_positions(fingerprint(per_prov[["Provinsi"]]), per_prov["Provinsi"]), len(per_prov), sel_prov)
+        if gw_mask is not None:
+            per_prov = per_prov[gw_mask]
+        st.dataframe(
+            per_prov,
+            use_container_width=True,
+            hide_index=True,
+            height=300,
+            column_config={c: irr_fmt for c in per_prov.columns[1:]}
+        )
+    st.caption("Peta IRR lokal: halaman Peta → Small multiples → IRR lokal GWR-NB.")
+
+    st.write("")
+
+    # =========================
+    # 7) SIMULASI WHAT-IF (koefisien & kovarians NB dari cache, tanpa refit)
+    # =========================
+    st.markdown(
+        """
+        <div class="card">
+          <div style="font-size:16px;font-weight:700;">Simulasi What-if</div>
+          <div class="muted">Geser X1–X5 (perubahan absolut dari nilai sekarang) • μ = exp(Xβ) dari NegBin di atas •
+            CI rata-rata: delta method • PI: simulasi β ~ N(β̂, V) + Gamma-Poisson</div>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+    st.write("")
+
+    design = fits["design"]
+    pred = nb_predictor(fp_model, "log_pop" if use_offset else None, df)
+    off = design.column(df, "log_pop") if use_offset else None
+
+    scope = st.radio(
+        "Terapkan ke",
+        ["Semua provinsi", "Provinsi terpilih di peta"],
+        horizontal=True,
+        disabled=not sel_prov,
+        help="Pilih provinsi dengan klik di halaman Peta untuk simulasi per provinsi."
+    )
+    rows = np.ones(design.n, dtype=bool) if scope == "Semua provinsi" or model_mask is None else model_mask
+    if not rows.any():
+        st.warning("Tidak ada provinsi terpilih yang ada di data model: skenario tidak mengubah prediksi. "
+                   "Pilih provinsi lain di Peta atau terapkan ke semua provinsi.")
+
+    covs = [v for v in design.names if v != "Intercept"]
+    deltas = np.zeros(design.X.shape[1])
+    for col, v in zip(st.columns(len(covs), gap="small"), covs):
+        j = design.names.index(v)
+        sd = float(design.X[:, j].std())
+        step = float(10 ** np.floor(np.log10(sd / 10))) if sd > 0 else 0.1
+        lim = round(float(np.ceil(2 * sd / step) * step), 6) if sd > 0 else 1.0
+        with col:
+            deltas[j] = st.slider(f"Δ {v.upper()}", -lim, lim, 0.0, step, key=f"whatif_{v}",
+                                  help=SCHEMAS["model"][v].label if v in SCHEMAS["model"] else None)
+
+    X_new = design.X.copy()
+    X_new[rows] += deltas
+    mu0, _, _ = pred.mean(design.X, off)
+    mu1, ci_lo, ci_hi = pred.mean(X_new, off)
+    with perf.span("whatif:simulate"):
+        d0 = pred.draws(design.X, off)
+        d1 = d0 if not deltas.any() else pred.draws(X_new, off)
+    pi_lo, pi_hi = pred.interval(d1)
+    tot_lo, tot_hi = pred.interval(d1.sum(axis=0))
+    dtot_lo, dtot_hi = pred.interval(d1.sum(axis=0) - d0.sum(axis=0))
+
+    w1, w2, w3, w4 = st.columns(4, gap="small")
+    for col, label, value in [
+        (w1, "Prediksi nasional (sekarang)", fmt_int(mu0.sum())),
+        (w2, "Prediksi nasional (skenario)", fmt_int(mu1.sum())),
+        (w3, "Perubahan", f"{(mu1.sum() / mu0.sum() - 1) * 100:+.1f}%"),
+        (w4, "PI 95% nasional (skenario)", f"{fmt_int(tot_lo)} – {fmt_int(tot_hi)}"),
+    ]:
+        with col:
+            st.markdown(f"""
+            <div class="kpi">
+              <div class="label">{label}</div>
+              <div class="value">{value}</div>
+            </div>""", unsafe_allow_html=True)
+    st.caption(
+        f"Selisih kasus nasional (skenario − sekarang), PI 95% simulasi: {fmt_int(dtot_lo)} – {fmt_int(dtot_hi)} • "
+        f"{pred.n_sim} draw • {int(rows.sum())} provinsi diubah"
+    )
+
+    whatif = pd.DataFrame({
+        "Provinsi": df.loc[design.rows, "provinsi"].to_numpy(),
+        "Y": design.y,
+        "μ̂ sekarang": mu0,
+        "μ̂ skenario": mu1,
+        "Perubahan (%)": (mu1 / mu0 - 1) * 100,
+        "CI 95% μ bawah": ci_lo,
+        "CI 95% μ atas": ci_hi,
+        "PI 95% bawah": pi_lo,
+        "PI 95% atas": pi_hi,
+    })[rows]
+    st.dataframe(
+        whatif,
+        use_container_width=True,
+        hide_index=True,
+        height=280,
+        column_config={
+            "Y": st.column_config.NumberColumn(format="%d"),
+            "Perubahan (%)": st.column_config.NumberColumn(format="%+.1f"),
+            **{c: st.column_config.NumberColumn(format="%.0f")
+               for c in ["μ̂ sekarang", "μ̂ skenario", "CI 95% μ bawah", "CI 95% μ atas", "PI 95% bawah", "PI 95% atas"]},
+        }
+    )
+
     pass
 
 if page == "About":
@@ -1070,7 +2133,100 @@ if page == "About":
         """,
         unsafe_allow_html=True
     )
+    st.write("")
+    st.button("Diagnostik data", on_click=go, args=("Diagnostik",))
+
+elif page == "Diagnostik":
+    # =========================
+    # DIAGNOSTIK DATA (validasi skema + aturan, cache per fingerprint)
+    # =========================
+    st.markdown(
+        """
+        <div class="card">
+          <div style="font-size:22px;font-weight:800;line-height:1.1;">Diagnostik Data</div>
+          <div class="muted" style="margin-top:4px;">Skema • rentang • aturan lintas kolom • duplikat • kecocokan peta</div>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+    st.write("")
+
+    for label, path, kind in [
+        ("epi2_ukuran.xlsx", PATH_EPI2, "epi2"),
+        ("epi1_modeling.xlsx", PATH_EPI1, "model"),
+        ("epi2_kabkota.xlsx", PATH_KAB, "kabkota"),
+    ]:
+        if not path.exists():
+            continue
+        try:
+            schema_rep, rep = data_quality(path, kind, file_sig(path))
+        except Exception as e:
+            st.error(f"{label}: {e}")
+            continue
+
+        status = "✅" if rep["n_error"] == 0 else "⚠️"
+        with st.expander(
+            f"{status} {label} — {rep['n_rows']} baris • {rep['n_error']} error • {rep['n_warning']} peringatan",
+            expanded=(rep["n_error"] + rep["n_warning"]) > 0
+        ):
+            st.caption(
+                f"fingerprint {rep['fingerprint']} • baris lengkap {schema_rep['rows_out']}/{schema_rep['rows_in']} • "
+                f"rename: {schema_rep['renamed'] or '-'} • kolom tak dikenal: {schema_rep['unknown_cols'] or '-'}"
+            )
+            if schema_rep["coerce_errors"]:
+                st.warning(f"Nilai gagal dikonversi ke angka (jadi kosong): {schema_rep['coerce_errors']}")
+
+            checks = pd.DataFrame(rep["checks"])
+            checks["status"] = np.where(checks["n"] == 0, "OK", np.where(checks["level"] == "error", "ERROR", "PERINGATAN"))
+            st.dataframe(
+                checks[["status", "aturan", "kolom", "n", "contoh_baris"]],
+                use_container_width=True,
+                hide_index=True
+            )
+
+
+    # =========================
+    # INSTRUMENTASI (span waktu, cache hit/miss, ukuran payload)
+    # =========================
+    st.write("")
+    st.markdown(
+        '<div class="card"><div class="card-title">Instrumentasi</div>'
+        '<div class="muted">Span per loader, halaman, dan panggilan berat • dihitung per proses sejak server start</div></div>',
+        unsafe_allow_html=True
+    )
+    st.write("")
 
+    i1, i2 = st.columns([3, 1], gap="small")
+    with i1:
+        # per sesi: render ulang folium untuk ukur payload hanya dibayar sesi yang mencentang
+        st.session_state.measure_payload = st.checkbox(
+            "Ukur ukuran payload (peta di-render ulang sekali tiap rerun)",
+            value=st.session_state.get("measure_payload", False)
+        )
+    with i2:
+        st.button("Reset metrik", on_click=perf.reset, use_container_width=True)
 
+    spans = pd.DataFrame(perf.span_table())
+    if spans.empty:
+        st.info("Belum ada span tercatat. Buka halaman lain dulu, lalu kembali ke ?page=diagnostik.")
+    else:
+        st.dataframe(spans.round(2), use_container_width=True, hide_index=True)
+
+    k1, k2 = st.columns(2, gap="small")
+    with k1:
+        st.caption("Cache (st.cache_data / st.cache_resource)")
+        st.dataframe(pd.DataFrame(perf.cache_table()), use_container_width=True, hide_index=True)
+    with k2:
+        st.caption("Payload (byte)")
+        if perf.payload_table():
+            st.dataframe(pd.DataFrame(perf.payload_table()), use_container_width=True, hide_index=True)
+        else:
+            st.caption("Centang \"Ukur ukuran payload\" lalu buka Peta / Epi.")
 
+    d1, d2 = st.columns(2, gap="small")
+    with d1:
+        st.download_button("Unduh metrik (Prometheus)", perf.prometheus(), "tbc_metrics.prom", "text/plain", use_container_width=True)
+    with d2:
+        st.download_button("Unduh trace (JSON)", perf.trace_json(), "tbc_trace.json", "application/json", use_container_width=True)
 
+perf.stop(page_span)
@@ -0,0 +1 @@
+"""Helper komputasi dashboard TBC (dipakai dashboarduas.py & uasepidem.py)."""
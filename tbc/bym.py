@@ -0,0 +1,293 @@
+"""
+Model BYM (Besag-York-Mollié) untuk pemetaan risiko, dengan aproksimasi Laplace.
+
+    y_i ~ Poisson(E_i · θ_i),   log θ_i = β0 + x_i'β + u_i + v_i
+    u ~ ICAR(τ_u) di graf ketetanggaan wilayah,   v ~ N(0, τ_v⁻¹ I)
+
+Untuk τ = (τ_u, τ_v) tertentu, mode field laten (β, u, v) dicari dengan Newton
+pada matriks presisi sparse H = Q(τ) + A' diag(μ) A; log p(y | τ) dihampiri
+Laplace. τ dipilih di mode posteriornya (empirical Bayes, prior log-gamma) dan
+posterior η_i diaproksimasi Gaussian di mode itu -> RR dan P(RR > c).
+Constraint sum(u) = 0 dipasang dengan conditioning by kriging (tanpa blok padat).
+
+Pola sparsity H tetap untuk semua τ dan iterasi Newton, jadi analisis simbolik /
+urutan fill-reducing dihitung sekali lalu dipakai ulang (CHOLMOD kalau
+scikit-sparse terpasang, selain itu SuperLU dengan urutan minimum degree tetap).
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.optimize import minimize
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import splu
+from scipy.special import gammaln
+from scipy.stats import norm
+
+from tbc.design import standardize
+
+try:                                        # opsional: faktorisasi Cholesky dengan analisis simbolik reusable
+    from sksparse.cholmod import analyze as _cholmod_analyze
+except ImportError:
+    _cholmod_analyze = None
+
+TAU_PRIOR = (1.0, 5e-4)                     # log-gamma(shape, rate) untuk τ_u dan τ_v
+BETA_PREC = 1e-4                            # prior efek tetap ~ N(0, 1e4)
+ICAR_EPS = 1e-5                             # diagonal kecil supaya H non-singular; sum(u) = 0 tetap dipaksakan
+
+
+# =========================
+# GRAF KETETANGGAAN DARI GEOJSON
+# =========================
+def polygon_adjacency(geo: dict, snap: float = 0.01) -> sp.csr_matrix:
+    """
+    Dua feature bertetangga kalau berbagi minimal satu titik batas setelah di-snap
+    ke grid `snap` derajat (toleran terhadap vertex yang tidak persis sama).
+    """
+    cells, owner = [], []
+    for i, ft in enumerate(geo["features"]):
+        g = ft.get("geometry") or {}
+        polys = [g["coordinates"]] if g.get("type") == "Polygon" else g.get("coordinates", [])
+        for poly in polys:
+            for ring in poly:
+                a = np.round(np.asarray(ring, dtype="float64")[:, :2] / snap).astype("int64")
+                cells.append(a[:, 0] * 100_000_000 + a[:, 1])
+                owner.append(np.full(len(a), i))
+    n = len(geo["features"])
+    if not cells:
+        return sp.csr_matrix((n, n))
+
+    pairs = np.unique(np.column_stack([np.concatenate(cells), np.concatenate(owner)]), axis=0)
+    key, own = pairs[:, 0], pairs[:, 1]
+    start = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    count = np.diff(np.r_[start, len(key)])
+    rows, cols = [], []
+    for s, c in zip(start[count > 1], count[count > 1]):
+        f = own[s:s + c]
+        r, q = np.meshgrid(f, f)
+        rows.append(r.ravel())
+        cols.append(q.ravel())
+    if not rows:
+        return sp.csr_matrix((n, n))
+    r, q = np.concatenate(rows), np.concatenate(cols)
+    keep = r != q
+    W = sp.csr_matrix((np.ones(keep.sum()), (r[keep], q[keep])), shape=(n, n))
+    W.data[:] = 1.0
+    return W
+
+
+def connect_graph(W: sp.spmatrix, coords: np.ndarray) -> sp.csr_matrix:
+    """
+    Sambungkan pulau/komponen terpisah ke komponen terdekat (jarak centroid),
+    supaya ICAR punya satu komponen. Node tanpa poligon (W baris nol) ikut tersambung.
+    """
+    W = sp.lil_matrix(W)
+    coords = np.asarray(coords, dtype="float64")
+    while True:
+        n_comp, lab = connected_components(W.tocsr(), directed=False)
+        if n_comp <= 1:
+            return W.tocsr()
+        # komponen terkecil -> pasangan titik terdekat di luar komponen itu
+        c = np.argmin(np.bincount(lab))
+        inside, outside = np.flatnonzero(lab == c), np.flatnonzero(lab != c)
+        d = np.hypot(*(coords[inside, None, :] - coords[None, outside, :]).transpose(2, 0, 1))
+        i, j = np.unravel_index(np.argmin(d), d.shape)
+        W[inside[i], outside[j]] = W[outside[j], inside[i]] = 1.0
+
+
+# =========================
+# FAKTORISASI SPARSE (pola tetap, dipakai ulang)
+# =========================
+class SparseFactor:
+    """Faktorisasi matriks SPD dengan pola sparsity tetap; analisis/urutan dihitung sekali."""
+
+    def __init__(self, pattern: sp.spmatrix):
+        """`pattern`: matriks SPD dengan pola sparsity yang sama dengan semua H berikutnya."""
+        pattern = sp.csc_matrix(pattern)
+        self.n_factor = 0
+        if _cholmod_analyze is not None:
+            self._sym = _cholmod_analyze(pattern)
+            self.perm = None
+        else:
+            # urutan minimum degree dari satu faktorisasi awal, lalu dipakai tetap (NATURAL)
+            self._sym = None
+            lu = splu(pattern, permc_spec="MMD_AT_PLUS_A", diag_pivot_thresh=0.0, options={"SymmetricMode": True})
+            self.perm = np.argsort(lu.perm_c)
+        self._f = None
+
+    def factor(self, H: sp.spmatrix):
+        H = sp.csc_matrix(H)
+        self.n_factor += 1
+        if self._sym is not None:
+            self._sym.cholesky_inplace(H)
+            self._f = self._sym
+        else:
+            p = self.perm
+            self._f = splu(H[p][:, p].tocsc(), permc_spec="NATURAL", diag_pivot_thresh=0.0,
+                           options={"SymmetricMode": True})
+        return self
+
+    def solve(self, b: np.ndarray) -> np.ndarray:
+        if self._sym is not None:
+            return self._f(b)
+        p = self.perm
+        out = np.empty_like(b, dtype="float64")
+        out[p] = self._f.solve(np.asarray(b, dtype="float64")[p])
+        return out
+
+    def logdet(self) -> float:
+        if self._sym is not None:
+            return float(self._f.logdet())
+        return float(np.log(np.abs(self._f.U.diagonal())).sum())
+
+
+# =========================
+# MODEL
+# =========================
+@dataclass
+class BYMResult:
+    rr_mean: np.ndarray            # E[θ_i | y] (lognormal dari η_i)
+    eta_mean: np.ndarray           # mean posterior log θ_i
+    eta_sd: np.ndarray
+    smr: np.ndarray                # y / E (rasio mentah)
+    expected: np.ndarray
+    beta: np.ndarray               # efek tetap (mode), skala asli
+    beta_sd: np.ndarray
+    names: list
+    tau_u: float
+    tau_v: float
+    frac_spatial: float            # porsi varians u dari total (u + v), di mode
+    log_marginal: float
+    n_factor: int                  # jumlah faktorisasi sparse yang dilakukan
+
+    def rr_interval(self, level: float = 0.95):
+        z = norm.ppf(0.5 + level / 2)
+        return np.exp(self.eta_mean - z * self.eta_sd), np.exp(self.eta_mean + z * self.eta_sd)
+
+    def exceedance(self, c: float = 1.0) -> np.ndarray:
+        """P(θ_i > c | y)."""
+        return norm.sf((np.log(c) - self.eta_mean) / self.eta_sd)
+
+
+class BYM:
+    """
+    y: kasus, E: kasus harapan (mis. populasi × rate nasional), W: adjacency (n × n),
+    X: kovariat opsional (n × q, tanpa konstanta; distandardisasi internal).
+    """
+
+    def __init__(self, y, E, W, X=None, names=None):
+        self.y = np.asarray(y, dtype="float64")
+        self.E = np.asarray(E, dtype="float64")
+        self.logE = np.log(self.E)
+        n = self.n = len(self.y)
+
+        q = 0 if X is None else np.asarray(X).shape[1]
+        if q:
+            Xs, self.mean, self.sd, _ = standardize(X)
+            Z = np.column_stack([np.ones(n), Xs])
+        else:
+            Z = np.ones((n, 1))
+        self.p = Z.shape[1]
+        self.names = ["Intercept"] + list(names or [f"x{i + 1}" for i in range(q)])
+
+        W = sp.csr_matrix(W)
+        self.R = (sp.diags(np.asarray(W.sum(axis=1)).ravel()) - W).tocsr()      # struktur ICAR
+        I = sp.identity(n, format="csr")
+        # x = [u, v, β] (β di akhir: kolom padat tidak merusak fill-in)
+        self.A = sp.hstack([I, I, sp.csr_matrix(Z)]).tocsr()
+        self.AT = self.A.T.tocsr()
+        self.Z = Z
+
+        pattern = self._Q(1.0, 1.0) + self.AT @ self.A
+        self.fac = SparseFactor(pattern)
+        self.c = np.r_[np.ones(n), np.zeros(n + self.p)]        # constraint sum(u) = 0
+        self.x = np.zeros(2 * n + self.p)
+        self.x[2 * n] = np.log(max(self.y.sum(), 1e-9) / self.E.sum())
+
+    def _Q(self, tau_u, tau_v):
+        n = self.n
+        return sp.block_diag([
+            tau_u * (self.R + ICAR_EPS * sp.identity(n)),
+            tau_v * sp.identity(n),
+            BETA_PREC * sp.identity(self.p),
+        ], format="csc")
+
+    def _mode(self, tau_u, tau_v, maxiter: int = 50, tol: float = 1e-8):
+        """Newton untuk mode field laten; mulai dari mode τ sebelumnya (warm start)."""
+        Q = self._Q(tau_u, tau_v)
+        x = self.x.copy()
+        for _ in range(maxiter):
+            eta = self.logE + self.A @ x
+            mu = np.exp(np.clip(eta, -30, 30))
+            H = Q + self.AT @ sp.diags(mu) @ self.A
+            g = self.AT @ (self.y - mu) - Q @ x
+            x_new = self._constrain(x + self.fac.factor(H).solve(g))
+            done = np.max(np.abs(x_new - x)) < tol
+            x = x_new
+            if done:
+                break
+        eta = self.logE + self.A @ x
+        mu = np.exp(np.clip(eta, -30, 30))
+        H = Q + self.AT @ sp.diags(mu) @ self.A
+        self.fac.factor(H)
+        self.x = x
+        return x, mu, Q
+
+    def _constrain(self, x):
+        """Conditioning by kriging: proyeksikan x ke sum(u) = 0 memakai faktor H saat ini."""
+        Hc = self.fac.solve(self.c)
+        return x - Hc * (self.c @ x) / (self.c @ Hc)
+
+    def log_marginal(self, log_tau) -> float:
+        """Laplace: log p(y|x*) + log p(x*|τ) - ½ log|H| + log prior(τ) (konstanta dibuang)."""
+        tau_u, tau_v = np.exp(log_tau)
+        x, mu, Q = self._mode(tau_u, tau_v)
+        n = self.n
+        ll = float((self.y * np.log(mu) - mu - gammaln(self.y + 1)).sum())
+        logdet_q = (n - 1) * np.log(tau_u) + n * np.log(tau_v)                # ICAR rank n-1
+        prior_x = 0.5 * logdet_q - 0.5 * float(x @ (Q @ x))
+        a, b = TAU_PRIOR
+        prior_tau = float(sum(a * lt - b * np.exp(lt) for lt in log_tau))       # log-gamma pada log τ
+        return ll + prior_x - 0.5 * self.fac.logdet() + prior_tau
+
+    def fit(self, start=(0.0, 0.0)) -> BYMResult:
+        opt = minimize(lambda t: -self.log_marginal(t), np.asarray(start, dtype="float64"),
+                       method="Nelder-Mead", options={"xatol": 1e-3, "fatol": 1e-4, "maxiter": 400})
+        tau_u, tau_v = np.exp(opt.x)
+        lm = self.log_marginal(opt.x)                                            # mode + faktor di τ*
+
+        n, p = self.n, self.p
+        x = self.x
+        # var η_i = a_i' H⁻¹ a_i dikurangi koreksi constraint (a_i' H⁻¹ c)² / c' H⁻¹ c
+        Ad = self.A.toarray()
+        Hc = self.fac.solve(self.c)
+        S = self.fac.solve(Ad.T)
+        eta_var = np.einsum("ij,ji->i", Ad, S) - (Ad @ Hc) ** 2 / (self.c @ Hc)
+        eta = self.A @ x
+        beta_s = x[2 * n:]
+        cov_b = self.fac.solve(np.eye(2 * n + p)[:, 2 * n:])[2 * n:] - np.outer(Hc[2 * n:], Hc[2 * n:]) / (self.c @ Hc)
+
+        if p > 1:                                                                # balik ke skala asli X
+            T = np.diag(np.r_[1.0, 1 / self.sd])
+            T[0, 1:] = -self.mean / self.sd
+        else:
+            T = np.eye(1)
+        beta = T @ beta_s
+        beta_sd = np.sqrt(np.clip(np.diag(T @ cov_b @ T.T), 0, None))
+
+        u, v = x[:n], x[n:2 * n]
+        return BYMResult(
+            rr_mean=np.exp(eta + eta_var / 2),
+            eta_mean=eta,
+            eta_sd=np.sqrt(np.clip(eta_var, 0, None)),
+            smr=self.y / self.E,
+            expected=self.E,
+            beta=beta,
+            beta_sd=beta_sd,
+            names=self.names,
+            tau_u=float(tau_u),
+            tau_v=float(tau_v),
+            frac_spatial=float(np.var(u) / max(np.var(u) + np.var(v), 1e-300)),
+            log_marginal=float(lm),
+            n_factor=self.fac.n_factor,
+        )
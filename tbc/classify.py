@@ -0,0 +1,140 @@
+import numpy as np
+
+from tbc.fmt import fmt_float_col
+
+
+# =========================
+# KLASIFIKASI NILAI UNTUK CHOROPLETH (batas kelas = array naik, bins[0]=min, bins[-1]=max)
+# Kelas i = (bins[i], bins[i+1]], kelas 0 ikut memuat min: batas dalam = nilai teratas
+# kelasnya (seperti Jenks) -> tbc.geo.color_index memakai konvensi yang sama.
+# =========================
+def _finite(values) -> np.ndarray:
+    v = np.asarray(values, dtype="float64").ravel()
+    return v[np.isfinite(v)]
+
+
+def _edges(v: np.ndarray, inner) -> np.ndarray:
+    """
+    Rapikan batas: tambah min/max, buang duplikat & yang di luar rentang.
+    Batas dalam = min tetap dipakai: kelas 0 berisi tepat nilai min (kelas satu nilai).
+    """
+    lo, hi = float(v.min()), float(v.max())
+    if hi <= lo:
+        return np.array([lo, lo + 1.0])
+    inner = np.asarray(inner, dtype="float64")
+    inner = np.unique(inner[(inner >= lo) & (inner < hi)])
+    return np.concatenate([[lo], inner, [hi]])
+
+
+def equal_interval(v: np.ndarray, k: int) -> np.ndarray:
+    return _edges(v, np.linspace(v.min(), v.max(), k + 1)[1:-1])
+
+
+def quantile(v: np.ndarray, k: int) -> np.ndarray:
+    return _edges(v, np.quantile(v, np.linspace(0, 1, k + 1)[1:-1]))
+
+
+def std_dev(v: np.ndarray, k: int) -> np.ndarray:
+    """Kelas selebar 1 SD, berpusat di rata-rata (kelas ujung menampung sisanya)."""
+    mu, sd = float(v.mean()), float(v.std())
+    if sd == 0:
+        return _edges(v, [])
+    return _edges(v, mu + sd * (np.arange(1, k) - k / 2))
+
+
+def head_tail(v: np.ndarray, k: int, head_share: float = 0.4) -> np.ndarray:
+    """Head/tail breaks (Jiang 2013): belah di rata-rata selama 'kepala' < 40% data."""
+    inner, cur = [], v
+    while len(inner) < k - 1 and cur.size > 1:
+        m = float(cur.mean())
+        head = cur[cur > m]
+        if head.size == 0 or head.size / cur.size > head_share:
+            break
+        inner.append(m)
+        cur = head
+    return _edges(v, inner)
+
+
+def jenks(v: np.ndarray, k: int, max_n: int = 20000, seed: int = 0) -> np.ndarray:
+    """
+    Natural breaks (Fisher-Jenks): DP minimum jumlah kuadrat dalam kelas, exact.
+    Biaya segmen O(1) dari prefix sum; tiap lapisan DP pakai divide & conquer
+    (argmin monoton) yang diproses per level secara vectorized -> O(k·n·log n).
+    Di atas `max_n` nilai unik dipakai sampel (batas kelas hampir tidak berubah).
+    """
+    x = np.sort(v)
+    if x.size > max_n:
+        x = np.sort(np.random.default_rng(seed).choice(x, max_n, replace=False))
+    n = x.size
+    k = min(k, np.unique(x).size)
+    if k <= 1:
+        return _edges(v, [])
+
+    s1 = np.concatenate([[0.0], np.cumsum(x)])
+    s2 = np.concatenate([[0.0], np.cumsum(x * x)])
+
+    def cost(m, i):                                   # SSE x[m:i]
+        c = i - m
+        return s2[i] - s2[m] - (s1[i] - s1[m]) ** 2 / c
+
+    # D[i] = SSE optimal untuk x[:i] dengan j+1 kelas; arg[j][i] = awal kelas terakhir
+    D = np.full(n + 1, np.inf)
+    D[1:] = cost(np.zeros(n, dtype=np.int64), np.arange(1, n + 1))
+    args = []
+    for j in range(1, k):
+        newD = np.full(n + 1, np.inf)
+        arg = np.zeros(n + 1, dtype=np.int64)
+        # tugas: (lo, hi, optlo, opthi) untuk i di [lo, hi], kandidat m di [optlo, opthi]
+        tasks = np.array([[j + 1, n, j, n - 1]], dtype=np.int64)
+        while tasks.size:
+            lo, hi, olo, ohi = tasks.T
+            mid = (lo + hi) // 2
+            cand_hi = np.minimum(ohi, mid - 1)
+            lens = cand_hi - olo + 1
+            tid = np.repeat(np.arange(len(tasks)), lens)
+            m = olo[tid] + (np.arange(lens.sum()) - np.repeat(np.cumsum(lens) - lens, lens))
+            i = mid[tid]
+            val = D[m] + cost(m, i)
+            # argmin per tugas (kandidat pertama yang minimum)
+            order = np.lexsort((m, val, tid))
+            first = order[np.r_[0, np.flatnonzero(np.diff(tid[order])) + 1]]
+            best = m[first]
+            newD[mid] = val[first]
+            arg[mid] = best
+
+            left = np.column_stack([lo, mid - 1, olo, best])
+            right = np.column_stack([mid + 1, hi, best, ohi])
+            tasks = np.vstack([left[left[:, 0] <= left[:, 1]], right[right[:, 0] <= right[:, 1]]])
+        D = newD
+        args.append(arg)
+
+    # telusur balik: awal tiap kelas -> batas = nilai terakhir kelas sebelumnya
+    cuts, i = [], n
+    for arg in reversed(args):
+        i = int(arg[i])
+        cuts.append(i)
+    inner = [x[c - 1] for c in sorted(cuts)]
+    return _edges(v, inner)
+
+
+METHODS = {
+    "Jenks (natural breaks)": jenks,
+    "Kuantil": quantile,
+    "Interval sama": equal_interval,
+    "Standar deviasi": std_dev,
+    "Head/tail": head_tail,
+}
+
+
+def classify(values, method: str = "Jenks (natural breaks)", k: int = 6) -> np.ndarray:
+    """Batas kelas untuk `values` (NaN diabaikan). Jumlah kelas bisa < k kalau data sedikit."""
+    v = _finite(values)
+    if v.size == 0:
+        return np.linspace(0.0, 1.0, k + 1)
+    return METHODS[method](v, k)
+
+
+def class_labels(bins, d: int = 1) -> list:
+    """Label teks per kelas: '1.234,5 – 2.345,6' (dipakai tooltip, sama dengan legenda)."""
+    txt = fmt_float_col(bins, d)
+    return [f"{a} – {b}" for a, b in zip(txt[:-1], txt[1:])]
@@ -0,0 +1,54 @@
+"""
+Diagnostik multikolinearitas kovariat dari satu dekomposisi.
+
+- VIF semua kovariat sekaligus: VIF_j = [R⁻¹]_jj, R = matriks korelasi
+  (setara 1/(1 − R²_j) regresi bantu, tanpa k regresi).
+- Indeks kondisi (Belsley): kolom X (termasuk konstanta) diskalakan ke panjang 1,
+  SVD X = U S Vᵀ, η_k = s_max / s_k; proporsi dekomposisi varians
+  π_kj = (v_jk² / s_k²) / Σ_k (v_jk² / s_k²). η > 30 dengan ≥ 2 proporsi > 0.5 = masalah.
+Biaya O(n·q² + q³), jadi puluhan kandidat kovariat tetap milidetik.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class Collinearity:
+    names: list                         # kovariat (tanpa intersep)
+    corr: np.ndarray                    # (q, q)
+    vif: np.ndarray                     # (q,)
+    cond_index: np.ndarray              # (q+1,) naik
+    var_prop: np.ndarray                # (q+1, q+1) baris = dimensi, kolom = [Intercept] + names
+
+    @property
+    def condition_number(self) -> float:
+        return float(self.cond_index[-1])
+
+
+def collinearity(X, names=None) -> Collinearity:
+    """X = kovariat (n, q) tanpa kolom konstanta."""
+    X = np.asarray(X, dtype="float64")
+    n, q = X.shape
+    names = list(names or [f"x{j + 1}" for j in range(q)])
+
+    sd = X.std(axis=0)
+    ok = sd > 0
+    Z = (X - X.mean(axis=0)) / np.where(ok, sd, 1.0)
+    corr = (Z.T @ Z) / n
+    corr[~ok, :] = corr[:, ~ok] = np.nan                # kolom konstan: korelasi tak terdefinisi
+    vif = np.full(q, np.nan)
+    vif[ok] = np.diag(np.linalg.pinv(corr[np.ix_(ok, ok)]))
+
+    Xc = np.column_stack([np.ones(n), X])
+    Xc = Xc / np.linalg.norm(Xc, axis=0).clip(1e-300)
+    _, s, Vt = np.linalg.svd(Xc, full_matrices=False)   # s turun -> indeks kondisi naik
+    s = np.clip(s, 1e-300, None)
+    phi = (Vt.T / s) ** 2                               # (kolom, dimensi)
+    return Collinearity(
+        names=names,
+        corr=corr,
+        vif=vif,
+        cond_index=s[0] / s,
+        var_prop=(phi / phi.sum(axis=1, keepdims=True)).T,
+    )
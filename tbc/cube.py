@@ -0,0 +1,116 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+
+# =========================
+# KUBUS AGREGAT (in-process, kolumnar, tanpa server)
+# =========================
+DIMS = ("provinsi", "tahun", "umur", "jk")
+MEASURES = ("populasi", "jumlah_tbc")
+ALL = "Semua"   # label untuk dimensi yang tidak ada di data
+
+
+class Cube:
+    """
+    Kubus padat provinsi × tahun × umur × jk untuk tiap measure (float64).
+    Semua rollup (2^4 kombinasi dimensi) dihitung sekali waktu build,
+    jadi query = indexing array + sum kecil, bukan groupby ulang tiap rerun.
+    """
+
+    def __init__(self, labels: dict, cells: dict, attrs: pd.DataFrame):
+        self.labels = labels                              # dim -> np.ndarray label
+        self.pos = {d: {v: i for i, v in enumerate(labels[d])} for d in DIMS}
+        self.attrs = attrs                                # atribut per provinsi (kepadatan, dst)
+        self.rollups = {}
+        for r in range(len(DIMS) + 1):
+            for keep in combinations(range(len(DIMS)), r):
+                drop = tuple(i for i in range(len(DIMS)) if i not in keep)
+                self.rollups[keep] = {m: cells[m].sum(axis=drop) for m in cells}
+
+    @property
+    def provinces(self) -> np.ndarray:
+        return self.labels["provinsi"]
+
+    def latest(self, dim: str = "tahun"):
+        lab = self.labels[dim]
+        return None if len(lab) == 1 and lab[0] == ALL else lab.max()
+
+    def _index(self, dim: str, value):
+        if isinstance(value, (list, tuple, np.ndarray, pd.Index)):
+            return [self.pos[dim][v] for v in value]
+        return [self.pos[dim][value]]
+
+    def query(self, measure: str, by=(), **where):
+        """
+        Contoh: cube.query("jumlah_tbc", by=("provinsi",), tahun=2024)
+        -> array per provinsi. Tanpa `by` -> skalar.
+        Filter boleh skalar, list label, atau mask boolean (untuk provinsi).
+        """
+        by = tuple(by)
+        used = tuple(sorted({DIMS.index(d) for d in by + tuple(where)}))
+        arr = self.rollups[used][measure]
+
+        idx = []
+        for ax in used:
+            d = DIMS[ax]
+            if d in where:
+                w = where[d]
+                if isinstance(w, np.ndarray) and w.dtype == bool:
+                    idx.append(np.flatnonzero(w))
+                else:
+                    idx.append(self._index(d, w))
+            else:
+                idx.append(np.arange(arr.shape[used.index(ax)]))
+        arr = arr[np.ix_(*idx)] if idx else arr
+
+        sum_axes = tuple(i for i, ax in enumerate(used) if DIMS[ax] not in by)
+        out = arr.sum(axis=sum_axes) if sum_axes else arr
+        return float(out) if np.ndim(out) == 0 else out
+
+    def rate_100k(self, by=(), **where):
+        pop = self.query("populasi", by=by, **where)
+        cas = self.query("jumlah_tbc", by=by, **where)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(np.asarray(pop) > 0, np.asarray(cas) / pop * 100000, np.nan)
+
+
+def build_cube(df: pd.DataFrame, measures=MEASURES, attr_cols=("kepadatan",)) -> Cube:
+    """
+    Bangun kubus dari tabel baris (provinsi-level atau line-list teragregasi).
+    Satu kali np.bincount per measure di atas index datar -> skala ke puluhan juta baris.
+    Baris dengan NA di dimensi yang ada (tahun/umur/jk) dibuang: tidak punya sel di kubus.
+    `attrs` = satu nilai per provinsi; kalau ada kolom tahun, diambil dari tahun terakhir
+    yang terisi (atribut seperti kepadatan bisa berubah antar tahun, dashboard memakai
+    tahun terakhir).
+    """
+    df = df.dropna(subset=[d for d in DIMS if d in df.columns] + list(measures))
+
+    codes, labels = [], {}
+    for d in DIMS:
+        if d in df.columns:
+            c, lab = pd.factorize(df[d], sort=True)
+        else:
+            c, lab = np.zeros(len(df), dtype="int64"), pd.Index([ALL])
+        codes.append(c)
+        labels[d] = np.asarray(lab)
+
+    shape = tuple(len(labels[d]) for d in DIMS)
+    flat = np.ravel_multi_index(codes, shape)
+    size = int(np.prod(shape))
+    cells = {
+        m: np.bincount(flat, weights=df[m].to_numpy(dtype="float64"), minlength=size).reshape(shape)
+        for m in measures
+    }
+
+    present = [c for c in attr_cols if c in df.columns]
+    src = df.assign(_p=codes[0])
+    if "tahun" in df.columns:
+        src = src.sort_values("tahun", kind="stable")
+    attrs = (
+        src.groupby("_p")[present].last()
+          .reindex(range(shape[0]))
+          .set_index(pd.Index(labels["provinsi"], name="provinsi"))
+    )
+    return Cube(labels, cells, attrs)
@@ -0,0 +1,165 @@
+"""
+Validasi silang model NB2 (link log, α tetap = α model penuh).
+
+Skema: leave-one-out (satu provinsi keluar) atau k-fold. Tiap fold: fit di
+data latih, prediksi μ untuk data uji, lalu dihitung deviance, MAE, dan
+cakupan interval prediktif 95% NB(μ, α).
+
+Dua mode:
+  - "exact": refit IRLS per fold (warm start β penuh), fold dibagi ke process
+    pool mulai `parallel_min` baris×fold (di bawah itu serial lebih cepat).
+  - "onestep": satu langkah Newton dari β penuh memakai Hessian (informasi
+    observed) data penuh dikurangi kontribusi fold: β₋S ≈ β − (H − H_S)⁻¹ X_S' r_S.
+    Untuk LOO ini jadi rumus pengaruh tertutup (Sherman–Morrison), tanpa refit.
+    Hessian observed, bukan Fisher: pada data provinsi error-nya ~10× lebih kecil.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+
+import numpy as np
+from scipy.stats import nbinom
+
+
+def nb_deviance(y, mu, alpha: float) -> np.ndarray:
+    """Deviance unit NB2 (sama dengan statsmodels NegativeBinomial(alpha))."""
+    y = np.asarray(y, dtype="float64")
+    mu = np.asarray(mu, dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(y > 0, y * np.log(y / mu), 0.0)
+    return 2 * (t - (y + 1 / alpha) * np.log((1 + alpha * y) / (1 + alpha * mu)))
+
+
+def nb_interval(mu, alpha: float, level: float = 0.95):
+    """Interval prediktif NB2 (kuantil diskret) untuk tiap μ."""
+    r = 1 / alpha
+    p = r / (r + np.asarray(mu, dtype="float64"))
+    q = (1 - level) / 2
+    return nbinom.ppf(q, r, p), nbinom.ppf(1 - q, r, p)
+
+
+def nb_irls(y, X, alpha: float, offset=None, beta0=None, maxiter: int = 100, tol: float = 1e-8) -> np.ndarray:
+    """β NB2 GLM (α tetap) via IRLS; cukup untuk refit fold kecil tanpa statsmodels."""
+    offset = np.zeros(len(y)) if offset is None else offset
+    b = np.zeros(X.shape[1]) if beta0 is None else np.array(beta0, dtype="float64")
+    if beta0 is None:
+        b[0] = np.log(max(y.mean(), 1e-9)) - offset.mean()
+    for _ in range(maxiter):
+        eta = X @ b + offset
+        mu = np.exp(np.clip(eta, -30, 30))
+        w = mu / (1 + alpha * mu)
+        z = eta - offset + (y - mu) / mu
+        b_new = np.linalg.solve(X.T @ (X * w[:, None]), X.T @ (w * z))
+        done = np.max(np.abs(b_new - b)) < tol
+        b = b_new
+        if done:
+            break
+    return b
+
+
+def folds(n: int, k: int = None, seed: int = 0) -> np.ndarray:
+    """Label fold per baris: LOO kalau k None / k >= n, selain itu k-fold acak (ukuran seimbang)."""
+    if k is None or k >= n:
+        return np.arange(n)
+    return np.random.default_rng(seed).permutation(np.arange(n) % k)
+
+
+def _refit_folds(args):
+    """args = (fold_ids, labels, y, X, offset, alpha, beta). Return μ prediksi untuk baris fold-fold tsb."""
+    fold_ids, labels, y, X, offset, alpha, beta = args
+    out = []
+    for f in fold_ids:
+        test = labels == f
+        b = nb_irls(y[~test], X[~test], alpha, offset[~test], beta0=beta)
+        out.append((test, np.exp(X[test] @ b + offset[test])))
+    return out
+
+
+@dataclass
+class CVResult:
+    scheme: str                         # "LOO" | "5-fold" | ...
+    mode: str                           # "exact" | "onestep"
+    mu: np.ndarray                      # (n,) prediksi out-of-fold
+    deviance: float                     # total deviance out-of-fold
+    mae: float
+    coverage: float                     # proporsi y di interval prediktif 95%
+    lo: np.ndarray
+    hi: np.ndarray
+    n_folds: int
+    seconds: float
+
+
+class NBCrossValidator:
+    """CV untuk NB2 dengan design (X termasuk konstanta), α tetap, dan β model penuh."""
+
+    def __init__(self, y, X, alpha: float, beta, offset=None, workers: int = None, parallel_min: int = 20000):
+        self.y = np.asarray(y, dtype="float64")
+        self.X = np.ascontiguousarray(X, dtype="float64")
+        self.n, self.p = self.X.shape
+        self.alpha = float(alpha)
+        self.beta = np.asarray(beta, dtype="float64")
+        self.offset = np.zeros(self.n) if offset is None else np.asarray(offset, dtype="float64")
+        self.workers = workers or os.cpu_count() or 1
+        self.parallel_min = parallel_min
+
+        # besaran data penuh (dipakai ulang semua fold mode onestep)
+        self.mu = np.exp(self.X @ self.beta + self.offset)
+        self.r = (self.y - self.mu) / (1 + self.alpha * self.mu)      # kontribusi skor: X' r
+        self.w = self.mu * (1 + self.alpha * self.y) / (1 + self.alpha * self.mu) ** 2   # bobot Hessian observed
+        self.hess = self.X.T @ (self.X * self.w[:, None])
+
+    def _onestep(self, labels) -> np.ndarray:
+        X, Xb = self.X, self.X @ self.beta + self.offset
+        if np.unique(labels).size == self.n:
+            # LOO tertutup: Δβ_i = −H⁻¹ x_i r_i / (1 − h_i),  h_i = w_i x_i' H⁻¹ x_i
+            A = np.linalg.solve(self.hess, X.T).T                     # (n, p) baris = H⁻¹ x_i
+            q = np.einsum("ij,ij->i", X, A)                           # x_i' H⁻¹ x_i
+            return np.exp(Xb - q * self.r / (1 - self.w * q))
+        eta = np.empty(self.n)
+        for f in np.unique(labels):
+            t = labels == f
+            Xt = X[t]
+            H_S = Xt.T @ (Xt * self.w[t, None])
+            d = np.linalg.solve(self.hess - H_S, Xt.T @ self.r[t])
+            eta[t] = Xb[t] - Xt @ d
+        return np.exp(eta)
+
+    def _exact(self, labels) -> np.ndarray:
+        ids = np.unique(labels)
+        pool = None
+        if self.workers > 1 and self.n * ids.size >= self.parallel_min:
+            # spawn: aman dipanggil dari proses server yang punya banyak thread
+            pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"))
+        jobs = [(chunk, labels, self.y, self.X, self.offset, self.alpha, self.beta)
+                for chunk in np.array_split(ids, min(len(ids), self.workers * 4 if pool else 1))]
+        try:
+            parts = list(pool.map(_refit_folds, jobs)) if pool is not None else [_refit_folds(j) for j in jobs]
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        mu = np.empty(self.n)
+        for part in parts:
+            for test, m in part:
+                mu[test] = m
+        return mu
+
+    def run(self, k: int = None, mode: str = "onestep", seed: int = 0) -> CVResult:
+        t0 = time.perf_counter()
+        labels = folds(self.n, k, seed)
+        mu = self._onestep(labels) if mode == "onestep" else self._exact(labels)
+        lo, hi = nb_interval(mu, self.alpha)
+        n_folds = int(np.unique(labels).size)
+        return CVResult(
+            scheme="LOO" if n_folds == self.n else f"{n_folds}-fold",
+            mode=mode,
+            mu=mu,
+            deviance=float(nb_deviance(self.y, mu, self.alpha).sum()),
+            mae=float(np.mean(np.abs(self.y - mu))),
+            coverage=float(np.mean((self.y >= lo) & (self.y <= hi))),
+            lo=lo,
+            hi=hi,
+            n_folds=n_folds,
+            seconds=time.perf_counter() - t0,
+        )
@@ -0,0 +1,132 @@
+"""
+Design matrix model count (y, X) yang dikompilasi sekali per (data, formula).
+
+Formula aditif sederhana ("y ~ x1 + x2 + x3", opsional "- 1" / "+ 0") dibangun
+langsung dari kolom DataFrame tanpa parser; formula lain (C(), I(), interaksi)
+jatuh ke patsy. Hasilnya array float64 C-contiguous + metadata (nama kolom,
+baris yang dipakai), jadi Poisson / NB-MLE / NB-GLM / GWR-NB memakai matriks
+yang sama. Varian terpusat & terstandardisasi dihitung sekali per Design.
+"""
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+@lru_cache(maxsize=64)
+def parse_formula(formula: str):
+    """
+    "y ~ x1 + x2" -> ("y", ("x1", "x2"), True). Return None kalau bukan formula
+    aditif nama kolom polos (pemanggil pakai patsy).
+    """
+    if formula.count("~") != 1:
+        return None
+    lhs, rhs = (s.strip() for s in formula.split("~"))
+    if not _NAME.match(lhs):
+        return None
+    terms, intercept = [], True
+    for tok in re.split(r"\s*(?=[+-])", rhs.strip()):
+        tok = tok.replace(" ", "")
+        if not tok:
+            continue
+        sign, name = ("-", tok[1:]) if tok[0] == "-" else ("+", tok.lstrip("+"))
+        if name in ("0", "1"):
+            intercept = (sign == "+") == (name == "1")
+        elif sign == "+" and _NAME.match(name):
+            if name not in terms:
+                terms.append(name)
+        else:
+            return None
+    return lhs, tuple(terms), intercept
+
+
+def standardize(X: np.ndarray, center: bool = True, scale: bool = True):
+    """
+    Kolom X (tanpa konstanta) -> (Z, mean, sd, T) dengan Z = (X - mean) / sd dan
+    T matriks balik (p+1, p+1) untuk β dengan intersep: β_asli = T β_Z.
+    sd = 0 diganti 1 supaya kolom konstan tidak jadi NaN.
+    """
+    X = np.asarray(X, dtype="float64")
+    q = X.shape[1]
+    mean = X.mean(axis=0) if center else np.zeros(q)
+    sd = X.std(axis=0) if scale else np.ones(q)
+    sd = np.where(sd > 0, sd, 1.0)
+    Z = np.ascontiguousarray((X - mean) / sd)
+    T = np.diag(np.r_[1.0, 1 / sd])
+    T[0, 1:] = -mean / sd
+    return Z, mean, sd, T
+
+
+@dataclass
+class Design:
+    formula: str
+    y: np.ndarray                       # (n,) float64
+    X: np.ndarray                       # (n, p) float64 C-contiguous, kolom konstanta (kalau ada) di depan
+    names: list                         # nama kolom X (statsmodels: "Intercept", "x1", ...)
+    y_name: str
+    rows: pd.Index                      # index baris DataFrame asal yang lolos (tanpa NA)
+    _variants: dict = field(default_factory=dict, repr=False)
+
+    @property
+    def n(self) -> int:
+        return self.X.shape[0]
+
+    @property
+    def has_intercept(self) -> bool:
+        return bool(self.names) and self.names[0] == "Intercept"
+
+    @property
+    def covariates(self) -> np.ndarray:
+        """X tanpa kolom konstanta (view)."""
+        return self.X[:, 1:] if self.has_intercept else self.X
+
+    def frames(self):
+        """(y Series, X DataFrame) berbagi buffer array -> statsmodels tetap dapat nama parameter."""
+        return (pd.Series(self.y, index=self.rows, name=self.y_name),
+                pd.DataFrame(self.X, index=self.rows, columns=self.names, copy=False))
+
+    def column(self, df: pd.DataFrame, col: str) -> np.ndarray:
+        """Kolom lain (mis. offset) dari DataFrame asal, sejajar dengan baris design."""
+        return df.loc[self.rows, col].to_numpy(dtype="float64")
+
+    def _variant(self, center: bool, scale: bool):
+        key = (center, scale)
+        if key not in self._variants:
+            Z, mean, sd, T = standardize(self.covariates, center, scale)
+            Xv = np.ascontiguousarray(np.column_stack([np.ones(self.n), Z])) if self.has_intercept else Z
+            self._variants[key] = {"X": Xv, "mean": mean, "sd": sd, "T": T}
+        return self._variants[key]
+
+    def centered(self) -> dict:
+        """{"X", "mean", "sd", "T"}: kovariat dikurangi rata-rata (cache per Design)."""
+        return self._variant(True, False)
+
+    def standardized(self) -> dict:
+        """{"X", "mean", "sd", "T"}: kovariat z-score (cache per Design); β_asli = T β."""
+        return self._variant(True, True)
+
+
+def build_design(df: pd.DataFrame, formula: str) -> Design:
+    """Kompilasi formula ke Design; baris dengan NA di kolom yang dipakai dibuang (seperti patsy)."""
+    parsed = parse_formula(formula)
+    if parsed is not None and all(c in df.columns for c in (parsed[0],) + parsed[1]):
+        lhs, terms, intercept = parsed
+        num = df[[lhs, *terms]].apply(pd.to_numeric, errors="coerce").to_numpy(dtype="float64")
+        ok = np.isfinite(num).all(axis=1)
+        num = num[ok]
+        X = np.empty((num.shape[0], len(terms) + intercept), dtype="float64")
+        if intercept:
+            X[:, 0] = 1.0
+        X[:, int(intercept):] = num[:, 1:]
+        return Design(formula, np.ascontiguousarray(num[:, 0]), X,
+                      (["Intercept"] if intercept else []) + list(terms), lhs, df.index[ok])
+
+    import patsy
+
+    y, X = patsy.dmatrices(formula, df, return_type="dataframe")
+    return Design(formula, np.ascontiguousarray(y.iloc[:, 0].to_numpy(dtype="float64")),
+                  np.ascontiguousarray(X.to_numpy(dtype="float64")), list(X.columns), y.columns[0], X.index)
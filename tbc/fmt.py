@@ -0,0 +1,104 @@
+import numpy as np
+
+
+# =========================
+# FORMAT ANGKA INDONESIA (titik ribuan, koma desimal), SEKALI JALAN PER KOLOM
+# =========================
+NA = "-"
+_POW10 = 10 ** np.arange(1, 19, dtype="int64")
+_MAX_EXACT = 2.0 ** 53                                # |x|·10^d di atas ini tidak lagi bilangan bulat eksak
+_SP, _DOT, _COMMA, _MINUS, _ZERO = (ord(c) for c in " .,-0")
+_SWAP = str.maketrans(",.", ".,")                     # format Python (1,234.5) -> Indonesia (1.234,5)
+
+
+def fmt_float_col(values, d: int = 1, na: str = NA) -> np.ndarray:
+    """
+    Array angka -> array string '1.234.567,8'. NaN/inf -> `na`.
+
+    Tidak ada format per sel: digit ditulis kolom demi kolom ke matriks
+    karakter (n × lebar), lalu dibaca sebagai array string fixed-width.
+    Pembulatan sama persis dengan format Python (f"{x:,.{d}f}", fmt_int: round()):
+    |x|·10^d yang terlalu dekat ke batas ,5 (selisih di bawah galat perkalian float) atau
+    di atas 2^53 diformat per sel dengan Python; sisanya aman dibulatkan vectorized.
+    """
+    x = np.asarray(values, dtype="float64")
+    ok = np.isfinite(x)
+    with np.errstate(over="ignore", invalid="ignore"):
+        p = np.abs(x) * 10.0 ** d
+        frac = p - np.floor(p)
+    # galat relatif p ≤ 2^-53; margin 1e-15·p aman -> sisi pembulatan pasti sama dengan nilai desimal eksak
+    slow = ok & ((p >= _MAX_EXACT) | (np.abs(frac - 0.5) <= p * 1e-15))
+    scaled = np.where(ok & ~slow, np.round(p), 0).astype("int64")
+    ip, fp = np.divmod(scaled, 10 ** d)
+    n_dig = 1 + np.searchsorted(_POW10, ip, side="right")
+
+    D = int(n_dig.max(initial=1))
+    tail = d + 1 if d else 0                          # ",dd"
+    W = 1 + D + (D - 1) // 3 + tail                   # +1 untuk tanda minus
+    mat = np.full((len(x), W), _SP, dtype="uint32")   # uint32 = satu code point UCS-4
+
+    col = W - 1
+    rest = fp
+    for _ in range(d):
+        rest, r = np.divmod(rest, 10)
+        mat[:, col] = r + _ZERO
+        col -= 1
+    if d:
+        mat[:, col] = _COMMA
+        col -= 1
+
+    rest = ip
+    for k in range(D):
+        if k and k % 3 == 0:
+            mat[:, col] = np.where(n_dig > k, _DOT, _SP)
+            col -= 1
+        rest, r = np.divmod(rest, 10)
+        mat[:, col] = np.where(k < n_dig, r + _ZERO, _SP)
+        col -= 1
+
+    # seperti Python: "-0,0" untuk negatif kecil kalau d > 0, round() (d = 0) tanpa tanda
+    neg = np.flatnonzero(ok & (np.signbit(x) if d else (x < 0) & (scaled > 0)))
+    lead = W - (n_dig + (n_dig - 1) // 3 + tail)      # kolom digit pertama
+    mat[neg, lead[neg] - 1] = _MINUS
+
+    s = np.char.lstrip(mat.view(f"U{W}").ravel())
+    out = np.where(ok, s, na)
+    if slow.any():
+        txt = [(f"{v:,.{d}f}" if d else f"{round(v):,}").translate(_SWAP) for v in x[slow].tolist()]
+        out = out.astype(f"U{max(out.dtype.itemsize // 4, max(map(len, txt)))}")
+        out[slow] = txt
+    return out
+
+
+def fmt_int_col(values, na: str = NA) -> np.ndarray:
+    """Array angka -> array string '1.234.567' (dibulatkan). NaN/inf -> `na`."""
+    return fmt_float_col(values, 0, na)
+
+
+def fmt_p_col(values, na: str = NA) -> np.ndarray:
+    """p-value: '< 0.001' atau 4 desimal (titik, seperti output statsmodels)."""
+    x = np.asarray(values, dtype="float64")
+    ok = np.isfinite(x)
+    s = np.char.mod("%.4f", np.where(ok, x, 0.0))
+    return np.where(ok, np.where(x < 0.001, "< 0.001", s), na)
+
+
+# versi skalar (kartu KPI, tooltip) — jalur yang sama dengan versi kolom;
+# input bukan angka -> NA (seperti helper lama di aplikasi), bukan exception
+def _scalar(fn, x, *args) -> str:
+    try:
+        return str(fn([x], *args)[0])
+    except (TypeError, ValueError):
+        return NA
+
+
+def fmt_int(x) -> str:
+    return _scalar(fmt_int_col, x)
+
+
+def fmt_float(x, d: int = 1) -> str:
+    return _scalar(fmt_float_col, x, d)
+
+
+def fmt_p(x) -> str:
+    return _scalar(fmt_p_col, x)
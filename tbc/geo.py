@@ -0,0 +1,331 @@
+import html
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from branca.colormap import StepColormap
+from branca.element import MacroElement
+from jinja2 import Template
+
+
+# =========================
+# NAMA PROVINSI
+# =========================
+NAME_KEYS = ["Propinsi", "propinsi", "Provinsi", "provinsi", "NAME_1", "state", "name", "Name", "nama", "NAMA"]
+
+# YlOrRd 6 kelas (sama dengan default folium.Choropleth)
+YLORRD_6 = ["#ffffb2", "#fed976", "#feb24c", "#fd8d3c", "#f03b20", "#bd0026"]
+NODATA_COLOR = "#d1d5db"
+
+
+# nama versi geojson / BPS lama -> nama standar data
+PROV_ALIAS = {
+    "JAKARTA RAYA": "DKI JAKARTA",
+    "YOGYAKARTA": "DAERAH ISTIMEWA YOGYAKARTA",
+    "NANGGROE ACEH DARUSSALAM": "ACEH",
+}
+
+
+# provinsi pemekaran Papua 2022 belum ada di indonesia.geojson (34 prov): titik pusat kira-kira (lon, lat)
+PROV_CENTROID_EXTRA = {
+    "PAPUA BARAT DAYA": (132.0, -1.2),
+    "PAPUA TENGAH": (136.6, -3.6),
+    "PAPUA PEGUNUNGAN": (139.3, -4.2),
+    "PAPUA SELATAN": (139.6, -7.4),
+}
+
+
+def clean_prov(s: str) -> str:
+    s = str(s).strip().upper()
+    s = s.replace(".", "").replace(",", "").replace("-", " ")
+    s = " ".join(s.split())
+    s = PROV_ALIAS.get(s, s)
+    s = s.replace("DI YOGYAKARTA", "DAERAH ISTIMEWA YOGYAKARTA")
+    s = s.replace("KEP BANGKA BELITUNG", "KEPULAUAN BANGKA BELITUNG")
+    s = s.replace("BANGKA BELITUNG", "KEPULAUAN BANGKA BELITUNG")
+    s = s.replace("KEPULAUAN KEPULAUAN", "KEPULAUAN")
+    s = s.replace("KEP RIAU", "KEPULAUAN RIAU")
+    return s
+
+
+def find_name_key(geo: dict):
+    props0 = geo["features"][0]["properties"]
+    return next((k for k in NAME_KEYS if k in props0), None)
+
+
+def load_geo_prepared(path: Path) -> dict:
+    """Load geojson + inject `prov_clean` ke setiap feature (sekali saja)."""
+    with open(path, "r", encoding="utf-8") as f:
+        geo = json.load(f)
+
+    name_key = find_name_key(geo)
+    if name_key is None:
+        props0 = geo["features"][0]["properties"]
+        raise ValueError(f"Gak nemu kolom nama provinsi di geojson. Keys contoh: {list(props0.keys())[:25]}")
+
+    for ft in geo["features"]:
+        ft["properties"]["prov_clean"] = clean_prov(ft["properties"].get(name_key, ""))
+    geo["name_key"] = name_key
+    return geo
+
+
+def feature_keys(geo: dict) -> list:
+    return [ft["properties"].get("prov_clean", "") for ft in geo["features"]]
+
+
+def feature_centroids(geo: dict) -> np.ndarray:
+    """Centroid (lon, lat) per feature: rata-rata centroid ring luar, dibobot luas (shoelace)."""
+    out = np.full((len(geo["features"]), 2), np.nan)
+    for i, ft in enumerate(geo["features"]):
+        g = ft.get("geometry") or {}
+        polys = [g["coordinates"]] if g.get("type") == "Polygon" else g.get("coordinates", [])
+        acc = np.zeros(3)                          # sum(A·cx), sum(A·cy), sum(A)
+        for poly in polys:
+            a = np.asarray(poly[0], dtype="float64")[:, :2]
+            if len(a) < 3:
+                continue
+            x, y = a[:, 0], a[:, 1]
+            cross = x * np.roll(y, -1) - np.roll(x, -1) * y
+            area = cross.sum() / 2
+            if area == 0:
+                continue
+            acc += [((x + np.roll(x, -1)) * cross).sum() / 6, ((y + np.roll(y, -1)) * cross).sum() / 6, area]
+        if acc[2] != 0:
+            out[i] = acc[:2] / acc[2]
+    return out
+
+
+def centroid_lookup(geo: dict) -> dict:
+    """prov_clean -> (lon, lat), termasuk provinsi pemekaran yang belum ada di geojson."""
+    out = {k: tuple(xy) for k, xy in zip(feature_keys(geo), feature_centroids(geo).tolist()) if k}
+    for k, xy in PROV_CENTROID_EXTRA.items():
+        out.setdefault(k, xy)
+    return out
+
+
+def key_positions(names) -> dict:
+    """clean_prov(nama) -> array posisi baris. Dihitung sekali, filter seleksi = indexing."""
+    codes, uniq = pd.factorize(pd.Series(list(names), dtype="object").map(clean_prov))
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(uniq) + 1))
+    return {k: order[bounds[i]:bounds[i + 1]] for i, k in enumerate(uniq)}
+
+
+def selection_mask(positions: dict, n: int, keys):
+    """Mask baris untuk provinsi terpilih; None kalau tidak ada seleksi (= semua)."""
+    if not keys:
+        return None
+    m = np.zeros(n, dtype=bool)
+    for k in keys:
+        m[positions.get(k, [])] = True
+    return m
+
+
+# =========================
+# WARNA PER FRAME (TAHUN)
+# =========================
+def linear_bins(values, n: int = 6) -> np.ndarray:
+    """Batas kelas linear (n kelas) dari seluruh nilai (semua tahun sekaligus)."""
+    v = np.asarray(values, dtype="float64")
+    v = v[np.isfinite(v)]
+    if v.size == 0:
+        return np.linspace(0.0, 1.0, n + 1)
+    lo, hi = float(v.min()), float(v.max())
+    if hi <= lo:
+        hi = lo + 1.0
+    return np.linspace(lo, hi, n + 1)
+
+
+def palette_for(n: int, palette=YLORRD_6) -> list:
+    """n warna merata dari palet (metode klasifikasi bisa menghasilkan < 6 kelas)."""
+    if n >= len(palette):
+        return list(palette)
+    return [palette[i] for i in np.round(np.linspace(0, len(palette) - 1, max(n, 1))).astype(int)]
+
+
+def color_index(values, bins) -> np.ndarray:
+    """
+    Index palet per nilai (-1 = tidak ada data). Kelas i = (bins[i], bins[i+1]]:
+    nilai tepat di batas dalam masuk kelas bawah (batas = nilai teratas kelasnya,
+    sama dengan tbc.classify); di luar rentang jatuh ke kelas ujung.
+    """
+    v = np.asarray(values, dtype="float64")
+    idx = np.searchsorted(np.asarray(bins, dtype="float64")[1:-1], v, side="left")
+    return np.where(np.isfinite(v), idx, -1)
+
+
+def build_frames(df: pd.DataFrame, keys: list, value_col: str, year_col: str = "tahun",
+                 key_col: str = "prov_clean", palette=YLORRD_6, bins=None) -> dict:
+    """
+    Hitung array warna per tahun, urut sesuai `keys` (urutan feature geojson).
+    Bins dihitung dari semua tahun supaya warna antar frame bisa dibandingkan;
+    `bins` dari luar (mis. tbc.classify) dipakai apa adanya.
+    """
+    years = sorted(df[year_col].dropna().unique().tolist())
+    wide = (
+        df.pivot_table(index=key_col, columns=year_col, values=value_col, aggfunc="sum")
+          .reindex(index=keys, columns=years)
+    )
+    mat = wide.to_numpy(dtype="float64")          # (n_feature, n_tahun)
+    bins = linear_bins(mat, n=len(palette)) if bins is None else np.asarray(bins, dtype="float64")
+    idx = color_index(mat, bins)
+
+    pal = np.array(list(palette) + [NODATA_COLOR])
+    colors = pal[idx]                              # -1 -> NODATA_COLOR
+
+    return {
+        "years": [int(y) if float(y).is_integer() else y for y in years],
+        "keys": list(keys),
+        "bins": bins.tolist(),
+        "colors": colors.T.tolist(),               # (n_tahun, n_feature)
+        "values": np.where(np.isfinite(mat), np.round(mat, 1), None).T.tolist(),
+    }
+
+
+def step_legend(bins, caption: str, palette=YLORRD_6) -> StepColormap:
+    return StepColormap(list(palette), index=list(bins), vmin=bins[0], vmax=bins[-1], caption=caption)
+
+
+class FrameAnimator(MacroElement):
+    """
+    Animasi choropleth: geometri dikirim sekali (satu layer GeoJson),
+    tiap frame hanya array warna + nilai yang diganti lewat setStyle.
+    """
+
+    _template = Template("""
+{% macro script(this, kwargs) %}
+(function() {
+  var map = {{ this._parent.get_name() }};
+  var layer = {{ this.layer_name }};
+  var fr = {{ this.frames_json }};
+  var label = {{ this.label_json }};
+  var pos = {};
+  fr.keys.forEach(function(k, i) { pos[k] = i; });
+
+  var cur = 0, timer = null;
+  function show(t) {
+    cur = t;
+    var col = fr.colors[t], val = fr.values[t];
+    layer.eachLayer(function(l) {
+      var i = pos[l.feature.properties.prov_clean];
+      if (i === undefined) { return; }
+      l.setStyle({fillColor: col[i]});
+      var v = val[i] === null ? "-" : val[i].toLocaleString("id-ID");
+      l.setTooltipContent("<b>" + l.feature.properties[{{ this.name_key_json }}] + "</b><br/>" + label + " " + fr.years[t] + ": " + v);
+    });
+    slider.value = t;
+    yearLbl.innerHTML = fr.years[t];
+  }
+
+  layer.eachLayer(function(l) { l.bindTooltip("", {sticky: true}); });
+
+  var ctl = L.control({position: "bottomleft"});
+  var div = L.DomUtil.create("div", "leaflet-bar");
+  div.style.cssText = "background:#fff;padding:6px 10px;display:flex;gap:8px;align-items:center;";
+  var btn = L.DomUtil.create("button", "", div);
+  btn.innerHTML = "&#9654;";
+  var slider = L.DomUtil.create("input", "", div);
+  slider.type = "range"; slider.min = 0; slider.max = fr.years.length - 1; slider.step = 1;
+  var yearLbl = L.DomUtil.create("b", "", div);
+  L.DomEvent.disableClickPropagation(div);
+  ctl.onAdd = function() { return div; };
+  ctl.addTo(map);
+
+  slider.oninput = function() { show(parseInt(slider.value, 10)); };
+  btn.onclick = function() {
+    if (timer) { clearInterval(timer); timer = null; btn.innerHTML = "&#9654;"; return; }
+    btn.innerHTML = "&#10074;&#10074;";
+    timer = setInterval(function() { show((cur + 1) % fr.years.length); }, {{ this.interval_ms }});
+  };
+  show(0);
+})();
+{% endmacro %}
+""")
+
+    def __init__(self, layer, frames: dict, label: str, name_key: str, interval_ms: int = 900):
+        super().__init__()
+        self._name = "FrameAnimator"
+        self.layer_name = layer.get_name()
+        self.frames_json = json.dumps(
+            {k: frames[k] for k in ("years", "keys", "colors", "values")},
+            separators=(",", ":")
+        )
+        self.label_json = json.dumps(label)
+        self.name_key_json = json.dumps(name_key)
+        self.interval_ms = int(interval_ms)
+
+
+# =========================
+# SMALL MULTIPLES: SATU GEOMETRI SVG, BANYAK PANEL WARNA
+# =========================
+def svg_geometry(geo: dict, key_prop: str = "prov_clean", name_prop: str = None, width: int = 320) -> dict:
+    """
+    Proyeksikan geojson (equirectangular, skala cos lintang tengah) ke path SVG sekali.
+    Panel small multiples cukup me-`<use>` path ini, jadi geometri dikirim satu kali.
+    """
+    rings = []                                     # (index feature, array lon/lat)
+    for i, ft in enumerate(geo["features"]):
+        g = ft.get("geometry") or {}
+        polys = [g["coordinates"]] if g.get("type") == "Polygon" else g.get("coordinates", [])
+        for poly in polys:
+            for ring in poly:
+                a = np.asarray(ring, dtype="float64")[:, :2]
+                if len(a) >= 3:
+                    rings.append((i, a))
+
+    allc = np.concatenate([a for _, a in rings])
+    lon0, lat0 = allc.min(axis=0)
+    lon1, lat1 = allc.max(axis=0)
+    kx = np.cos(np.radians((lat0 + lat1) / 2))
+    scale = width / ((lon1 - lon0) * kx)
+    height = int(np.ceil((lat1 - lat0) * scale))
+
+    paths = [[] for _ in geo["features"]]
+    for i, a in rings:
+        xy = np.column_stack([(a[:, 0] - lon0) * kx * scale, (lat1 - a[:, 1]) * scale]).round(1)
+        pts = np.char.mod("%g", xy)
+        paths[i].append("M" + "L".join(np.char.add(np.char.add(pts[:, 0], ","), pts[:, 1])) + "Z")
+
+    props = [ft["properties"] for ft in geo["features"]]
+    return {
+        "keys": [p.get(key_prop, "") for p in props],
+        "names": [str(p.get(name_prop or key_prop, "")) for p in props],
+        "paths": ["".join(p) for p in paths],
+        "width": int(width),
+        "height": height,
+    }
+
+
+def small_multiples_html(shape: dict, panels: list, cols: int = 3) -> str:
+    """
+    Grid peta kecil. `panels` = list dict {title, colors, values, bins_txt, palette},
+    colors/values urut sesuai shape["keys"]. Yang berbeda antar panel hanya warna + nilai.
+    """
+    vb = f'0 0 {shape["width"]} {shape["height"]}'
+    defs = "".join(f'<path id="g{i}" d="{d}"/>' for i, d in enumerate(shape["paths"]) if d)
+    cells = []
+    for p in panels:
+        uses = "".join(
+            f'<use href="#g{i}" fill="{c}"><title>{html.escape(n)}: {v}</title></use>'
+            for i, (c, v, n) in enumerate(zip(p["colors"], p["values"], shape["names"])) if shape["paths"][i]
+        )
+        legend = "".join(
+            f'<span><i style="background:{c}"></i>{t}</span>' for c, t in zip(p["palette"], p["bins_txt"])
+        )
+        cells.append(
+            f'<div class="sm-cell"><div class="sm-title">{p["title"]}</div>'
+            f'<svg viewBox="{vb}" class="sm-map">{uses}</svg><div class="sm-leg">{legend}</div></div>'
+        )
+    return (
+        "<style>"
+        ".sm-grid{display:grid;grid-template-columns:repeat(%d,1fr);gap:10px;font-family:sans-serif;font-size:11px}"
+        ".sm-cell{border:1px solid #e5e7eb;border-radius:8px;padding:6px}"
+        ".sm-title{font-weight:600;margin-bottom:4px}"
+        ".sm-map{width:100%%;height:auto}.sm-map use{stroke:#6b7280;stroke-width:.3}.sm-map use:hover{stroke:#111827;stroke-width:1.2}"
+        ".sm-leg{display:flex;flex-wrap:wrap;gap:2px 8px;color:#374151}"
+        ".sm-leg i{display:inline-block;width:10px;height:10px;margin-right:3px;vertical-align:middle}"
+        "</style>" % cols
+        + f'<svg width="0" height="0" style="position:absolute"><defs>{defs}</defs></svg>'
+        + f'<div class="sm-grid">{"".join(cells)}</div>'
+    )
@@ -0,0 +1,200 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from tbc.geo import clean_prov
+
+
+# =========================
+# KODE WILAYAH (BPS) — kab/kota = kode_prov * 100 + urut
+# =========================
+PROV_CODE = {
+    "ACEH": 11, "SUMATERA UTARA": 12, "SUMATERA BARAT": 13, "RIAU": 14, "JAMBI": 15,
+    "SUMATERA SELATAN": 16, "BENGKULU": 17, "LAMPUNG": 18, "KEPULAUAN BANGKA BELITUNG": 19,
+    "KEPULAUAN RIAU": 21,
+    "DKI JAKARTA": 31, "JAWA BARAT": 32, "JAWA TENGAH": 33, "DAERAH ISTIMEWA YOGYAKARTA": 34,
+    "JAWA TIMUR": 35, "BANTEN": 36,
+    "BALI": 51, "NUSA TENGGARA BARAT": 52, "NUSA TENGGARA TIMUR": 53,
+    "KALIMANTAN BARAT": 61, "KALIMANTAN TENGAH": 62, "KALIMANTAN SELATAN": 63,
+    "KALIMANTAN TIMUR": 64, "KALIMANTAN UTARA": 65,
+    "SULAWESI UTARA": 71, "SULAWESI TENGAH": 72, "SULAWESI SELATAN": 73, "SULAWESI TENGGARA": 74,
+    "GORONTALO": 75, "SULAWESI BARAT": 76,
+    "MALUKU": 81, "MALUKU UTARA": 82,
+    "PAPUA BARAT": 91, "PAPUA BARAT DAYA": 92, "PAPUA": 94, "PAPUA SELATAN": 95,
+    "PAPUA TENGAH": 96, "PAPUA PEGUNUNGAN": 97,
+}
+CODE_PROV = {v: k for k, v in PROV_CODE.items()}
+
+LEVELS = ["kabkota", "provinsi", "nasional"]
+KAB_CODE_KEYS = ["kode_kab", "KODE_KAB", "kd_kab", "KD_KAB", "kab_id", "ID_2", "id_2", "bps_code"]
+
+
+def prov_code(names) -> np.ndarray:
+    """Nama provinsi (bebas format) -> kode BPS int (0 = tidak dikenal)."""
+    s = pd.Series(names, dtype="object").map(clean_prov).map(PROV_CODE)
+    return s.fillna(0).to_numpy(dtype="int16")
+
+
+def feature_prov(props: dict):
+    """Key provinsi (format clean_prov) dari properties feature peta provinsi atau kab/kota."""
+    if props.get("prov_clean"):
+        return props["prov_clean"]
+    kode = props.get("kode_kab")
+    if kode is None:
+        return None
+    name = CODE_PROV.get(int(kode) // 100)
+    return clean_prov(name) if name else None
+
+
+def assign_kab_codes(df: pd.DataFrame) -> pd.Series:
+    """
+    Pakai kolom `kode_kab` kalau ada; kalau tidak, bikin kode sintetis
+    kode_prov*100 + urutan nama di dalam provinsi (stabil antar load).
+    """
+    if "kode_kab" in df.columns:
+        return pd.to_numeric(df["kode_kab"], errors="coerce").fillna(0).astype("int32")
+    pc = prov_code(df["provinsi"]).astype("int32")
+    order = df.assign(_pc=pc).groupby("_pc")["kab_kota"].rank(method="first").astype("int32")
+    return pd.Series(pc * 100 + order.to_numpy(), index=df.index, dtype="int32")
+
+
+def _rate(frame: pd.DataFrame) -> pd.DataFrame:
+    frame["non_tbc"] = frame["populasi"] - frame["jumlah_tbc"]
+    frame["rate_100k"] = np.where(frame["populasi"] > 0, frame["jumlah_tbc"] / frame["populasi"] * 100000, np.nan)
+    return frame
+
+
+def build_levels(kab: pd.DataFrame) -> dict:
+    """
+    Model hierarki kab/kota -> provinsi -> nasional dengan key integer.
+    Rollup pakai np.bincount di atas index induk (O(n), tanpa groupby).
+    Rate di level atas dihitung dari jumlah kasus/populasi hasil rollup, bukan rata-rata rate.
+    """
+    kode_kab = assign_kab_codes(kab).to_numpy()
+    kode_prov = (kode_kab // 100).astype("int16")
+
+    lvl_kab = pd.DataFrame({
+        "kode": kode_kab,
+        "kode_induk": kode_prov,
+        "nama": kab["kab_kota"].astype(str).str.strip().to_numpy(),
+        "populasi": kab["populasi"].to_numpy(dtype="float64"),
+        "jumlah_tbc": kab["jumlah_tbc"].to_numpy(dtype="float64"),
+    })
+    lvl_kab = _rate(lvl_kab)
+
+    prov_u, parent = np.unique(kode_prov, return_inverse=True)
+    sums = {c: np.bincount(parent, weights=lvl_kab[c].to_numpy(), minlength=len(prov_u)) for c in ["populasi", "jumlah_tbc"]}
+    lvl_prov = pd.DataFrame({
+        "kode": prov_u.astype("int16"),
+        "kode_induk": np.zeros(len(prov_u), dtype="int16"),
+        "nama": [CODE_PROV.get(int(k), str(k)) for k in prov_u],
+        "n_kabkota": np.bincount(parent, minlength=len(prov_u)),
+        **sums,
+    })
+    lvl_prov = _rate(lvl_prov)
+
+    lvl_nas = _rate(pd.DataFrame({
+        "kode": [0], "kode_induk": [0], "nama": ["INDONESIA"],
+        "n_kabkota": [len(lvl_kab)],
+        "populasi": [float(sums["populasi"].sum())],
+        "jumlah_tbc": [float(sums["jumlah_tbc"].sum())],
+    }))
+
+    lvl_kab["parent_idx"] = parent.astype("int32")
+    return {"kabkota": lvl_kab, "provinsi": lvl_prov, "nasional": lvl_nas}
+
+
+def load_kab_geo(path) -> dict:
+    """Load geojson kab/kota + normalisasi kode integer ke properties `kode_kab`."""
+    with open(path, "r", encoding="utf-8") as f:
+        geo = json.load(f)
+    props0 = geo["features"][0]["properties"]
+    code_key = next((k for k in KAB_CODE_KEYS if k in props0), None)
+    if code_key is None:
+        raise ValueError(f"Gak nemu kolom kode kab/kota di geojson. Keys contoh: {list(props0.keys())[:25]}")
+    for ft in geo["features"]:
+        ft["properties"]["kode_kab"] = int(float(ft["properties"].get(code_key) or 0))
+    return geo
+
+
+def rollup(values, parent_idx, n_parent: int) -> np.ndarray:
+    """Jumlahkan array nilai anak ke induknya (vectorized)."""
+    return np.bincount(parent_idx, weights=np.asarray(values, dtype="float64"), minlength=n_parent)
+
+
+# =========================
+# GEOMETRI MULTI-RESOLUSI
+# =========================
+# toleransi dalam derajat (~1.1 km per 0.01°)
+RESOLUTIONS = {"Tinggi": 0.0, "Sedang": 0.01, "Rendah": 0.05}
+
+
+def _dp_keep(a: np.ndarray, tol: float) -> np.ndarray:
+    """Douglas-Peucker iteratif (tanpa rekursi); jarak titik-segmen dihitung vectorized."""
+    keep = np.zeros(len(a), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(a) - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j <= i + 1:
+            continue
+        p, q = a[i], a[j]
+        seg = q - p
+        pts = a[i + 1:j] - p
+        L = float(np.hypot(*seg))
+        if L == 0.0:
+            d = np.hypot(pts[:, 0], pts[:, 1])
+        else:
+            d = np.abs(seg[0] * pts[:, 1] - seg[1] * pts[:, 0]) / L
+        k = int(np.argmax(d))
+        if d[k] > tol:
+            m = i + 1 + k
+            keep[m] = True
+            stack.append((i, m))
+            stack.append((m, j))
+    return keep
+
+
+def _simplify_ring(ring, tol: float):
+    a = np.asarray(ring, dtype="float64")[:, :2]
+    if tol <= 0 or len(a) <= 4:
+        return ring
+    out = a[_dp_keep(a, tol)]
+    if len(out) < 4:
+        return None
+    decimals = max(2, int(np.ceil(-np.log10(tol))) + 2)
+    return np.round(out, decimals).tolist()
+
+
+def _simplify_polygon(poly, tol: float):
+    outer = _simplify_ring(poly[0], tol)
+    if outer is None:
+        return None
+    holes = [h for h in (_simplify_ring(r, tol) for r in poly[1:]) if h is not None]
+    return [outer] + holes
+
+
+def simplify_geo(geo: dict, tol: float) -> dict:
+    """
+    Simplifikasi Douglas-Peucker per ring dengan toleransi `tol` (derajat).
+    Pulau yang kolaps dibuang, kecuali semua pulau feature kolaps -> geometri asli dipakai.
+    """
+    if tol <= 0:
+        return geo
+    feats = []
+    for ft in geo["features"]:
+        g = ft["geometry"]
+        if g["type"] == "Polygon":
+            polys = [g["coordinates"]]
+        elif g["type"] == "MultiPolygon":
+            polys = g["coordinates"]
+        else:
+            feats.append(ft)
+            continue
+        new = [p for p in (_simplify_polygon(p, tol) for p in polys) if p is not None]
+        geom = g if not new else {"type": "MultiPolygon", "coordinates": new}
+        feats.append({"type": "Feature", "properties": ft["properties"], "geometry": geom})
+    out = {k: v for k, v in geo.items() if k != "features"}
+    out["features"] = feats
+    return out
@@ -0,0 +1,202 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+import numpy as np
+
+
+# =========================
+# INSTRUMENTASI RINGAN (per proses, dibagi semua sesi Streamlit)
+# =========================
+MAX_EVENTS = 5000          # ring buffer trace; cukup untuk ratusan rerun
+MAX_SAMPLES = 512          # sampel durasi per span (untuk p50/p95)
+
+_lock = threading.Lock()
+_spans = {}                # nama -> {"count", "sum", "max", "last", "samples": deque}
+_cache = {}                # nama -> {"hit", "miss"}
+_payload = {}              # nama -> {"last", "max", "count"}
+_events = deque(maxlen=MAX_EVENTS)
+_t0 = time.perf_counter()
+_tls = threading.local()
+
+
+def _record(name: str, start: float, dur: float):
+    with _lock:
+        s = _spans.get(name)
+        if s is None:
+            s = _spans[name] = {"count": 0, "sum": 0.0, "max": 0.0, "last": 0.0, "samples": deque(maxlen=MAX_SAMPLES)}
+        s["count"] += 1
+        s["sum"] += dur
+        s["max"] = max(s["max"], dur)
+        s["last"] = dur
+        s["samples"].append(dur)
+        _events.append((name, start - _t0, dur, threading.get_ident()))
+
+
+@contextmanager
+def span(name: str):
+    """with span("smf.glm"): ...  -> durasi masuk ke ringkasan + trace."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, start, time.perf_counter() - start)
+
+
+def start(name: str):
+    """Versi tanpa `with` untuk blok panjang (mis. satu cabang halaman)."""
+    return (name, time.perf_counter())
+
+
+def stop(token):
+    name, t = token
+    _record(name, t, time.perf_counter() - t)
+
+
+def timed(name: str = None):
+    """Dekorator: seluruh panggilan fungsi jadi satu span."""
+    def deco(fn):
+        key = name or fn.__name__
+
+        @wraps(fn)
+        def call(*args, **kwargs):
+            with span(key):
+                return fn(*args, **kwargs)
+        return call
+    return deco
+
+
+def cached(cache_decorator, name: str = None):
+    """
+    Bungkus st.cache_data / st.cache_resource supaya hit & miss terhitung:
+    badan fungsi hanya jalan saat miss, jadi flag thread-local cukup.
+
+        @perf.cached(st.cache_data(show_spinner=False))
+        def load_data(path): ...
+    """
+    def deco(fn):
+        key = name or fn.__name__
+
+        @wraps(fn)
+        def body(*args, **kwargs):
+            _tls.miss = True
+            with span(f"load:{key}"):
+                return fn(*args, **kwargs)
+
+        inner = cache_decorator(body)
+
+        @wraps(fn)
+        def call(*args, **kwargs):
+            outer = getattr(_tls, "miss", False)
+            _tls.miss = False
+            try:
+                with span(f"cache:{key}"):
+                    out = inner(*args, **kwargs)
+                count_cache(key, hit=not _tls.miss)
+            finally:
+                # cache bertingkat (get_cube -> load_data): jangan timpa status pemanggil
+                _tls.miss = outer or _tls.miss
+            return out
+
+        call.clear = inner.clear
+        return call
+    return deco
+
+
+def count_cache(name: str, hit: bool):
+    with _lock:
+        c = _cache.setdefault(name, {"hit": 0, "miss": 0})
+        c["hit" if hit else "miss"] += 1
+
+
+def payload(name: str, nbytes: int):
+    with _lock:
+        p = _payload.setdefault(name, {"last": 0, "max": 0, "count": 0})
+        p["last"] = int(nbytes)
+        p["max"] = max(p["max"], int(nbytes))
+        p["count"] += 1
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _cache.clear()
+        _payload.clear()
+        _events.clear()
+
+
+# =========================
+# RINGKASAN + EKSPOR
+# =========================
+def span_table() -> list:
+    with _lock:
+        items = [(k, dict(v, samples=np.array(v["samples"]))) for k, v in _spans.items()]
+    rows = []
+    for k, s in sorted(items, key=lambda kv: -kv[1]["sum"]):
+        q = np.percentile(s["samples"], [50, 95]) * 1000 if len(s["samples"]) else (np.nan, np.nan)
+        rows.append({
+            "span": k, "n": s["count"],
+            "total_ms": s["sum"] * 1000, "mean_ms": s["sum"] / s["count"] * 1000,
+            "p50_ms": q[0], "p95_ms": q[1], "max_ms": s["max"] * 1000, "last_ms": s["last"] * 1000,
+        })
+    return rows
+
+
+def cache_table() -> list:
+    with _lock:
+        items = [(k, dict(v)) for k, v in _cache.items()]
+    return [
+        {"cache": k, "hit": c["hit"], "miss": c["miss"], "hit_rate": c["hit"] / max(c["hit"] + c["miss"], 1)}
+        for k, c in sorted(items)
+    ]
+
+
+def payload_table() -> list:
+    with _lock:
+        return [{"payload": k, **v} for k, v in sorted(_payload.items())]
+
+
+def _label(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def prometheus() -> str:
+    """Format teks Prometheus (exposition format 0.0.4)."""
+    out = [
+        "# HELP tbc_span_seconds Durasi span instrumentasi.",
+        "# TYPE tbc_span_seconds summary",
+    ]
+    for r in span_table():
+        lab = f'span="{_label(r["span"])}"'
+        out.append(f'tbc_span_seconds{{{lab},quantile="0.5"}} {r["p50_ms"] / 1000:.6f}')
+        out.append(f'tbc_span_seconds{{{lab},quantile="0.95"}} {r["p95_ms"] / 1000:.6f}')
+        out.append(f"tbc_span_seconds_sum{{{lab}}} {r['total_ms'] / 1000:.6f}")
+        out.append(f"tbc_span_seconds_count{{{lab}}} {r['n']}")
+    out += ["# HELP tbc_span_max_seconds Durasi terlama per span.", "# TYPE tbc_span_max_seconds gauge"]
+    out += [f'tbc_span_max_seconds{{span="{_label(r["span"])}"}} {r["max_ms"] / 1000:.6f}' for r in span_table()]
+
+    out += ["# HELP tbc_cache_requests_total Panggilan fungsi ber-cache per hasil.", "# TYPE tbc_cache_requests_total counter"]
+    for r in cache_table():
+        for res in ("hit", "miss"):
+            out.append(f'tbc_cache_requests_total{{cache="{_label(r["cache"])}",result="{res}"}} {r[res]}')
+
+    out += ["# HELP tbc_payload_bytes Ukuran payload terakhir yang dirender.", "# TYPE tbc_payload_bytes gauge"]
+    out += [f'tbc_payload_bytes{{payload="{_label(r["payload"])}"}} {r["last"]}' for r in payload_table()]
+    return "\n".join(out) + "\n"
+
+
+def trace_json() -> str:
+    """Chrome trace event format (buka di chrome://tracing atau ui.perfetto.dev)."""
+    with _lock:
+        events = list(_events)
+    return json.dumps({
+        "displayTimeUnit": "ms",
+        "traceEvents": [
+            {"name": n, "ph": "X", "ts": round(s * 1e6, 1), "dur": round(d * 1e6, 1), "pid": 1, "tid": tid,
+             "cat": n.split(":", 1)[0] if ":" in n else "call"}
+            for n, s, d, tid in events
+        ],
+    })
@@ -0,0 +1,146 @@
+import hashlib
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+# =========================
+# REGISTRY SKEMA (SATU SUMBER UNTUK SEMUA LOADER)
+# =========================
+@dataclass(frozen=True)
+class Col:
+    aliases: tuple = ()
+    dtype: str = "float"          # "float" | "int" | "str"
+    unit: str = ""
+    required: bool = False
+    min: float = None
+    max: float = None
+    label: str = ""
+
+
+SCHEMAS = {
+    "epi2": {
+        "provinsi": Col(("provinsii", "nama_provinsi"), "str", required=True, label="Provinsi"),
+        "populasi": Col(("jumlah_penduduk", "penduduk"), "float", "jiwa", True, min=1, label="Populasi"),
+        "jumlah_tbc": Col(("jumlah_kasus_tbc", "jumlah_kasus", "kasus_tbc"), "float", "kasus", True, min=0, label="Jumlah TBC"),
+        "kepadatan": Col(("kepadatan_penduduk",), "float", "jiwa/km²", min=0, label="Kepadatan"),
+        "kelompok_kep": Col(("kelompok_kepadatan",), "str", label="Kelompok kepadatan"),
+        "tahun": Col(("year",), "int", min=1900, max=2100, label="Tahun"),
+        "umur": Col(("kelompok_umur", "age"), "str", label="Kelompok umur"),
+        "jk": Col(("jenis_kelamin", "sex"), "str", label="Jenis kelamin"),
+    },
+    "model": {
+        "provinsi": Col(("provinsii",), "str", required=True, label="Provinsi"),
+        "y": Col((), "float", "kasus", True, min=0, label="Y (kasus TBC)"),
+        "x1": Col((), "float", "%", True, min=0, max=100, label="X₁ Merokok usia 15–24 tahun"),
+        "x2": Col((), "float", "%", True, min=0, max=100, label="X₂ Penduduk miskin"),
+        "x3": Col((), "float", "%", True, min=0, max=100, label="X₃ Sanitasi layak"),
+        "x4": Col((), "float", "jiwa/km²", True, min=0, label="X₄ Kepadatan penduduk"),
+        "x5": Col((), "float", "indeks", True, min=0, max=100, label="X₅ Indeks kualitas udara"),
+    },
+    "kabkota": {
+        "kab_kota": Col(("kabupaten/kota", "kab/kota", "kabkota", "kabupaten_kota", "nama_kab"), "str", required=True, label="Kab/Kota"),
+        "provinsi": Col(("provinsii",), "str", required=True, label="Provinsi"),
+        "kode_kab": Col(("kode", "kd_kab", "kab_id"), "int", min=1100, max=9999, label="Kode kab/kota"),
+        "populasi": Col(("jumlah_penduduk", "penduduk"), "float", "jiwa", True, min=1, label="Populasi"),
+        "jumlah_tbc": Col(("jumlah_kasus_tbc", "jumlah_kasus", "kasus_tbc"), "float", "kasus", True, min=0, label="Jumlah TBC"),
+    },
+}
+
+
+def norm_header(h) -> str:
+    """'Jumlah TBC\\t' / 'jumlah_TBC' / ' Provinsii ' -> 'jumlah_tbc' / 'provinsii'."""
+    return re.sub(r"[\s_]+", "_", str(h).strip().lower())
+
+
+@lru_cache(maxsize=64)
+def compile_plan(name: str, columns: tuple) -> dict:
+    """
+    Rencana normalisasi per (skema, signature header file).
+    Di-cache: file dengan header yang sama tidak di-resolve ulang.
+    """
+    schema = SCHEMAS[name]
+    lookup = {}
+    for canon, col in schema.items():
+        for a in (canon,) + col.aliases:
+            lookup.setdefault(norm_header(a), canon)
+
+    rename, seen = {}, set()
+    for raw in columns:
+        canon = lookup.get(norm_header(raw))
+        if canon is not None and canon not in seen:
+            rename[raw] = canon
+            seen.add(canon)
+
+    return {
+        "rename": rename,
+        "unknown": [c for c in columns if c not in rename],
+        "missing": [c for c, col in schema.items() if col.required and c not in seen],
+        "numeric": [c for c in schema if c in seen and schema[c].dtype in ("float", "int")],
+        "text": [c for c in schema if c in seen and schema[c].dtype == "str"],
+    }
+
+
+def normalize(df: pd.DataFrame, name: str, required=(), drop_missing: bool = True):
+    """
+    Rename + coercion numerik + strip teks dalam satu langkah.
+    Return (df, report). Report berisi jumlah nilai gagal konversi,
+    nilai di luar rentang, dan baris yang dibuang karena kolom wajib kosong.
+    """
+    schema = SCHEMAS[name]
+    plan = compile_plan(name, tuple(df.columns))
+    missing = plan["missing"] + [c for c in required if c not in plan["rename"].values()]
+    if missing:
+        raise ValueError(f"Kolom wajib tidak ditemukan: {missing}. Kolom terbaca: {list(df.columns)}")
+
+    out = df.rename(columns=plan["rename"])[list(plan["rename"].values())]
+
+    num = plan["numeric"]
+    raw = out[num]
+    coerced = raw.apply(pd.to_numeric, errors="coerce").astype("float64")
+    bad = coerced.isna() & raw.notna()
+    out[num] = coerced
+
+    lo = np.array([schema[c].min if schema[c].min is not None else -np.inf for c in num])
+    hi = np.array([schema[c].max if schema[c].max is not None else np.inf for c in num])
+    vals = coerced.to_numpy()
+    with np.errstate(invalid="ignore"):
+        oor = (vals < lo) | (vals > hi)
+
+    for c in plan["text"]:
+        txt = out[c].astype("string").str.strip()
+        out[c] = txt.mask(txt == "")
+
+    for c in num:
+        if schema[c].dtype == "int" and out[c].notna().all():
+            out[c] = out[c].astype("int64")
+
+    must = [c for c, col in schema.items() if (col.required or c in required) and c in out.columns]
+    keep = out[must].notna().all(axis=1)
+
+    report = {
+        "schema": name,
+        "rows_in": int(len(df)),
+        "rows_out": int(keep.sum()),
+        "renamed": {str(k): v for k, v in plan["rename"].items() if k != v},
+        "unknown_cols": [str(c) for c in plan["unknown"]],
+        "coerce_errors": {c: int(n) for c, n in zip(num, bad.to_numpy().sum(axis=0)) if n},
+        "out_of_range": {c: int(n) for c, n in zip(num, oor.sum(axis=0)) if n},
+        "incomplete_examples": np.flatnonzero(~keep.to_numpy())[:10].tolist(),
+        "dropped": bool(drop_missing),
+        "units": {c: schema[c].unit for c in out.columns if schema[c].unit},
+    }
+
+    out = out[keep].copy() if drop_missing else out
+    out.attrs["schema_report"] = report
+    return out, report
+
+
+def fingerprint(df: pd.DataFrame) -> str:
+    """Hash isi DataFrame (vectorized, cukup cepat untuk line-list) -> key cache."""
+    h = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    h.update(("|".join(map(str, df.columns))).encode())
+    return h.hexdigest()[:16]
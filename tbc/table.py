@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+
+# =========================
+# TABEL BERPERINGKAT + PAGINASI (index urutan dihitung sekali per data)
+# =========================
+class RankIndex:
+    """
+    Index urutan untuk tabel unit (provinsi / kab-kota × tahun).
+    Tiap kolom numerik punya argsort naik & turun (NaN selalu di akhir),
+    jadi Top/Bottom-k dan halaman tabel = slicing array, bukan sort_values.
+    """
+
+    def __init__(self, df: pd.DataFrame, text_col: str, sort_cols=None):
+        self.df = df.reset_index(drop=True)
+        self.text_col = text_col
+        self.sort_cols = list(sort_cols or df.select_dtypes("number").columns)
+        self.text = np.char.lower(self.df[text_col].astype(str).to_numpy().astype(str))
+
+        self.order = {}
+        for c in self.sort_cols:
+            v = self.df[c].to_numpy(dtype="float64")
+            asc = np.argsort(v, kind="stable")                 # NaN di akhir
+            n_ok = int(np.isfinite(v).sum())
+            desc = np.concatenate([asc[:n_ok][::-1], asc[n_ok:]])
+            self.order[(c, False)] = asc
+            self.order[(c, True)] = desc
+
+    def __len__(self):
+        return len(self.df)
+
+    def top(self, col: str, k: int = 10, desc: bool = True, rows=None) -> pd.DataFrame:
+        """k baris teratas/terbawah (tanpa NaN), urut sesuai arah; `rows` = mask baris opsional."""
+        idx = self.order[(col, desc)]
+        if rows is not None:
+            idx = idx[rows[idx]]
+        idx = idx[:k]
+        idx = idx[np.isfinite(self.df[col].to_numpy(dtype="float64")[idx])]
+        return self.df.iloc[idx]
+
+    def mask(self, search: str = "", rows=None, **filters) -> np.ndarray:
+        """
+        Mask baris: substring nama (case-insensitive) + filter kolom (skalar, list,
+        atau (min, max)) + `rows` (mask siap pakai, mis. seleksi dari peta).
+        """
+        m = np.ones(len(self.df), dtype=bool) if rows is None else np.asarray(rows, dtype=bool).copy()
+        if search:
+            m &= np.char.find(self.text, search.strip().lower()) >= 0
+        for c, f in filters.items():
+            if f is None:
+                continue
+            v = self.df[c].to_numpy()
+            if isinstance(f, tuple) and len(f) == 2:
+                lo, hi = f
+                with np.errstate(invalid="ignore"):
+                    m &= (v >= (-np.inf if lo is None else lo)) & (v <= (np.inf if hi is None else hi))
+            elif isinstance(f, (list, np.ndarray, pd.Index)):
+                m &= np.isin(v, f)
+            else:
+                m &= v == f
+        return m
+
+    def page(self, sort: str, desc: bool = True, page: int = 0, size: int = 25, search: str = "", rows=None, **filters):
+        """
+        Return (DataFrame halaman, jumlah baris lolos filter).
+        Urutan diambil dari index; filter = satu mask, dipakai lewat indexing.
+        """
+        order = self.order[(sort, desc)]
+        m = self.mask(search, rows, **filters)
+        sel = order if m.all() else order[m[order]]
+        start = max(page, 0) * size
+        return self.df.iloc[sel[start:start + size]], int(sel.size)
+
+
+def n_pages(total: int, size: int) -> int:
+    return max(1, -(-total // size))
@@ -0,0 +1,280 @@
+"""
+Cache tile basemap lokal (offline) untuk peta folium.
+
+    python -m tbc.tiles build --out indonesia.tiles --accept-terms   # unduh sekali, zoom 4–9
+    python -m tbc.tiles info indonesia.tiles
+    python -m tbc.tiles serve indonesia.tiles --port 8765     # server mandiri
+
+Format arsip (satu file, di-mmap; tidak ada yang di-load ke RAM):
+    MAGIC(8) | n:uint32 | meta_len:uint32 | meta JSON | index n × (key:u8, offset:u8, length:u4) | blob
+key = z << 48 | x << 24 | y, index terurut -> lookup = np.searchsorted.
+
+Tile default berasal dari CDN CARTO (data © OpenStreetMap contributors). Unduh massal
+hanya jalan dengan opt-in eksplisit (--accept-terms / accept_terms=True): pastikan
+pemakaian sesuai ketentuan CARTO & OSM, dan atribusi di arsip tetap ditampilkan di peta.
+Server lokal default hanya mendengarkan 127.0.0.1 (pakai --host untuk membuka ke jaringan).
+"""
+import argparse
+import json
+import math
+import mmap
+import shutil
+import struct
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b"TBCTILE1"
+IDX = np.dtype([("key", "<u8"), ("offset", "<u8"), ("length", "<u4")])
+BBOX = (94.5, -11.5, 141.5, 6.5)                    # lon_min, lat_min, lon_max, lat_max (Indonesia)
+ZOOMS = range(4, 10)
+SOURCE = "https://a.basemaps.cartocdn.com/light_all/{z}/{x}/{y}.png"
+ATTRIBUTION = "&copy; OpenStreetMap contributors &copy; CARTO"
+TERMS = ("Tile basemap © OpenStreetMap contributors © CARTO. Unduh massal tunduk pada ketentuan "
+         "CARTO (https://carto.com/legal) dan kebijakan tile OSM "
+         "(https://operations.osmfoundation.org/policies/tiles/); atribusi wajib tetap tampil.")
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def tile_key(z: int, x: int, y: int) -> int:
+    return (z << 48) | (x << 24) | y
+
+
+def tile_range(bbox, z: int):
+    """Rentang x, y (inklusif) tile slippy-map yang menutup bbox di zoom z."""
+    lon0, lat0, lon1, lat1 = bbox
+    n = 2 ** z
+
+    def xy(lon, lat):
+        r = math.radians(lat)
+        return (int((lon + 180) / 360 * n),
+                int((1 - math.log(math.tan(r) + 1 / math.cos(r)) / math.pi) / 2 * n))
+
+    x0, y0 = xy(lon0, lat1)
+    x1, y1 = xy(lon1, lat0)
+    return range(max(x0, 0), min(x1, n - 1) + 1), range(max(y0, 0), min(y1, n - 1) + 1)
+
+
+def tile_list(bbox=BBOX, zooms=ZOOMS) -> list:
+    return [(z, x, y) for z in zooms for xs, ys in [tile_range(bbox, z)] for x in xs for y in ys]
+
+
+# =========================
+# TULIS / BACA ARSIP
+# =========================
+def write_archive(path, tiles, meta: dict) -> int:
+    """
+    tiles: iterable ((z, x, y), bytes). Return jumlah tile yang ditulis.
+    Tile di-stream ke file blob sementara begitu datang; yang ditahan di RAM hanya
+    index (20 byte/tile). Blob tidak perlu terurut — cukup index yang diurutkan.
+    """
+    path = Path(path)
+    blob_tmp, tmp = Path(str(path) + ".blob"), Path(str(path) + ".tmp")
+    keys, offs, lens = [], [], []
+    off = 0
+    try:
+        with open(blob_tmp, "wb") as blob:
+            for zxy, data in tiles:
+                if not data:
+                    continue
+                blob.write(data)
+                keys.append(tile_key(*zxy))
+                offs.append(off)
+                lens.append(len(data))
+                off += len(data)
+
+        meta_b = json.dumps(meta).encode()
+        idx = np.zeros(len(keys), dtype=IDX)
+        idx["key"], idx["offset"], idx["length"] = keys, offs, lens
+        idx["offset"] += len(MAGIC) + 8 + len(meta_b) + idx.nbytes
+        idx = idx[np.argsort(idx["key"], kind="stable")]
+
+        with open(tmp, "wb") as f, open(blob_tmp, "rb") as blob:
+            f.write(MAGIC + struct.pack("<II", len(idx), len(meta_b)) + meta_b)
+            f.write(idx.tobytes())
+            shutil.copyfileobj(blob, f, 1 << 20)
+        tmp.replace(path)
+    finally:
+        blob_tmp.unlink(missing_ok=True)
+        tmp.unlink(missing_ok=True)
+    return len(keys)
+
+
+class TileArchive:
+    """Arsip tile read-only di atas mmap; get() = searchsorted + memoryview (tanpa copy)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._f = open(self.path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}: bukan arsip tile ({MAGIC.decode()})")
+        n, meta_len = struct.unpack_from("<II", self._mm, len(MAGIC))
+        start = len(MAGIC) + 8
+        self.meta = json.loads(self._mm[start:start + meta_len])
+        self.index = np.frombuffer(self._mm, dtype=IDX, count=n, offset=start + meta_len)
+        self.keys = self.index["key"]
+        self.etag = f'"{self.path.stat().st_mtime_ns:x}-{n:x}"'
+
+    def __len__(self):
+        return len(self.index)
+
+    def get(self, z: int, x: int, y: int):
+        k = tile_key(z, x, y)
+        i = int(np.searchsorted(self.keys, k))
+        if i == len(self.keys) or int(self.keys[i]) != k:
+            return None
+        off, length = int(self.index["offset"][i]), int(self.index["length"][i])
+        return memoryview(self._mm)[off:off + length]
+
+    def close(self):
+        self.index = self.keys = None
+        self._mm.close()
+        self._f.close()
+
+
+# =========================
+# UNDUH SEKALI
+# =========================
+def _fetch(url: str, retries: int = 3) -> bytes:
+    req = urllib.request.Request(url, headers={"User-Agent": "dashboard-tbc-tilecache/1.0"})
+    for i in range(retries):
+        try:
+            with urllib.request.urlopen(req, timeout=20) as r:
+                return r.read()
+        except Exception:
+            if i == retries - 1:
+                raise
+            time.sleep(1.5 * (i + 1))
+
+
+def build(out, bbox=BBOX, zooms=ZOOMS, source: str = SOURCE, workers: int = 8, log=print,
+          accept_terms: bool = False) -> int:
+    """Unduh semua tile bbox × zooms sekali ke arsip. Wajib accept_terms=True (lihat TERMS)."""
+    log(TERMS)
+    if not accept_terms:
+        raise PermissionError("unduh massal tile butuh opt-in eksplisit: accept_terms=True / --accept-terms")
+    todo = tile_list(bbox, zooms)
+    log(f"{len(todo)} tile (zoom {min(zooms)}–{max(zooms)}) dari {source}")
+
+    def one(zxy):
+        z, x, y = zxy
+        return zxy, _fetch(source.format(z=z, x=x, y=y))
+
+    def fetched(ex):
+        # ex.map menjaga urutan, tapi hasil langsung diteruskan ke write_archive (tidak ditimbun)
+        for i, item in enumerate(ex.map(one, todo), 1):
+            if i % 250 == 0:
+                log(f"  {i}/{len(todo)}")
+            yield item
+
+    meta = {"bbox": list(bbox), "minzoom": min(zooms), "maxzoom": max(zooms), "format": "png",
+            "source": source, "attribution": ATTRIBUTION, "created": time.strftime("%Y-%m-%d")}
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        n = write_archive(out, fetched(ex), meta)
+    log(f"{n} tile -> {out} ({Path(out).stat().st_size / 1e6:.1f} MB)")
+    return n
+
+
+# =========================
+# SERVER LOKAL
+# =========================
+def make_handler(archive: TileArchive):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = self.path.split("?", 1)[0].strip("/").split("/")
+            try:
+                assert len(parts) == 4 and parts[0] == "tiles"
+                z, x, y = int(parts[1]), int(parts[2]), int(parts[3].split(".")[0])
+            except (AssertionError, ValueError):
+                self.send_error(404)
+                return
+
+            if self.headers.get("If-None-Match") == archive.etag:
+                self.send_response(304)
+                self._cache_headers()
+                self.end_headers()
+                return
+
+            data = archive.get(z, x, y)
+            if data is None:
+                # di luar cakupan arsip: 204 + cache supaya browser tidak minta ulang
+                self.send_response(204)
+                self._cache_headers()
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", f"image/{archive.meta.get('format', 'png')}")
+            self.send_header("Content-Length", str(len(data)))
+            self._cache_headers()
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _cache_headers(self):
+            self.send_header("Cache-Control", CACHE_CONTROL)
+            self.send_header("ETag", archive.etag)
+            self.send_header("Access-Control-Allow-Origin", "*")
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_server(path, host: str = "127.0.0.1", port: int = 8765):
+    """Jalankan server tile di thread daemon (default loopback saja). Return (server, archive)."""
+    archive = TileArchive(path)
+    server = ThreadingHTTPServer((host, port), make_handler(archive))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="tbc-tiles").start()
+    return server, archive
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="unduh tile sekali ke arsip")
+    b.add_argument("--out", default="indonesia.tiles")
+    b.add_argument("--zoom", default="4-9", help="mis. 4-9")
+    b.add_argument("--source", default=SOURCE)
+    b.add_argument("--workers", type=int, default=8)
+    b.add_argument("--accept-terms", action="store_true",
+                   help="opt-in unduh massal; setuju ketentuan tile CARTO/OSM & tetap menampilkan atribusi")
+    i = sub.add_parser("info", help="ringkasan arsip")
+    i.add_argument("path")
+    s = sub.add_parser("serve", help="server tile mandiri")
+    s.add_argument("path")
+    s.add_argument("--host", default="127.0.0.1", help="0.0.0.0 = buka ke jaringan")
+    s.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "build":
+        z0, z1 = (int(v) for v in args.zoom.split("-"))
+        try:
+            build(args.out, zooms=range(z0, z1 + 1), source=args.source, workers=args.workers,
+                  accept_terms=args.accept_terms)
+        except PermissionError as e:
+            ap.error(str(e))
+    elif args.cmd == "info":
+        a = TileArchive(args.path)
+        z = a.index["key"] >> 48
+        print(json.dumps(a.meta, indent=2))
+        print({int(k): int(v) for k, v in zip(*np.unique(z, return_counts=True))}, f"{a.path.stat().st_size / 1e6:.1f} MB")
+    else:
+        server, _ = start_server(args.path, args.host, args.port)
+        print(f"tile di http://{args.host}:{args.port}/tiles/{{z}}/{{x}}/{{y}}.png  (Ctrl+C berhenti)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+            sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from tbc.geo import clean_prov
+from tbc.hierarchy import prov_code
+from tbc.schema import SCHEMAS, fingerprint
+
+
+# =========================
+# ATURAN LINTAS-KOLOM (vectorized: tiap aturan -> mask baris yang MELANGGAR)
+# =========================
+def _col(df, c):
+    return df[c].to_numpy(dtype="float64") if c in df.columns else None
+
+
+def _le(a, b):
+    def rule(df):
+        x, y = _col(df, a), _col(df, b)
+        return None if x is None or y is None else x > y
+    return rule
+
+
+def _gt0(c):
+    def rule(df):
+        x = _col(df, c)
+        return None if x is None else x <= 0
+    return rule
+
+
+def _kode_vs_prov(df):
+    if "kode_kab" not in df.columns or "provinsi" not in df.columns:
+        return None
+    kode = _col(df, "kode_kab")
+    pc = prov_code(df["provinsi"])
+    return np.isfinite(kode) & (pc > 0) & ((kode // 100) != pc)
+
+
+CROSS_RULES = {
+    "epi2": [
+        ("jumlah_tbc ≤ populasi", "jumlah_tbc", _le("jumlah_tbc", "populasi"), "error"),
+        ("kepadatan > 0", "kepadatan", _gt0("kepadatan"), "error"),
+    ],
+    "model": [
+        ("y > 0 (log-link)", "y", _gt0("y"), "warning"),
+    ],
+    "kabkota": [
+        ("jumlah_tbc ≤ populasi", "jumlah_tbc", _le("jumlah_tbc", "populasi"), "error"),
+        ("kode_kab cocok dengan provinsi", "kode_kab", _kode_vs_prov, "error"),
+    ],
+}
+
+KEY_COLS = ("provinsi", "kab_kota", "kode_kab", "tahun", "umur", "jk")
+MAX_EXAMPLES = 10
+
+
+def _check(rule, kolom, mask, level, df):
+    rows = np.flatnonzero(mask)
+    return {
+        "aturan": rule,
+        "kolom": kolom,
+        "level": level,
+        "n": int(rows.size),
+        "contoh_baris": df.index[rows[:MAX_EXAMPLES]].tolist(),
+    }
+
+
+def validate(df: pd.DataFrame, kind: str, geo_keys=None, fp: str = None) -> dict:
+    """
+    Jalankan semua aturan di atas DataFrame hasil normalize(..., drop_missing=False).
+    Tiap aturan = satu operasi array; tidak ada loop per baris.
+    """
+    schema = SCHEMAS[kind]
+    checks = []
+
+    # 1) kolom wajib kosong (ini yang dulu hilang diam-diam lewat dropna)
+    for c, col in schema.items():
+        if col.required and c in df.columns:
+            checks.append(_check("kolom wajib terisi", c, df[c].isna().to_numpy(), "error", df))
+
+    # 2) rentang dari registry skema
+    for c, col in schema.items():
+        if c not in df.columns or col.dtype == "str" or (col.min is None and col.max is None):
+            continue
+        x = _col(df, c)
+        lo = -np.inf if col.min is None else col.min
+        hi = np.inf if col.max is None else col.max
+        with np.errstate(invalid="ignore"):
+            mask = (x < lo) | (x > hi)
+        checks.append(_check(f"rentang [{col.min}, {col.max}]", c, mask, "error", df))
+
+    # 3) aturan lintas kolom
+    for rule, kolom, fn, level in CROSS_RULES.get(kind, []):
+        mask = fn(df)
+        if mask is not None:
+            checks.append(_check(rule, kolom, mask, level, df))
+
+    # 4) duplikat key
+    keys = [c for c in KEY_COLS if c in df.columns and not (c == "provinsi" and "kab_kota" in df.columns)]
+    if keys:
+        checks.append(_check(f"duplikat {'+'.join(keys)}", keys[0], df.duplicated(subset=keys, keep=False).to_numpy(), "error", df))
+
+    # 5) nama provinsi tidak ketemu di geojson (clean_prov cukup di nilai unik)
+    if geo_keys is not None and "provinsi" in df.columns:
+        codes, uniq = pd.factorize(df["provinsi"])
+        geo = set(geo_keys)
+        miss_u = np.array([clean_prov(u) not in geo for u in uniq] + [False])   # -1 (NaN) -> False
+        checks.append(_check("provinsi ada di geojson", "provinsi", miss_u[codes], "warning", df))
+
+    return {
+        "kind": kind,
+        "fingerprint": fp or fingerprint(df),
+        "n_rows": int(len(df)),
+        "n_error": int(sum(c["n"] for c in checks if c["level"] == "error")),
+        "n_warning": int(sum(c["n"] for c in checks if c["level"] == "warning")),
+        "checks": checks,
+    }
+
+
+_REPORTS = OrderedDict()
+_MAX_REPORTS = 32
+
+
+def validate_cached(df: pd.DataFrame, kind: str, geo_keys=None) -> dict:
+    """Sama dengan validate(), tapi hasil di-cache per (kind, fingerprint data, peta)."""
+    geo_sig = None if geo_keys is None else hash(tuple(sorted(geo_keys)))
+    fp = fingerprint(df)
+    key = (kind, fp, geo_sig)
+    if key in _REPORTS:
+        _REPORTS.move_to_end(key)
+        return _REPORTS[key]
+    rep = validate(df, kind, geo_keys, fp)
+    _REPORTS[key] = rep
+    if len(_REPORTS) > _MAX_REPORTS:
+        _REPORTS.popitem(last=False)
+    return rep
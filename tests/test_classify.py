@@ -0,0 +1,56 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from tbc.classify import METHODS, classify, jenks
+from tbc.geo import color_index
+
+
+def _sse(x, cls):
+    return sum(((x[cls == c] - x[cls == c].mean()) ** 2).sum() for c in np.unique(cls))
+
+
+def _brute_sse(x, k):
+    """SSE minimum semua partisi kontigu x (terurut) ke k kelas."""
+    n, best = x.size, np.inf
+    for cuts in combinations(range(1, n), k - 1):
+        cls = np.zeros(n, dtype=int)
+        for c in cuts:
+            cls[c:] += 1
+        best = min(best, _sse(x, cls))
+    return best
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_jenks_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(4, 10))
+    x = np.sort(rng.integers(0, 15, n).astype("float64") if seed % 2 else rng.normal(size=n))
+    k = min(int(rng.integers(2, 5)), np.unique(x).size)
+    bins = jenks(x, k)
+    cls = color_index(x, bins)
+    assert len(bins) - 1 == k
+    assert np.unique(cls).size == k
+    assert _sse(x, cls) == pytest.approx(_brute_sse(x, k), abs=1e-9)
+
+
+def test_boundary_value_stays_in_its_class():
+    x = np.array([1, 2, 3, 10, 11, 12, 50], dtype="float64")
+    assert color_index(x, jenks(x, 3)).tolist() == [0, 0, 0, 1, 1, 1, 2]
+
+
+def test_single_value_lowest_class_kept():
+    x = np.array([0, 10, 11, 12, 20, 21], dtype="float64")
+    assert color_index(x, jenks(x, 3)).tolist() == [0, 1, 1, 1, 2, 2]
+
+
+@pytest.mark.parametrize("method", list(METHODS))
+def test_bins_cover_range(method):
+    x = np.random.default_rng(3).lognormal(size=200)
+    bins = classify(np.r_[x, np.nan], method, 5)
+    assert bins[0] == x.min() and bins[-1] == x.max()
+    assert np.all(np.diff(bins) >= 0)
+    cls = color_index(np.r_[x, np.nan], bins)
+    assert cls[-1] == -1
+    assert cls[:-1].min() >= 0 and cls[:-1].max() <= len(bins) - 2
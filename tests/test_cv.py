@@ -0,0 +1,55 @@
+import warnings
+
+import numpy as np
+import pytest
+import statsmodels.api as sm
+
+from tbc.cv import NBCrossValidator, nb_deviance
+
+ALPHA = 0.4
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    n = 120
+    X = np.column_stack([np.ones(n), rng.normal(size=(n, 2))])
+    mu = np.exp(X @ np.array([2.0, 0.4, -0.3]))
+    y = rng.negative_binomial(1 / ALPHA, 1 / (1 + ALPHA * mu)).astype("float64")
+    fam = sm.families.NegativeBinomial(alpha=ALPHA)
+    beta = sm.GLM(y, X, family=fam).fit().params
+    return y, X, beta, fam
+
+
+def test_deviance_matches_statsmodels(data):
+    y, X, beta, fam = data
+    mu = np.exp(X @ beta)
+    assert np.allclose(nb_deviance(y, mu, ALPHA).sum(), fam.deviance(y, mu), rtol=1e-10)
+
+
+def test_exact_loo_matches_refit(data):
+    y, X, beta, fam = data
+    res = NBCrossValidator(y, X, ALPHA, beta, workers=1).run(None, "exact")
+    assert res.scheme == "LOO"
+    for i in (0, 17, 63, 119):
+        keep = np.arange(len(y)) != i
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            b = sm.GLM(y[keep], X[keep], family=fam).fit(tol=1e-12).params
+        assert res.mu[i] == pytest.approx(np.exp(X[i] @ b), rel=1e-6)
+
+
+def test_onestep_loo_close_to_exact(data):
+    y, X, beta, _ = data
+    cv = NBCrossValidator(y, X, ALPHA, beta, workers=1)
+    fast, exact = cv.run(None, "onestep"), cv.run(None, "exact")
+    assert np.max(np.abs(fast.mu / exact.mu - 1)) < 1e-2
+    assert fast.deviance == pytest.approx(exact.deviance, rel=1e-3)
+
+
+def test_onestep_kfold_close_to_exact(data):
+    y, X, beta, _ = data
+    cv = NBCrossValidator(y, X, ALPHA, beta, workers=1)
+    fast, exact = cv.run(5, "onestep"), cv.run(5, "exact")
+    assert fast.scheme == exact.scheme == "5-fold"
+    assert np.max(np.abs(fast.mu / exact.mu - 1)) < 2e-2
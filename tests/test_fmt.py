@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from tbc.fmt import fmt_float, fmt_float_col, fmt_int, fmt_int_col, fmt_p
+
+_SWAP = str.maketrans(",.", ".,")
+TIES = [0.05, 0.15, 0.25, 2.45, 1234.45, 0.5, 1.5, 2.5, 1.005, 2.675, 123456789.125, -0.04, -0.0, 0.0]
+
+
+def _py_float(v, d):
+    """Helper lama aplikasi: f"{x:,.{d}f}" dengan pemisah ditukar."""
+    return f"{v:,.{d}f}".translate(_SWAP)
+
+
+def _py_int(v):
+    return f"{int(round(v)):,}".replace(",", ".")
+
+
+@pytest.fixture(scope="module")
+def values():
+    rng = np.random.default_rng(0)
+    return np.concatenate([
+        rng.uniform(-1e6, 1e6, 20000),
+        np.round(rng.uniform(-1e4, 1e4, 20000), 3),          # banyak tie desimal
+        rng.lognormal(0, 8, 20000) * rng.choice([-1, 1], 20000),
+        TIES,
+        [1e19, -2.5e20, 9.2e17, 2.0 ** 53 + 1],
+    ])
+
+
+@pytest.mark.parametrize("d", [1, 2, 3])
+def test_float_matches_python_formatter(values, d):
+    assert fmt_float_col(values, d).tolist() == [_py_float(v, d) for v in values.tolist()]
+
+
+def test_int_matches_round(values):
+    assert fmt_int_col(values).tolist() == [_py_int(v) for v in values.tolist()]
+
+
+def test_known_ties():
+    assert fmt_float(0.05) == "0,1"
+    assert fmt_float(2.45) == "2,5"
+    assert fmt_float(1234.45) == "1.234,5"
+    assert fmt_float(-0.04) == "-0,0"
+    assert fmt_int(2.5) == "2" and fmt_int(3.5) == "4"    # round() Python: half-even
+
+
+def test_na_and_non_numeric():
+    assert fmt_float_col([np.nan, np.inf, 1.0]).tolist() == ["-", "-", "1,0"]
+    assert fmt_int("abc") == fmt_float(None) == fmt_p("x") == "-"
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+import statsmodels.api as sm
+
+from tbc.influence import nb_influence
+
+ALPHA = 0.5
+
+
+@pytest.fixture(scope="module")
+def fit():
+    rng = np.random.default_rng(1)
+    n = 60
+    X = np.column_stack([np.ones(n), rng.normal(size=(n, 3))])
+    mu = np.exp(X @ np.array([1.5, 0.3, -0.2, 0.1]))
+    y = rng.negative_binomial(1 / ALPHA, 1 / (1 + ALPHA * mu)).astype("float64")
+    res = sm.GLM(y, X, family=sm.families.NegativeBinomial(alpha=ALPHA)).fit()
+    return y, X, res
+
+
+def test_matches_statsmodels_get_influence(fit):
+    y, X, res = fit
+    ref = res.get_influence(observed=False)          # leverage dari informasi Fisher (bobot IRLS)
+    infl = nb_influence(y, X, res.fittedvalues, ALPHA)
+    assert np.allclose(infl.hat, ref.hat_matrix_diag, rtol=1e-8)
+    assert np.allclose(infl.resid_pearson, ref.resid_studentized, rtol=1e-8)
+    assert np.allclose(infl.cooks, ref.cooks_distance[0], rtol=1e-8)
+    assert np.allclose(infl.dfbetas, ref.dfbetas, rtol=1e-6, atol=1e-10)
+
+
+def test_influential_cutoff(fit):
+    y, X, res = fit
+    infl = nb_influence(y, X, res.fittedvalues, ALPHA)
+    assert infl.cooks_cutoff == pytest.approx(4 / len(y))
+    assert np.array_equal(infl.influential(), infl.cooks > 4 / len(y))
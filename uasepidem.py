@@ -18,6 +18,9 @@ import statsmodels.api as sm
 import statsmodels.formula.api as smf
 from scipy.stats import chi2
 
+from tbc.fmt import fmt_int, fmt_float, fmt_p, fmt_int_col, fmt_float_col, fmt_p_col
+from tbc.schema import normalize
+
 
 # =========================
 # CONFIG (WAJIB PALING ATAS)
@@ -43,30 +46,6 @@ PATH_GEO = DATA_DIR / "indonesia.geojson"
 # =========================
 # HELPERS
 # =========================
-def fmt_int(x):
-    try:
-        return f"{int(round(float(x))):,}".replace(",", ".")
-    except Exception:
-        return "-"
-
-def fmt_float(x, d=1):
-    try:
-        return f"{float(x):,.{d}f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    except Exception:
-        return "-"
-
-def fmt_p(x):
-    try:
-        x = float(x)
-        return "< 0.001" if x < 0.001 else f"{x:.4f}"
-    except Exception:
-        return "-"
-
-def clean_colnames(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df.columns = df.columns.astype(str).str.strip().str.lower()
-    return df
-
 def clean_prov(s: str) -> str:
     s = str(s).strip().upper()
     s = s.replace(".", "").replace(",", "")
@@ -86,39 +65,9 @@ def load_epi2(path: Path) -> pd.DataFrame:
     if not path.exists():
         raise FileNotFoundError(f"File tidak ditemukan: {path}")
 
-    df = pd.read_excel(path)
-    df = clean_colnames(df)
-
-    # rename paling umum
-    rename_map = {
-        "provinsii": "provinsi",
-        "provinsi": "provinsi",
-        "populasi": "populasi",
-        "jumlah_tbc": "jumlah_tbc",
-        "jumlah tbc": "jumlah_tbc",
-        "jumlah_tbc ": "jumlah_tbc",
-        "jumlah_tbc\t": "jumlah_tbc",
-        "jumlah_tbc\n": "jumlah_tbc",
-        "jumlah_tbc\r": "jumlah_tbc",
-        "jumlah_kasus_tbc": "jumlah_tbc",
-        "jumlah kasus tbc": "jumlah_tbc",
-        "kepadatan": "kepadatan",
-        "kelompok_kep": "kelompok_kep",
-        "kelompok kep": "kelompok_kep",
-    }
-    df = df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns})
-
-    required = ["provinsi", "populasi", "jumlah_tbc", "kepadatan"]
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        raise ValueError(f"Kolom wajib tidak ditemukan: {missing}. Kolom terbaca: {list(df.columns)}")
-
-    df["provinsi"] = df["provinsi"].astype(str).str.strip()
-
-    for c in ["populasi", "jumlah_tbc", "kepadatan"]:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
-
-    df = df.dropna(subset=["provinsi", "populasi", "jumlah_tbc", "kepadatan"]).copy()
+    # rename/tipe/rentang dari registry skema (tbc/schema.py)
+    df, _ = normalize(pd.read_excel(path), "epi2", required=("kepadatan",))
+
     df["non_tbc"] = df["populasi"] - df["jumlah_tbc"]
     df["rate_100k"] = (df["jumlah_tbc"] / df["populasi"]) * 100000
     df["prov_clean"] = df["provinsi"].map(clean_prov)
@@ -130,38 +79,7 @@ def load_model(path: Path) -> pd.DataFrame:
     if not path.exists():
         raise FileNotFoundError(f"File tidak ditemukan: {path}")
 
-    df = pd.read_excel(path)
-    df = df.copy()
-
-    # standar kolom
-    rename = {
-        "Provinsi": "provinsi",
-        "provinsi": "provinsi",
-        "Y": "y",
-        "X1": "x1",
-        "X2": "x2",
-        "X3": "x3",
-        "X4": "x4",
-        "X5": "x5",
-    }
-    df = df.rename(columns={k: v for k, v in rename.items() if k in df.columns})
-
-    required = ["provinsi", "y", "x1", "x2", "x3", "x4", "x5"]
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        # coba “lower” kalau excel-nya lowercase
-        df2 = clean_colnames(df)
-        df2 = df2.rename(columns={"provinsi": "provinsi", "y": "y", "x1":"x1","x2":"x2","x3":"x3","x4":"x4","x5":"x5"})
-        missing2 = [c for c in required if c not in df2.columns]
-        if missing2:
-            raise ValueError(f"Kolom wajib model tidak ditemukan: {missing}. Kolom terbaca: {list(df.columns)}")
-        df = df2
-
-    df["provinsi"] = df["provinsi"].astype(str).str.strip()
-    for c in ["y", "x1", "x2", "x3", "x4", "x5"]:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
-    df = df.dropna(subset=["y", "x1", "x2", "x3", "x4", "x5"]).copy()
-
+    df, _ = normalize(pd.read_excel(path), "model")
     return df
 
 @st.cache_data(show_spinner=False)
@@ -569,9 +487,9 @@ elif page == "Epi":
         "jumlah_tbc": "Jumlah TBC",
         "rate_100k": "Rate per 100.000"
     })
-    show_tbl_disp["Populasi"] = show_tbl_disp["Populasi"].map(fmt_int)
-    show_tbl_disp["Jumlah TBC"] = show_tbl_disp["Jumlah TBC"].map(fmt_int)
-    show_tbl_disp["Rate per 100.000"] = show_tbl_disp["Rate per 100.000"].map(lambda x: fmt_float(x, 1))
+    show_tbl_disp["Populasi"] = fmt_int_col(show_tbl_disp["Populasi"])
+    show_tbl_disp["Jumlah TBC"] = fmt_int_col(show_tbl_disp["Jumlah TBC"])
+    show_tbl_disp["Rate per 100.000"] = fmt_float_col(show_tbl_disp["Rate per 100.000"], 1)
 
     st.dataframe(show_tbl_disp, use_container_width=True, hide_index=True, height=360 if view_mode == "Semua" else 280)
 
@@ -733,12 +651,7 @@ elif page == "Model":
         "x5": "X₅ Indeks kualitas udara"
     })
 
-    out["β"] = out["β"].map(lambda x: f"{float(x):.6f}")
-    out["SE"] = out["SE"].map(lambda x: f"{float(x):.6f}")
-    out["IRR"] = out["IRR"].map(lambda x: f"{float(x):.3f}")
-    out["CI95_low"] = out["CI95_low"].map(lambda x: f"{float(x):.3f}")
-    out["CI95_high"] = out["CI95_high"].map(lambda x: f"{float(x):.3f}")
-    out["p-value"] = out["p-value"].map(fmt_p)
+    out["p-value"] = fmt_p_col(out["p-value"])
 
     k1, k2, k3, k4 = st.columns(4, gap="small")
     with k1:
@@ -768,7 +681,15 @@ elif page == "Model":
 
     st.write("")
     st.markdown("""<div class="card"><div style="font-size:16px;font-weight:800;">Estimasi Parameter (β, IRR, CI95%)</div></div>""", unsafe_allow_html=True)
-    st.dataframe(out[["Variabel","β","SE","IRR","CI95_low","CI95_high","p-value"]], use_container_width=True, hide_index=True)
+    st.dataframe(
+        out[["Variabel","β","SE","IRR","CI95_low","CI95_high","p-value"]],
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            c: st.column_config.NumberColumn(format=f) for c, f in
+            [("β", "%.6f"), ("SE", "%.6f"), ("IRR", "%.3f"), ("CI95_low", "%.3f"), ("CI95_high", "%.3f")]
+        }
+    )
 
     st.write("")
     b0 = float(nb_glm.params.get("Intercept", np.nan))